@@ -1,10 +1,25 @@
+import asyncio
+import functools
 import re
 import logging
-from typing import Dict, Any, List, Optional, Tuple
+import time
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple, AsyncIterator, Awaitable, Callable
 from app.models import AIProvider, ConversationMode, SessionData, ChatMessage
 from app.claude_service import ClaudeService
 from app.openai_service import OpenAIService
-from app.prompts import get_system_prompt
+from app.http_client import close_http_client
+from app.prompts import MODE_KEYS, get_system_prompt, get_summary_prompt
+from app.config import settings
+from app.token_budget import TOKEN_ESTIMATORS, window_messages
+from app.conversation_summarizer import SUMMARY_KEY
+from app.keyword_matcher import KeywordMatcher
+from app.session_signals import recently_confused
+from app.tracing import current_span, span, start_span
+from app.llm_cassette import cassette_session, create_cassette, get_cassette, set_cassette
+from app.metrics import LLM_ERRORS, LLM_FALLBACKS, LLM_LATENCY
+from app.provider_metrics import CircuitBreaker, HedgeStats, LatencyWindow
+from app.response_cache import CachedResponse, ResponseCache, ResponseKey, history_fingerprint, normalize_message
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +31,23 @@ class AIOrchestrator:
         self.claude_service = ClaudeService()
         self.openai_service = OpenAIService()
         self.is_initialized = False
+        self.latency = {provider: LatencyWindow() for provider in AIProvider}
+        self.hedge_stats = HedgeStats()
+        self.breakers = {
+            provider: CircuitBreaker(
+                provider.value,
+                self.latency[provider],
+                error_threshold=settings.breaker_error_threshold,
+                latency_threshold=settings.breaker_latency_threshold_seconds,
+                cooldown_seconds=settings.breaker_cooldown_seconds
+            )
+            for provider in AIProvider
+        }
+        self.response_cache = ResponseCache(
+            max_entries=settings.response_cache_max_entries,
+            ttl_seconds=settings.response_cache_ttl_seconds,
+            similarity_threshold=settings.response_cache_similarity_threshold
+        )
         
         self.keywords_learning = [
             "how", "why", "what if", "explain", "tell me about",
@@ -41,9 +73,22 @@ class AIOrchestrator:
             "rocks": ["rock", "mineral", "erosion", "sediment", "fossil", "geology"],
             "pulleys": ["pulley", "gear", "machine", "force", "lever", "mechanical"]
         }
+        
+        # Mode and topic keywords are both found in one pass per message
+        self.keyword_matcher = KeywordMatcher({
+            ConversationMode.LEARNING: self.keywords_learning,
+            ConversationMode.EXPLANATORY: self.keywords_explanatory,
+            ConversationMode.STORY: self.keywords_story,
+            **self.topic_keywords
+        })
+        self.keyword_counts: Dict[str, Dict[Any, int]] = {}
     
     async def initialize(self):
         """Initialize AI services"""
+        set_cassette(create_cassette())
+        if get_cassette():
+            logger.info(f"LLM cassette: {settings.llm_cassette_mode} {settings.llm_cassette_path}")
+        
         try:
             await self.claude_service.initialize()
             logger.info("Claude service initialized")
@@ -66,6 +111,43 @@ class AIOrchestrator:
         """Check OpenAI service health"""
         return await self.openai_service.check_health()
     
+    async def precompile_prompts(self, content_service):
+        """Pre-render every mode x topic system prompt so the hot path is a dictionary lookup"""
+        system_prompts = {mode: get_system_prompt(mode) for mode in MODE_KEYS}
+        bundles = await asyncio.gather(*(
+            content_service.get_topic_bundle(topic) for topic in self.topic_keywords
+        ))
+        contents = [b["enriched_content"] for b in bundles if b["enriched_content"]]
+        
+        for service in (self.claude_service, self.openai_service):
+            service.prompt_compiler.precompile(system_prompts, contents)
+        
+        logger.info(f"Precompiled system prompts for {len(system_prompts)} modes x {len(contents)} topics")
+    
+    def get_provider_stats(self) -> Dict[str, Any]:
+        """Recent provider latencies and hedging outcomes"""
+        return {
+            "latency": {provider.value: window.stats() for provider, window in self.latency.items()},
+            "circuits": {provider.value: breaker.stats() for provider, breaker in self.breakers.items()},
+            "hedging": self.hedge_stats.stats()
+        }
+    
+    def get_cassette_stats(self) -> Optional[Dict[str, Any]]:
+        """Recorded calls and replay hits/misses, when a cassette is in use"""
+        cassette = get_cassette()
+        return cassette.stats() if cassette else None
+    
+    def get_response_cache_stats(self) -> Dict[str, Any]:
+        """Hit counters for the response cache"""
+        return self.response_cache.stats()
+    
+    def get_prompt_cache_stats(self) -> Dict[str, Any]:
+        """Cached vs uncached input tokens reported by each provider"""
+        return {
+            "claude": self.claude_service.prompt_cache.stats(),
+            "openai": self.openai_service.prompt_cache.stats()
+        }
+    
     async def process_message(
         self,
         message: str,
@@ -75,7 +157,213 @@ class AIOrchestrator:
         force_mode: Optional[ConversationMode] = None
     ) -> Dict[str, Any]:
         """Process message and generate response"""
+        cassette_session.set(session.session_id)
         
+        with span("orchestrator.process_message") as process_span:
+            with span("orchestrator.select"):
+                provider, mode = self._select_provider_and_mode(
+                    message, 
+                    session,
+                    force_provider,
+                    force_mode
+                )
+            
+            logger.info(f"Selected provider: {provider}, mode: {mode}")
+            process_span.set_attribute("mode", mode.value)
+            
+            cache_key = self._response_cache_key(message, session, mode, force_provider)
+            cached = self.response_cache.get(cache_key) if cache_key else None
+            process_span.set_attribute("cached", cached is not None)
+            if cached:
+                logger.info(f"Serving cached response for mode {mode}")
+                process_span.set_attribute("provider", cached.provider.value)
+                return {
+                    "response": cached.response,
+                    "provider": cached.provider,
+                    "mode": mode,
+                    "history_cutoff": None,
+                    "cached": True
+                }
+            
+            with span("prompt.build"):
+                system_prompt = get_system_prompt(mode)
+                session_context = self._session_context(session)
+                history_cutoff = self._history_cutoff(session, provider, system_prompt, session_context)
+            
+            call = functools.partial(
+                self._call_provider,
+                session=session,
+                system_prompt=system_prompt,
+                mode=mode,
+                curriculum_content=curriculum_content,
+                session_context=session_context
+            )
+            
+            if settings.hedge_enabled and not force_provider:
+                response, provider = await self._hedged_call(provider, call)
+            else:
+                try:
+                    response = await call(provider)
+                
+                except Exception as e:
+                    logger.error(f"Primary provider {provider} failed: {str(e)}")
+                    
+                    fallback_provider = self._other_provider(provider)
+                    
+                    logger.info(f"Attempting fallback to {fallback_provider}")
+                    LLM_FALLBACKS.inc(from_provider=provider.value)
+                    
+                    try:
+                        response = await call(fallback_provider)
+                        provider = fallback_provider
+                    except Exception as fallback_error:
+                        logger.error(f"Fallback provider {fallback_provider} also failed: {str(fallback_error)}")
+                        raise Exception("Both AI providers failed. Please try again later.")
+            
+            if cache_key:
+                self.response_cache.put(cache_key, CachedResponse(response, provider))
+            process_span.set_attribute("provider", provider.value)
+            
+            return {
+                "response": response,
+                "provider": provider,
+                "mode": mode,
+                "history_cutoff": history_cutoff,
+                "cached": False
+            }
+    
+    async def _hedged_call(
+        self,
+        provider: AIProvider,
+        call: Callable[[AIProvider], Awaitable[str]]
+    ) -> Tuple[str, AIProvider]:
+        """Race the other provider against a slow or failed primary
+        
+        The hedge fires once the primary has run longer than its recent p95
+        latency (or `hedge_delay_seconds` until enough calls have been seen),
+        or immediately if the primary fails first. The first successful
+        response wins and the other call is cancelled.
+        """
+        self.hedge_stats.requests += 1
+        hedge_provider = self._other_provider(provider)
+        tasks = {asyncio.create_task(call(provider)): provider}
+        
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self._hedge_delay(provider))
+            primary = next(iter(tasks))
+            if primary in done and not primary.exception():
+                self.hedge_stats.primary_wins += 1
+                return primary.result(), provider
+            
+            if primary in done:
+                logger.error(f"Primary provider {provider} failed: {str(primary.exception())}")
+                LLM_FALLBACKS.inc(from_provider=provider.value)
+                del tasks[primary]
+            else:
+                logger.info(f"Primary provider {provider} is slow, hedging with {hedge_provider}")
+            
+            self.hedge_stats.hedged += 1
+            tasks[asyncio.create_task(call(hedge_provider))] = hedge_provider
+            
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception():
+                        logger.error(f"Provider {tasks[task]} failed: {str(task.exception())}")
+                        continue
+                    
+                    winner = tasks[task]
+                    if winner == hedge_provider:
+                        self.hedge_stats.hedge_wins += 1
+                    else:
+                        self.hedge_stats.primary_wins += 1
+                    return task.result(), winner
+            
+            self.hedge_stats.failures += 1
+            raise Exception("Both AI providers failed. Please try again later.")
+        
+        finally:
+            # Cancel the loser (or everything, if the caller itself was cancelled)
+            losers = [task for task in tasks if not task.done()]
+            for task in losers:
+                task.cancel()
+            await asyncio.gather(*losers, return_exceptions=True)
+    
+    def _hedge_delay(self, provider: AIProvider) -> float:
+        """How long to wait on a provider before hedging"""
+        p95 = self.latency[provider].percentile(settings.hedge_percentile)
+        return p95 if p95 is not None else settings.hedge_delay_seconds
+    
+    async def _call_provider(
+        self,
+        provider: AIProvider,
+        session: SessionData,
+        system_prompt: str,
+        mode: ConversationMode,
+        curriculum_content: Optional[Dict[str, Any]] = None,
+        session_context: Optional[str] = None
+    ) -> str:
+        """Generate a response from one provider within its timeout, recording its latency"""
+        use = self._use_claude if provider == AIProvider.CLAUDE else self._use_openai
+        timeout = self._provider_timeout(provider)
+        
+        started = time.perf_counter()
+        try:
+            with self.breakers[provider].call(), span("provider.call", provider=provider.value):
+                response = await asyncio.wait_for(
+                    use(
+                        self._context_window(session, provider, system_prompt, session_context),
+                        system_prompt,
+                        mode,
+                        curriculum_content,
+                        session_context
+                    ),
+                    timeout=timeout
+                )
+        except asyncio.CancelledError:
+            # A hedge loser (or abandoned turn) took at least this long; without this censored
+            # sample the window only sees the fast calls and the hedge delay keeps shrinking
+            self.latency[provider].record(time.perf_counter() - started)
+            raise
+        except Exception as e:
+            self.breakers[provider].record_failure()
+            LLM_ERRORS.inc(provider=provider.value, error=type(e).__name__)
+            raise
+        
+        elapsed = time.perf_counter() - started
+        self.latency[provider].record(elapsed)
+        self.breakers[provider].record_success(elapsed)
+        LLM_LATENCY.observe(elapsed, provider=provider.value)
+        return response
+    
+    @staticmethod
+    def _provider_timeout(provider: AIProvider) -> float:
+        return (
+            settings.claude_timeout_seconds if provider == AIProvider.CLAUDE
+            else settings.openai_timeout_seconds
+        )
+    
+    @staticmethod
+    def _other_provider(provider: AIProvider) -> AIProvider:
+        return AIProvider.OPENAI if provider == AIProvider.CLAUDE else AIProvider.CLAUDE
+    
+    async def stream_message(
+        self,
+        message: str,
+        session: SessionData,
+        curriculum_content: Optional[Dict[str, Any]] = None,
+        force_provider: Optional[AIProvider] = None,
+        force_mode: Optional[ConversationMode] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Process message and stream the response as events
+        
+        Yields a "start" event with the selected provider and mode before any
+        generation, "token" events as text arrives, a "fallback" event if the
+        primary provider fails before its first token, and a final "end" event
+        carrying the full response text.
+        """
+        cassette_session.set(session.session_id)
         provider, mode = self._select_provider_and_mode(
             message, 
             session,
@@ -83,66 +371,206 @@ class AIOrchestrator:
             force_mode
         )
         
-        logger.info(f"Selected provider: {provider}, mode: {mode}")
+        logger.info(f"Selected provider: {provider}, mode: {mode} (streaming)")
+        
+        cache_key = self._response_cache_key(message, session, mode, force_provider)
+        cached = self.response_cache.get(cache_key) if cache_key else None
+        if cached:
+            logger.info(f"Serving cached response for mode {mode} (streaming)")
+            yield {"event": "start", "provider": cached.provider, "mode": mode}
+            yield {"event": "token", "text": cached.response}
+            yield {
+                "event": "end",
+                "response": cached.response,
+                "provider": cached.provider,
+                "mode": mode,
+                "history_cutoff": None,
+                "cached": True
+            }
+            return
         
         system_prompt = get_system_prompt(mode)
+        session_context = self._session_context(session)
+        history_cutoff = self._history_cutoff(session, provider, system_prompt, session_context)
+        
+        yield {"event": "start", "provider": provider, "mode": mode}
         
+        chunks: List[str] = []
         try:
-            if provider == AIProvider.CLAUDE:
-                response = await self._use_claude(
-                    session.messages,
-                    system_prompt,
-                    mode,
-                    curriculum_content
-                )
-            else:
-                response = await self._use_openai(
-                    session.messages,
-                    system_prompt,
-                    mode,
-                    curriculum_content
-                )
-            
-            return {
-                "response": response,
-                "provider": provider,
-                "mode": mode
-            }
-            
+            async for text in self._stream_provider(
+                provider, session, system_prompt, mode, curriculum_content, session_context
+            ):
+                chunks.append(text)
+                yield {"event": "token", "text": text}
         except Exception as e:
+            if chunks:
+                # Tokens already reached the student; restarting on another provider would garble the reply
+                logger.error(f"Provider {provider} failed mid-stream: {str(e)}")
+                raise
+            
             logger.error(f"Primary provider {provider} failed: {str(e)}")
             
-            fallback_provider = (
+            LLM_FALLBACKS.inc(from_provider=provider.value)
+            provider = (
                 AIProvider.OPENAI if provider == AIProvider.CLAUDE 
                 else AIProvider.CLAUDE
             )
             
-            logger.info(f"Attempting fallback to {fallback_provider}")
+            logger.info(f"Attempting fallback to {provider}")
+            yield {"event": "fallback", "provider": provider, "mode": mode}
             
             try:
-                if fallback_provider == AIProvider.CLAUDE:
-                    response = await self._use_claude(
-                        session.messages,
-                        system_prompt,
-                        mode,
-                        curriculum_content
-                    )
-                else:
-                    response = await self._use_openai(
-                        session.messages,
-                        system_prompt,
-                        mode,
-                        curriculum_content
-                    )
-                
-                return {
-                    "response": response,
-                    "provider": fallback_provider,
-                    "mode": mode
-                }
+                async for text in self._stream_provider(
+                    provider, session, system_prompt, mode, curriculum_content, session_context
+                ):
+                    chunks.append(text)
+                    yield {"event": "token", "text": text}
             except Exception as fallback_error:
-                logger.error(f"Fallback provider {fallback_provider} also failed: {str(fallback_error)}")
+                logger.error(f"Fallback provider {provider} also failed: {str(fallback_error)}")
                 raise Exception("Both AI providers failed. Please try again later.")
+        
+        response = "".join(chunks)
+        if cache_key:
+            self.response_cache.put(cache_key, CachedResponse(response, provider))
+        
+        yield {
+            "event": "end",
+            "response": response,
+            "provider": provider,
+            "mode": mode,
+            "history_cutoff": history_cutoff,
+            "cached": False
+        }
+    
+    async def _stream_provider(
+        self,
+        provider: AIProvider,
+        session: SessionData,
+        system_prompt: str,
+        mode: ConversationMode,
+        curriculum_content: Optional[Dict[str, Any]] = None,
+        session_context: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """Stream tokens from a provider, reporting the outcome to its circuit breaker
+        
+        The provider's timeout bounds the wait for the first token; once text
+        flows, a long reply is not cut off. A finished stream's duration is
+        recorded like a non-streaming call. Traced as a "provider.stream" span
+        with the time to first token and the chunk count; it spans the
+        consumer's yields, so it is ended by hand.
+        """
+        service = self.claude_service if provider == AIProvider.CLAUDE else self.openai_service
+        stream_span = start_span("provider.stream", current_span(), provider=provider.value)
+        started = time.perf_counter()
+        chunks = 0
+        stream = service.stream_response(
+            messages=self._context_window(session, provider, system_prompt, session_context),
+            system_prompt=system_prompt,
+            mode=mode,
+            curriculum_content=curriculum_content,
+            session_context=session_context
+        )
+        try:
+            with self.breakers[provider].call():
+                text = await asyncio.wait_for(anext(stream, None), timeout=self._provider_timeout(provider))
+                if text is not None:
+                    stream_span.set_attribute("first_token_ms", round((time.perf_counter() - started) * 1000, 2))
+                while text is not None:
+                    chunks += 1
+                    yield text
+                    text = await anext(stream, None)
+        except BaseException as e:
+            stream_span.set_attribute("chunks", chunks)
+            stream_span.end(error=str(e) or type(e).__name__)
+            if isinstance(e, Exception):
+                self.breakers[provider].record_failure()
+                LLM_ERRORS.inc(provider=provider.value, error=type(e).__name__)
+            raise
+        finally:
+            await stream.aclose()
+        
+        elapsed = time.perf_counter() - started
+        stream_span.set_attribute("chunks", chunks)
+        stream_span.end()
+        self.latency[provider].record(elapsed)
+        self.breakers[provider].record_success(elapsed)
+        LLM_LATENCY.observe(elapsed, provider=provider.value)
+    
+    def _response_cache_key(
+        self,
+        message: str,
+        session: SessionData,
+        mode: ConversationMode,
+        force_provider: Optional[AIProvider] = None
+    ) -> Optional[ResponseKey]:
+        """Cache key for this turn, or None if it shouldn't be served from or stored in the cache
+        
+        Only early turns are cacheable: later replies depend on a conversation
+        other students haven't had. A forced provider always gets a fresh reply.
+        """
+        if not settings.response_cache_enabled or force_provider:
+            return None
+        
+        # The session already ends with the current user message
+        history = [m for m in session.messages[:-1] if m.role != "system"]
+        if len(history) > settings.response_cache_max_history or SUMMARY_KEY in session.metadata:
+            return None
+        
+        return ResponseKey(
+            text=normalize_message(message),
+            mode=mode,
+            topic=self.extract_topic(message),
+            history=history_fingerprint(history)
+        )
+    
+    def _session_context(self, session: SessionData) -> Optional[str]:
+        """Per-session system prompt text: the running summary of turns no longer sent"""
+        summary = session.metadata.get(SUMMARY_KEY)
+        if not summary:
+            return None
+        
+        return (
+            "=== EARLIER IN THIS CONVERSATION ===\n"
+            "Notes on turns no longer shown below. Build on what the student already "
+            "learned instead of re-explaining it.\n"
+            f"{summary}"
+        )
+    
+    def _history_cutoff(
+        self,
+        session: SessionData,
+        provider: AIProvider,
+        system_prompt: str,
+        session_context: Optional[str] = None
+    ) -> Optional[datetime]:
+        """Timestamp of the oldest message sent, or None if the whole history fits"""
+        window = self._context_window(session, provider, system_prompt, session_context)
+        if window and len(window) < len(session.messages):
+            return window[0].timestamp
+        return None
+    
+    def _context_window(
+        self,
+        session: SessionData,
+        provider: AIProvider,
+        system_prompt: str,
+        session_context: Optional[str] = None
+    ) -> List[ChatMessage]:
+        """Newest session messages that fit the prompt token budget for a provider"""
+        estimator = TOKEN_ESTIMATORS[provider]
+        budget = (
+            settings.prompt_token_budget
+            - estimator.count_text(system_prompt)
+            - estimator.count_text(session_context or "")
+        )
+        window = window_messages(session.messages, budget, estimator, session.token_count)
+        
+        if len(window) < len(session.messages):
+            logger.debug(
+                f"Sending {len(window)} of {len(session.messages)} messages "
+                f"for session {session.session_id} within {budget} tokens"
+            )
+        return window
     
     def _select_provider_and_mode(
         self,
@@ -156,9 +584,7 @@ class AIOrchestrator:
         if force_provider and force_mode:
             return force_provider, force_mode
         
-        message_lower = message.lower()
-        
-        mode = force_mode or self._determine_mode(message_lower, session)
+        mode = force_mode or self._determine_mode(message, session)
         
         if force_provider:
             provider = force_provider
@@ -171,20 +597,33 @@ class AIOrchestrator:
                 provider = AIProvider.CLAUDE if len(session.messages) < 10 else AIProvider.OPENAI
             else:
                 provider = AIProvider.CLAUDE
+            
+            provider = self._route_around_open_circuits(provider)
         
         return provider, mode
     
-    def _determine_mode(self, message_lower: str, session: SessionData) -> ConversationMode:
-        """Determine conversation mode based on message content"""
+    def _route_around_open_circuits(self, provider: AIProvider) -> AIProvider:
+        """Prefer the mode's provider unless its circuit is open and the other one's isn't"""
+        if self.breakers[provider].allow_request():
+            return provider
         
-        explanatory_score = sum(1 for kw in self.keywords_explanatory if kw in message_lower)
-        learning_score = sum(1 for kw in self.keywords_learning if kw in message_lower)
-        story_score = sum(1 for kw in self.keywords_story if kw in message_lower)
+        other = self._other_provider(provider)
+        if self.breakers[other].allow_request():
+            logger.info(f"Circuit for {provider} is open, routing to {other}")
+            return other
         
-        if len(session.messages) > 5:
-            recent_messages = " ".join([m.content.lower() for m in session.messages[-5:]])
-            if "confused" in recent_messages or "don't understand" in recent_messages:
-                explanatory_score += 2
+        # Both degraded: better to try than to refuse
+        return provider
+    
+    def _determine_mode(self, message: str, session: SessionData) -> ConversationMode:
+        """Determine conversation mode based on message content"""
+        counts = self._keyword_counts(message)
+        explanatory_score = counts.get(ConversationMode.EXPLANATORY, 0)
+        learning_score = counts.get(ConversationMode.LEARNING, 0)
+        story_score = counts.get(ConversationMode.STORY, 0)
+        
+        if len(session.messages) > 5 and recently_confused(session.stats):
+            explanatory_score += 2
         
         if explanatory_score > learning_score and explanatory_score > story_score:
             return ConversationMode.EXPLANATORY
@@ -195,19 +634,30 @@ class AIOrchestrator:
         else:
             return ConversationMode.DISCOVERY
     
+    def _keyword_counts(self, text: str) -> Dict[Any, int]:
+        """Distinct keywords per label, memoized so mode and topic detection share one scan"""
+        counts = self.keyword_counts.get(text)
+        if counts is None:
+            if len(self.keyword_counts) >= 1024:
+                self.keyword_counts.clear()
+            counts = self.keyword_counts[text] = self.keyword_matcher.count(text)
+        return counts
+    
     async def _use_claude(
         self,
         messages: List[ChatMessage],
         system_prompt: str,
         mode: ConversationMode,
-        curriculum_content: Optional[Dict[str, Any]] = None
+        curriculum_content: Optional[Dict[str, Any]] = None,
+        session_context: Optional[str] = None
     ) -> str:
         """Use Claude to generate response"""
         return await self.claude_service.generate_response(
             messages=messages,
             system_prompt=system_prompt,
             mode=mode,
-            curriculum_content=curriculum_content
+            curriculum_content=curriculum_content,
+            session_context=session_context
         )
     
     async def _use_openai(
@@ -215,22 +665,47 @@ class AIOrchestrator:
         messages: List[ChatMessage],
         system_prompt: str,
         mode: ConversationMode,
-        curriculum_content: Optional[Dict[str, Any]] = None
+        curriculum_content: Optional[Dict[str, Any]] = None,
+        session_context: Optional[str] = None
     ) -> str:
         """Use OpenAI to generate response"""
         return await self.openai_service.generate_response(
             messages=messages,
             system_prompt=system_prompt,
             mode=mode,
-            curriculum_content=curriculum_content
+            curriculum_content=curriculum_content,
+            session_context=session_context
         )
     
+    async def summarize_conversation(
+        self,
+        messages: List[ChatMessage],
+        previous_summary: Optional[str] = None
+    ) -> str:
+        """Fold conversation turns into the running summary, preferring Claude"""
+        transcript = "\n".join(
+            f"{'Student' if m.role == 'user' else 'Maple'}: {m.content}" for m in messages
+        )
+        prompt = (
+            f"Notes so far:\n{previous_summary or '(none yet)'}\n\n"
+            f"New turns:\n{transcript}\n\n"
+            "Updated notes:"
+        )
+        max_tokens = settings.summary_max_tokens
+        
+        try:
+            return await self.claude_service.complete(prompt, get_summary_prompt(), max_tokens=max_tokens)
+        except Exception as e:
+            logger.warning(f"Claude summary failed, trying OpenAI: {str(e)}")
+            return await self.openai_service.complete(prompt, get_summary_prompt(), max_tokens=max_tokens)
+    
     def extract_topic(self, message: str) -> Optional[str]:
         """Extract topic from message"""
-        message_lower = message.lower()
+        counts = self._keyword_counts(message)
         
-        for topic, keywords in self.topic_keywords.items():
-            if any(keyword in message_lower for keyword in keywords):
+        # Earlier topics win when a message mentions several
+        for topic in self.topic_keywords:
+            if topic in counts:
                 return topic
         
         return None
@@ -243,7 +718,11 @@ class AIOrchestrator:
     
     async def cleanup(self):
         """Cleanup AI services"""
+        cassette = get_cassette()
+        if cassette and cassette.recording:
+            await asyncio.to_thread(cassette.flush)
         await self.claude_service.cleanup()
         await self.openai_service.cleanup()
+        await close_http_client()
         self.is_initialized = False
         logger.info("AI Orchestrator cleaned up")
\ No newline at end of file
@@ -1,21 +1,27 @@
 from pyairtable import Api
 from typing import Dict, Any, List, Optional
+import asyncio
 import logging
-from datetime import datetime, timedelta
+from app.cache import AsyncTTLCache
 from app.config import settings
+from app.content_provider import ContentProvider
+from app.tracing import span
 
 logger = logging.getLogger(__name__)
 
 
-class AirtableService:
+class AirtableService(ContentProvider):
     """Service for interacting with Airtable curriculum content"""
     
     def __init__(self):
         self.api = None
         self.base = None
         self.is_initialized = False
-        self.cache = {}
-        self.cache_expiry = {}
+        self.cache = AsyncTTLCache(
+            ttl_seconds=settings.cache_ttl_seconds,
+            max_entries=settings.cache_max_items,
+            stale_ttl_seconds=settings.cache_stale_ttl_seconds
+        )
     
     async def initialize(self):
         """Initialize Airtable connection"""
@@ -26,7 +32,7 @@ class AirtableService:
             logger.info("Airtable service initialized successfully")
             
             await self._load_initial_content()
-            
+        
         except Exception as e:
             logger.error(f"Failed to initialize Airtable service: {str(e)}")
             self.is_initialized = False
@@ -37,8 +43,7 @@ class AirtableService:
             return False
         
         try:
-            curriculum_table = self.base.table('Grade4_Science_Curriculum')
-            records = curriculum_table.all(max_records=1)
+            await self._fetch_records('Grade4_Science_Curriculum', max_records=1)
             return True
         except Exception as e:
             logger.error(f"Airtable health check failed: {str(e)}")
@@ -46,29 +51,11 @@ class AirtableService:
     
     async def get_content_for_topic(self, topic: str) -> Optional[Dict[str, Any]]:
         """Get curriculum content for a specific topic"""
-        
-        cache_key = f"topic_{topic}"
-        if self._is_cache_valid(cache_key):
-            logger.debug(f"Returning cached content for topic: {topic}")
-            return self.cache[cache_key]
-        
         try:
-            curriculum_table = self.base.table('Grade4_Science_Curriculum')
-            
-            formula = f"LOWER({{Topic Name}}) = '{topic.lower()}'"
-            records = curriculum_table.all(formula=formula)
-            
-            if not records:
-                formula = f"SEARCH('{topic.lower()}', LOWER({{Topic Name}})) > 0"
-                records = curriculum_table.all(formula=formula)
-            
-            if records:
-                content = self._format_curriculum_content(records[0])
-                self._update_cache(cache_key, content)
-                return content
-            
-            return None
-            
+            return await self.cache.get_or_load(
+                f"topic_{topic.lower()}",
+                lambda: self._fetch_content_for_topic(topic)
+            )
         except Exception as e:
             logger.error(f"Failed to fetch content for topic {topic}: {str(e)}")
             return self._get_fallback_content(topic)
@@ -76,22 +63,10 @@ class AirtableService:
     async def get_canadian_examples(self, topic: str) -> List[str]:
         """Get Canadian examples for a topic"""
         try:
-            examples_table = self.base.table('Canadian_Examples')
-            
-            formula = f"LOWER({{Topic Name}}) = '{topic.lower()}'"
-            records = examples_table.all(formula=formula)
-            
-            examples = []
-            for record in records:
-                if 'fields' in record and 'Example Title' in record['fields']:
-                    example_text = record['fields'].get('Example Title', '')
-                    description = record['fields'].get('Description', '')
-                    if description:
-                        example_text = f"{example_text}: {description}"
-                    examples.append(example_text)
-            
-            return examples
-            
+            return await self.cache.get_or_load(
+                f"examples_{topic.lower()}",
+                lambda: self._fetch_canadian_examples(topic)
+            )
         except Exception as e:
             logger.error(f"Failed to fetch Canadian examples: {str(e)}")
             return self._get_fallback_canadian_examples(topic)
@@ -99,35 +74,64 @@ class AirtableService:
     async def get_activities(self, topic: str) -> List[Dict[str, Any]]:
         """Get hands-on activities for a topic"""
         try:
-            activities_table = self.base.table('Activity_Templates')
-            
-            formula = f"LOWER({{Topic Name}}) = '{topic.lower()}'"
-            records = activities_table.all(formula=formula)
-            
-            activities = []
-            for record in records:
-                if 'fields' in record:
-                    activity = {
-                        'name': record['fields'].get('Activity Name', 'Activity'),
-                        'description': record['fields'].get('Instructions', ''),
-                        'materials': record['fields'].get('Materials Needed', '').split(',') if record['fields'].get('Materials Needed') else [],
-                        'steps': record['fields'].get('Instructions', '').split('\n') if record['fields'].get('Instructions') else [],
-                        'learning_outcome': record['fields'].get('Discussion Prompts', '')
-                    }
-                    activities.append(activity)
-            
-            return activities
-            
+            return await self.cache.get_or_load(
+                f"activities_{topic.lower()}",
+                lambda: self._fetch_activities(topic)
+            )
         except Exception as e:
             logger.error(f"Failed to fetch activities: {str(e)}")
             return self._get_fallback_activities(topic)
     
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get content cache hit/miss counters"""
+        return self.cache.stats()
+    
+    async def _fetch_content_for_topic(self, topic: str) -> Optional[Dict[str, Any]]:
+        """Fetch curriculum content for a topic from Airtable"""
+        formula = f"LOWER({{Topic Name}}) = '{topic.lower()}'"
+        records = await self._fetch_records('Grade4_Science_Curriculum', formula=formula)
+        
+        if not records:
+            formula = f"SEARCH('{topic.lower()}', LOWER({{Topic Name}})) > 0"
+            records = await self._fetch_records('Grade4_Science_Curriculum', formula=formula)
+        
+        if records:
+            return self._format_curriculum_content(records[0])
+        
+        return None
+    
+    async def _fetch_canadian_examples(self, topic: str) -> List[str]:
+        """Fetch Canadian examples for a topic from Airtable"""
+        formula = f"LOWER({{Topic Name}}) = '{topic.lower()}'"
+        records = await self._fetch_records('Canadian_Examples', formula=formula)
+        
+        return [
+            self._format_canadian_example(record)
+            for record in records
+            if 'fields' in record and 'Example Title' in record['fields']
+        ]
+    
+    async def _fetch_activities(self, topic: str) -> List[Dict[str, Any]]:
+        """Fetch hands-on activities for a topic from Airtable"""
+        formula = f"LOWER({{Topic Name}}) = '{topic.lower()}'"
+        records = await self._fetch_records('Activity_Templates', formula=formula)
+        
+        return [self._format_activity(record) for record in records if 'fields' in record]
+    
+    async def _fetch_records(self, table_name: str, **kwargs) -> List[Dict[str, Any]]:
+        """Fetch records off the event loop (pyairtable is a blocking client)"""
+        table = self.base.table(table_name)
+        with span("airtable.fetch", table=table_name) as fetch_span:
+            records = await asyncio.to_thread(table.all, **kwargs)
+            fetch_span.set_attribute("records", len(records))
+        return records
+    
     async def _load_initial_content(self):
         """Load initial content into cache"""
         try:
             topics = ['light', 'sound', 'structures', 'habitats', 'rocks', 'pulleys']
             for topic in topics:
-                await self.get_content_for_topic(topic)
+                await self.get_topic_bundle(topic)
             logger.info("Initial content loaded into cache")
         except Exception as e:
             logger.warning(f"Failed to load initial content: {str(e)}")
@@ -149,16 +153,25 @@ class AirtableService:
             'indigenous_perspective': fields.get('Indigenous Perspective', '')
         }
     
-    def _is_cache_valid(self, key: str) -> bool:
-        """Check if cached content is still valid"""
-        if key not in self.cache or key not in self.cache_expiry:
-            return False
-        return datetime.utcnow() < self.cache_expiry[key]
+    def _format_canadian_example(self, record: Dict[str, Any]) -> str:
+        """Format Airtable record into a Canadian example string"""
+        fields = record.get('fields', {})
+        example_text = fields.get('Example Title', '')
+        description = fields.get('Description', '')
+        if description:
+            example_text = f"{example_text}: {description}"
+        return example_text
     
-    def _update_cache(self, key: str, value: Any):
-        """Update cache with new content"""
-        self.cache[key] = value
-        self.cache_expiry[key] = datetime.utcnow() + timedelta(seconds=settings.cache_ttl_seconds)
+    def _format_activity(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Format Airtable record into an activity"""
+        fields = record.get('fields', {})
+        return {
+            'name': fields.get('Activity Name', 'Activity'),
+            'description': fields.get('Instructions', ''),
+            'materials': fields.get('Materials Needed', '').split(',') if fields.get('Materials Needed') else [],
+            'steps': fields.get('Instructions', '').split('\n') if fields.get('Instructions') else [],
+            'learning_outcome': fields.get('Discussion Prompts', '')
+        }
     
     def _get_fallback_content(self, topic: str) -> Dict[str, Any]:
         """Get fallback content when Airtable is unavailable"""
@@ -244,6 +257,5 @@ class AirtableService:
         self.api = None
         self.base = None
         self.cache.clear()
-        self.cache_expiry.clear()
         self.is_initialized = False
         logger.info("Airtable service cleaned up")
\ No newline at end of file
@@ -1,28 +1,37 @@
 """
-Content API endpoints for Airtable curriculum data
+Content API endpoints for curriculum data (Airtable or local content files)
 """
 
-from fastapi import APIRouter, HTTPException, Query, Depends
+from fastapi import APIRouter, HTTPException, Query, Depends, Request
 from typing import List, Optional, Dict
-from app.airtable_service import AirtableService
+from app.config import settings
+from app.content_provider import ContentProvider
+from app.health_monitor import HealthMonitor
 import logging
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 
-# Dependency to get AirtableService instance
-async def get_airtable_service():
-    """Get initialized Airtable service"""
-    service = AirtableService()
-    await service.initialize()
-    return service
+# Dependency to get the content provider instance
+async def get_content_service(request: Request) -> ContentProvider:
+    """Get the shared content provider initialized at application startup
+    
+    Reusing the long-lived instance keeps its warm cache, so content requests
+    don't reconnect and reload every topic from Airtable.
+    """
+    return request.app.state.content_service
+
+
+async def get_health_monitor(request: Request) -> HealthMonitor:
+    """Get the application's HealthMonitor, which probes the content provider in the background"""
+    return request.app.state.health_monitor
 
 
 @router.get("/curriculum/topics")
 async def get_curriculum_topics(
     topic: Optional[str] = Query(None, description="Filter by topic name"),
-    service: AirtableService = Depends(get_airtable_service)
+    service: ContentProvider = Depends(get_content_service)
 ):
     """Get curriculum content for a specific topic"""
     try:
@@ -48,7 +57,7 @@ async def get_curriculum_topics(
 @router.get("/activities")
 async def get_activities(
     topic: str = Query(..., description="Curriculum topic"),
-    service: AirtableService = Depends(get_airtable_service)
+    service: ContentProvider = Depends(get_content_service)
 ):
     """Get activities for a specific topic"""
     try:
@@ -62,7 +71,7 @@ async def get_activities(
 @router.get("/canadian-examples")
 async def get_canadian_examples(
     topic: str = Query(..., description="Curriculum topic"),
-    service: AirtableService = Depends(get_airtable_service)
+    service: ContentProvider = Depends(get_content_service)
 ):
     """Get Canadian examples for a topic"""
     try:
@@ -82,20 +91,21 @@ async def get_canadian_examples(
 
 @router.get("/health")
 async def health_check(
-    service: AirtableService = Depends(get_airtable_service)
+    service: ContentProvider = Depends(get_content_service),
+    monitor: HealthMonitor = Depends(get_health_monitor)
 ):
-    """Check if Airtable service is healthy"""
-    try:
-        is_healthy = await service.check_health()
-        return {
-            "status": "healthy" if is_healthy else "unhealthy",
-            "service": "airtable",
-            "initialized": service.is_initialized
-        }
-    except Exception as e:
-        logger.error(f"Health check failed: {e}")
-        return {
-            "status": "unhealthy",
-            "service": "airtable",
-            "error": str(e)
-        }
\ No newline at end of file
+    """Content provider health from the HealthMonitor's last background probe
+    
+    Never queries Airtable itself, so load balancer probes cost no upstream calls.
+    """
+    response = {
+        "status": "healthy" if monitor.is_healthy("content") else "unhealthy",
+        "service": settings.content_provider,
+        "initialized": service.is_initialized
+    }
+    last_probe = monitor.details().get("content")
+    if last_probe:
+        response["checked_at"] = last_probe["checked_at"]
+        if last_probe["error"]:
+            response["error"] = last_probe["error"]
+    return response
\ No newline at end of file
@@ -0,0 +1,62 @@
+"""
+Append-only file writes off the event loop
+
+Span exports and LLM cassette recordings happen on the request path; a
+synchronous open/write there stalls every request on the loop while the
+disk catches up. BackgroundAppender queues items instead, and one daemon
+thread per file renders and appends them in batches.
+"""
+
+import logging
+import queue
+import threading
+from typing import Any, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundAppender:
+    """Appends rendered items to a file from a background thread"""
+    
+    def __init__(self, path: str, render: Callable[[Any], str] = str):
+        self.path = path
+        self.render = render
+        self.pending: "queue.Queue[Any]" = queue.Queue()
+        self.writer: Optional[threading.Thread] = None
+        self.lock = threading.Lock()
+    
+    def append(self, item: Any):
+        """Queue an item; returns immediately"""
+        self.pending.put(item)
+        if self.writer is None:
+            with self.lock:
+                if self.writer is None:
+                    self.writer = threading.Thread(target=self._write_batches, name="appender", daemon=True)
+                    self.writer.start()
+    
+    def flush(self):
+        """Block until every queued item has been written"""
+        self.pending.join()
+    
+    def _write_batches(self):
+        while True:
+            items: List[Any] = [self.pending.get()]
+            while True:
+                try:
+                    items.append(self.pending.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write("".join(self.render(item) for item in items))
+            except Exception as e:
+                logger.warning(f"Failed to render {len(items)} items for {self.path}: {str(e)}")
+            finally:
+                for _ in items:
+                    self.pending.task_done()
+    
+    def _write(self, text: str):
+        try:
+            with open(self.path, 'a', encoding='utf-8') as file:
+                file.write(text)
+        except OSError as e:
+            logger.warning(f"Failed to append to {self.path}: {str(e)}")
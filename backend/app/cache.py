@@ -0,0 +1,126 @@
+"""
+Async TTL + LRU cache for upstream content lookups
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncTTLCache:
+    """Bounded async cache with expiry, single-flight loads and stale-while-revalidate
+    
+    - Entries expire `ttl_seconds` after they are stored
+    - At most `max_entries` are kept; the least recently used entry is evicted first
+    - Concurrent misses for the same key share one in-flight load
+    - For `stale_ttl_seconds` after expiry, the stale value is served immediately
+      while a single background load refreshes it
+    """
+    
+    def __init__(self, ttl_seconds: float, max_entries: int = 1000, stale_ttl_seconds: float = 0):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.stale_ttl_seconds = stale_ttl_seconds
+        
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+    
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Get cached value for key, calling `loader` on a miss"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            now = time.monotonic()
+            
+            if now < expires_at:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            
+            if now < expires_at + self.stale_ttl_seconds:
+                self._entries.move_to_end(key)
+                self.stale_hits += 1
+                if key not in self._inflight:
+                    self._start_load(key, loader)
+                return value
+        
+        self.misses += 1
+        task = self._inflight.get(key)
+        if task is None:
+            task = self._start_load(key, loader)
+        else:
+            self.coalesced += 1
+        
+        # Shield so one cancelled request doesn't abort the load other callers are waiting on
+        return await asyncio.shield(task)
+    
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get a fresh cached value without loading"""
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() >= entry[1]:
+            return default
+        self._entries.move_to_end(key)
+        return entry[0]
+    
+    def set(self, key: Hashable, value: Any):
+        """Store a value, evicting least recently used entries beyond capacity"""
+        self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(key)
+        
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+    
+    def invalidate(self, key: Hashable):
+        """Remove a single entry"""
+        self._entries.pop(key, None)
+    
+    def clear(self):
+        """Remove all entries and reset counters"""
+        self._entries.clear()
+        self.hits = self.stale_hits = self.misses = self.coalesced = self.evictions = 0
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and current size"""
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            'size': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'evictions': self.evictions,
+            'hit_ratio': (self.hits + self.stale_hits) / lookups if lookups else 0.0
+        }
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def _start_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        task = asyncio.ensure_future(self._load(key, loader))
+        self._inflight[key] = task
+        task.add_done_callback(lambda t: self._finish_load(key, t))
+        return task
+    
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        value = await loader()
+        self.set(key, value)
+        return value
+    
+    def _finish_load(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Retrieve the exception so background refresh failures are logged, not lost
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Cache load failed for {key!r}: {task.exception()}")
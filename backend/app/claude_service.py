@@ -1,11 +1,30 @@
 import anthropic
-from typing import List, Dict, Any, Optional
+import asyncio
+import time
+from typing import List, Dict, Any, Optional, AsyncIterator
 import logging
 from app.config import settings
+from app.http_client import get_http_client
 from app.models import ChatMessage, ConversationMode
+from app.prompt_compiler import PromptStyle, SystemPromptCompiler
+from app.prompt_cache import PromptSegment, PromptCacheMetrics, claude_system_blocks
+from app.tracing import span
+from app.metrics import LLM_TOKENS
+from app.llm_cassette import StreamRecorder, get_cassette
 
 logger = logging.getLogger(__name__)
 
+CLAUDE_PROMPT_STYLE = PromptStyle(
+    mode_instructions={
+        ConversationMode.LEARNING: "Mode: LEARNING - Use Socratic questioning to guide discovery. Ask thought-provoking questions rather than giving direct answers.",
+        ConversationMode.DISCOVERY: "Mode: DISCOVERY - Encourage exploration and curiosity. Help the student discover concepts through guided inquiry.",
+        ConversationMode.STORY: "Mode: STORY - Use storytelling and narrative to explain concepts. Make learning engaging through stories."
+    },
+    closing="Remember: You're talking to a Grade 4 student. Use simple language, be encouraging, and make learning fun!",
+    activity_invite="like 'Here's something fun we could try...' or 'Want to see this in action? We could...'",
+    include_grade_level=False
+)
+
 
 class ClaudeService:
     """Service for interacting with Claude API"""
@@ -14,11 +33,19 @@ class ClaudeService:
         self.client = None
         self.model = "claude-3-5-sonnet-20241022"  # Updated to latest model
         self.is_initialized = False
+        # Caps in-flight Claude calls per worker; excess requests wait here instead of at the API
+        self.semaphore = asyncio.Semaphore(settings.claude_max_concurrency)
+        self.prompt_cache = PromptCacheMetrics()
+        self.prompt_compiler = SystemPromptCompiler(CLAUDE_PROMPT_STYLE)
     
     async def initialize(self):
         """Initialize Claude client"""
         try:
-            self.client = anthropic.Anthropic(api_key=settings.claude_api_key)
+            self.client = anthropic.AsyncAnthropic(
+                api_key=settings.claude_api_key,
+                base_url=settings.claude_base_url,
+                http_client=get_http_client()
+            )
             self.is_initialized = True
             logger.info("Claude service initialized successfully")
         except Exception as e:
@@ -31,10 +58,14 @@ class ClaudeService:
         if not self.is_initialized or not self.client:
             return False
         
+        cassette = get_cassette()
+        if cassette and cassette.replaying:
+            return True
+        
         try:
-            response = self.client.messages.create(
+            response = await self.client.messages.create(
                 model=self.model,
-                max_tokens=10,
+                max_tokens=1,
                 messages=[{"role": "user", "content": "ping"}]
             )
             return True
@@ -48,29 +79,49 @@ class ClaudeService:
         system_prompt: str,
         mode: ConversationMode,
         curriculum_content: Optional[Dict[str, Any]] = None,
+        session_context: Optional[str] = None,
         temperature: float = 0.7,
         max_tokens: int = 1000
     ) -> str:
         """Generate response using Claude"""
         try:
-            formatted_messages = self._format_messages(messages)
+            with span("claude.format"):
+                formatted_messages = self._format_messages(messages)
+                
+                system_blocks = claude_system_blocks(self._system_segments(
+                    system_prompt,
+                    mode,
+                    curriculum_content,
+                    session_context
+                ))
             
-            enhanced_system_prompt = self._enhance_system_prompt(
-                system_prompt, 
-                mode, 
-                curriculum_content
-            )
-            
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=max_tokens,
-                temperature=temperature,
-                system=enhanced_system_prompt,
-                messages=formatted_messages
-            )
-            
-            return response.content[0].text
+            cassette = get_cassette()
+            # Time waiting for the semaphore is the gap between provider.call and claude.api
+            async with self.semaphore:
+                with span("claude.api", model=self.model) as api_span:
+                    if cassette and cassette.replaying:
+                        return await cassette.replay(formatted_messages)
+                    
+                    started = time.perf_counter()
+                    response = await self.client.messages.create(
+                        model=self.model,
+                        max_tokens=max_tokens,
+                        temperature=temperature,
+                        system=system_blocks,
+                        messages=formatted_messages
+                    )
+                    api_span.set_attribute("input_tokens", response.usage.input_tokens)
+                    api_span.set_attribute("output_tokens", response.usage.output_tokens)
             
+            self._record_usage(response.usage)
+            text = response.content[0].text
+            if cassette and cassette.recording:
+                cassette.record(
+                    "claude", formatted_messages, text, time.perf_counter() - started,
+                    usage=(response.usage.input_tokens, response.usage.output_tokens)
+                )
+            return text
+        
         except anthropic.APIError as e:
             logger.error(f"Claude API error: {str(e)}")
             raise
@@ -78,6 +129,111 @@ class ClaudeService:
             logger.error(f"Unexpected error in Claude service: {str(e)}")
             raise
     
+    async def stream_response(
+        self,
+        messages: List[ChatMessage],
+        system_prompt: str,
+        mode: ConversationMode,
+        curriculum_content: Optional[Dict[str, Any]] = None,
+        session_context: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 1000
+    ) -> AsyncIterator[str]:
+        """Stream response text from Claude as it is generated"""
+        try:
+            formatted_messages = self._format_messages(messages)
+            
+            system_blocks = claude_system_blocks(self._system_segments(
+                system_prompt,
+                mode,
+                curriculum_content,
+                session_context
+            ))
+            
+            cassette = get_cassette()
+            async with self.semaphore:
+                if cassette and cassette.replaying:
+                    async for text in cassette.replay_stream(formatted_messages):
+                        yield text
+                    return
+                
+                recorder = StreamRecorder()
+                stream = await self.client.messages.create(
+                    model=self.model,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    system=system_blocks,
+                    messages=formatted_messages,
+                    stream=True
+                )
+                async for event in stream:
+                    if event.type == "message_start":
+                        self._record_usage(event.message.usage, output=False)
+                    elif event.type == "message_delta":
+                        # Final cumulative output token count
+                        LLM_TOKENS.inc(event.usage.output_tokens, provider="claude", direction="output")
+                    elif event.type == "content_block_delta" and event.delta.type == "text_delta":
+                        recorder.add(event.delta.text)
+                        yield event.delta.text
+            
+            if cassette and cassette.recording:
+                cassette.record("claude", formatted_messages, recorder.text, recorder.seconds, chunks=recorder.chunks)
+        
+        except anthropic.APIError as e:
+            logger.error(f"Claude API streaming error: {str(e)}")
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error in Claude stream: {str(e)}")
+            raise
+    
+    async def complete(
+        self,
+        prompt: str,
+        system_prompt: str,
+        temperature: float = 0.3,
+        max_tokens: int = 300
+    ) -> str:
+        """Single-turn completion with a plain system prompt (no tutoring additions)"""
+        messages = [{"role": "user", "content": prompt}]
+        cassette = get_cassette()
+        try:
+            async with self.semaphore:
+                if cassette and cassette.replaying:
+                    return await cassette.replay(messages)
+                
+                started = time.perf_counter()
+                response = await self.client.messages.create(
+                    model=self.model,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    system=system_prompt,
+                    messages=messages
+                )
+            
+            self._record_usage(response.usage)
+            text = response.content[0].text
+            if cassette and cassette.recording:
+                cassette.record(
+                    "claude", messages, text, time.perf_counter() - started,
+                    usage=(response.usage.input_tokens, response.usage.output_tokens), operation="complete"
+                )
+            return text
+        
+        except anthropic.APIError as e:
+            logger.error(f"Claude API error: {str(e)}")
+            raise
+    
+    def _record_usage(self, usage: Any, output: bool = True):
+        """Feed reported usage into prompt cache accounting and token metrics"""
+        self.prompt_cache.record_claude(usage)
+        input_tokens = sum(
+            getattr(usage, field, None) or 0
+            for field in ('input_tokens', 'cache_read_input_tokens', 'cache_creation_input_tokens')
+        )
+        LLM_TOKENS.inc(input_tokens, provider="claude", direction="input")
+        if output:
+            LLM_TOKENS.inc(usage.output_tokens or 0, provider="claude", direction="output")
+    
     def _format_messages(self, messages: List[ChatMessage]) -> List[Dict[str, str]]:
         """Format messages for Claude API"""
         formatted = []
@@ -89,57 +245,19 @@ class ClaudeService:
                 })
         return formatted
     
-    def _enhance_system_prompt(
+    def _system_segments(
         self, 
         base_prompt: str, 
         mode: ConversationMode,
-        curriculum_content: Optional[Dict[str, Any]] = None
-    ) -> str:
-        """Enhance system prompt based on mode and curriculum content"""
-        enhanced = base_prompt
-        
-        if mode == ConversationMode.LEARNING:
-            enhanced += "\n\nMode: LEARNING - Use Socratic questioning to guide discovery. Ask thought-provoking questions rather than giving direct answers."
-        elif mode == ConversationMode.DISCOVERY:
-            enhanced += "\n\nMode: DISCOVERY - Encourage exploration and curiosity. Help the student discover concepts through guided inquiry."
-        elif mode == ConversationMode.STORY:
-            enhanced += "\n\nMode: STORY - Use storytelling and narrative to explain concepts. Make learning engaging through stories."
-        
-        if curriculum_content:
-            enhanced += f"\n\n=== CURRICULUM CONTENT TO INTEGRATE ===\nTopic: {curriculum_content.get('topic', 'General')}"
-            
-            # Add learning objectives
-            if curriculum_content.get('learning_objectives'):
-                enhanced += f"\n\nLearning Objectives to cover:"
-                for obj in curriculum_content['learning_objectives'][:3]:
-                    enhanced += f"\n• {obj}"
-            
-            # Add Canadian examples to weave in naturally
-            if curriculum_content.get('canadian_examples'):
-                enhanced += f"\n\nCanadian Examples - MUST naturally incorporate at least one:"
-                for i, example in enumerate(curriculum_content['canadian_examples'][:2], 1):
-                    enhanced += f"\n{i}. {example}"
-                enhanced += "\nWeave these examples into your explanation naturally, don't just list them."
-            
-            # Add activities to suggest
-            if curriculum_content.get('activities'):
-                activity = curriculum_content['activities'][0]
-                enhanced += f"\n\nActivity to naturally suggest (work this into the conversation):"
-                enhanced += f"\nActivity: {activity.get('name', 'Hands-on activity')}"
-                enhanced += f"\nDescription: {activity.get('description', '')}"
-                if activity.get('materials'):
-                    materials_str = ', '.join(activity['materials'][:5])
-                    enhanced += f"\nMaterials: {materials_str}"
-                enhanced += "\n\nDon't just append this activity - introduce it naturally as part of your response, like 'Here's something fun we could try...' or 'Want to see this in action? We could...'"
-            
-            enhanced += "\n\nIMPORTANT: Integrate all content naturally into your response. Don't use obvious markers or sections. Make it flow as one cohesive, engaging explanation."
-        
-        enhanced += "\n\nRemember: You're talking to a Grade 4 student. Use simple language, be encouraging, and make learning fun!"
-        
-        return enhanced
+        curriculum_content: Optional[Dict[str, Any]] = None,
+        session_context: Optional[str] = None
+    ) -> List[PromptSegment]:
+        """System prompt segments, pre-rendered per mode and topic"""
+        return self.prompt_compiler.segments(base_prompt, mode, curriculum_content, session_context)
     
     async def cleanup(self):
         """Cleanup Claude service resources"""
+        # The underlying HTTP pool is shared and closed by the orchestrator
         self.client = None
         self.is_initialized = False
         logger.info("Claude service cleaned up")
\ No newline at end of file
@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from pydantic import Field, validator
+from pathlib import Path
 from typing import List, Optional, Union
 import json
 
@@ -18,9 +19,82 @@ class Settings(BaseSettings):
     app_version: str = "0.1.0"
     
     session_ttl_minutes: int = 60
+    # Session storage: "memory" (single worker) or "redis" (shared across workers/replicas)
+    session_store: str = "memory"
+    redis_url: str = "redis://localhost:6379/0"
+    redis_key_prefix: str = "maple:"
     max_conversation_length: int = 50
+    # Estimated input tokens per LLM call (system prompt + history); older turns beyond it aren't sent
+    prompt_token_budget: int = 6000
+    # Turns that fall outside the budget are folded into a running summary once this many pile up
+    summary_min_messages: int = 6
+    summary_max_tokens: int = 300
+    
+    # Curriculum content source: "airtable", "snapshot" (Airtable synced to local disk)
+    # or "local" (the JSON files in content_dir)
+    content_provider: str = "airtable"
+    content_dir: str = str(Path(__file__).resolve().parents[2] / "content")
+    content_snapshot_dir: str = str(Path(__file__).resolve().parents[1] / "content_snapshots")
+    content_sync_interval_seconds: int = 900
+    content_snapshot_keep: int = 3
     
     cache_ttl_seconds: int = 300
+    cache_max_items: int = 1000
+    # How long past expiry a cached entry may be served while it refreshes in the background
+    cache_stale_ttl_seconds: int = 900
+    
+    # LLM provider transport (base URLs override the public endpoints, e.g. for local fakes)
+    claude_base_url: Optional[str] = None
+    openai_base_url: Optional[str] = None
+    claude_max_concurrency: int = 20
+    openai_max_concurrency: int = 20
+    llm_max_connections: int = 100
+    llm_max_keepalive_connections: int = 20
+    llm_timeout_seconds: float = 60.0
+    # Limits for one provider attempt: the whole call, or the first token of a stream
+    claude_timeout_seconds: float = 45.0
+    openai_timeout_seconds: float = 45.0
+    
+    # Hedged requests: if the primary provider is slower than its recent p95, race the other one
+    hedge_enabled: bool = False
+    hedge_percentile: float = 0.95
+    # Used until enough calls have been seen to estimate the percentile
+    hedge_delay_seconds: float = 3.0
+    
+    # Circuit breaker: shed traffic from a provider whose EWMA error rate or p95 latency is too high
+    breaker_error_threshold: float = 0.5
+    breaker_latency_threshold_seconds: float = 20.0
+    breaker_cooldown_seconds: float = 30.0
+    
+    # Background deep health probes; /api/health only reads their cached results (0 disables probing)
+    health_probe_interval_seconds: float = 60.0
+    health_probe_timeout_seconds: float = 10.0
+    
+    # Opt-in cache of replies to early turns; a similarity threshold of 0 matches exact (normalized) messages only
+    response_cache_enabled: bool = False
+    response_cache_max_entries: int = 1000
+    response_cache_ttl_seconds: float = 3600.0
+    response_cache_max_history: int = 0
+    response_cache_similarity_threshold: float = 0.0
+    
+    # /api/chat/batch: items per request, and turns of one batch generating at once (provider caps still apply)
+    chat_batch_max_items: int = 100
+    chat_batch_concurrency: int = 10
+    
+    # Request tracing: "console" (DEBUG log line per request), "file" (OTLP/JSON lines) or "none"
+    tracing_exporter: str = "console"
+    tracing_file: str = "traces.jsonl"
+    # Add per-stage milliseconds to ChatResponse.metadata["timings_ms"] (debugging)
+    tracing_timings_in_response: bool = False
+    
+    # LLM cassette: "record" appends every provider call to the file, "replay" serves calls from it
+    # (latencies multiplied by the scale; 0 replays instantly), "off" calls the APIs
+    llm_cassette_mode: str = "off"
+    llm_cassette_path: str = "cassettes/llm.jsonl"
+    llm_cassette_latency_scale: float = 1.0
+    
+    # How often to check prompts.yaml for edits (0 disables hot reload)
+    prompts_watch_interval_seconds: float = 2.0
     
     @validator('allowed_origins', pre=True)
     def parse_allowed_origins(cls, v):
@@ -0,0 +1,101 @@
+"""
+Pluggable curriculum content providers
+"""
+
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import Dict, Any, List, Optional
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ContentProvider(ABC):
+    """Interface for curriculum content sources used by chat and content endpoints"""
+    
+    is_initialized: bool = False
+    
+    @abstractmethod
+    async def initialize(self):
+        """Connect to or load the content source"""
+    
+    @abstractmethod
+    async def check_health(self) -> bool:
+        """Check if the content source is usable"""
+    
+    @abstractmethod
+    async def get_content_for_topic(self, topic: str) -> Optional[Dict[str, Any]]:
+        """Get curriculum content for a specific topic"""
+    
+    @abstractmethod
+    async def get_canadian_examples(self, topic: str) -> List[str]:
+        """Get Canadian examples for a topic"""
+    
+    @abstractmethod
+    async def get_activities(self, topic: str) -> List[Dict[str, Any]]:
+        """Get hands-on activities for a topic"""
+    
+    async def get_topic_bundle(self, topic: str) -> Dict[str, Any]:
+        """Get curriculum content, Canadian examples and activities for a topic
+        
+        The three lookups run concurrently, so the bundle costs roughly the
+        slowest single lookup rather than the sum of all three. A failed
+        lookup leaves its part empty without dropping the others.
+        """
+        results = await asyncio.gather(
+            self.get_content_for_topic(topic),
+            self.get_canadian_examples(topic),
+            self.get_activities(topic),
+            return_exceptions=True
+        )
+        parts = []
+        for name, result, empty in zip(("content", "Canadian examples", "activities"), results, (None, [], [])):
+            if isinstance(result, Exception):
+                logger.error(f"Failed to fetch {name} for topic {topic}: {str(result)}")
+                result = empty
+            parts.append(result)
+        curriculum_content, canadian_examples, activities = parts
+        
+        enriched_content = None
+        if curriculum_content:
+            enriched_content = {
+                **curriculum_content,
+                'canadian_examples': canadian_examples,
+                'activities': activities
+            }
+        
+        return {
+            'topic': topic,
+            'curriculum_content': curriculum_content,
+            'canadian_examples': canadian_examples,
+            'activities': activities,
+            'enriched_content': enriched_content
+        }
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get content cache counters (empty for providers without a cache)"""
+        return {}
+    
+    async def cleanup(self):
+        """Release provider resources"""
+        self.is_initialized = False
+
+
+def create_content_provider() -> ContentProvider:
+    """Create the content provider selected by `settings.content_provider`"""
+    provider = settings.content_provider.lower()
+    
+    if provider == "local":
+        from app.local_content_service import LocalContentService
+        return LocalContentService(settings.content_dir)
+    
+    if provider == "snapshot":
+        from app.content_snapshot_service import ContentSnapshotService
+        return ContentSnapshotService(settings.content_snapshot_dir)
+    
+    if provider != "airtable":
+        logger.warning(f"Unknown content provider '{settings.content_provider}', using Airtable")
+    
+    from app.airtable_service import AirtableService
+    return AirtableService()
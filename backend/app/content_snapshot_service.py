@@ -0,0 +1,213 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+from app.airtable_service import AirtableService
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_TABLES = ['Grade4_Science_Curriculum', 'Canadian_Examples', 'Activity_Templates']
+
+
+class ContentSnapshotService(AirtableService):
+    """Serves Airtable content from a local snapshot kept fresh by a background sync
+    
+    A background task periodically pulls every curriculum table in bulk,
+    writes a versioned snapshot to disk and atomically swaps it in. Request
+    reads only touch the in-memory snapshot, so Airtable latency, rate limits
+    and outages never reach the chat path. On restart the last snapshot on
+    disk is served immediately.
+    """
+    
+    def __init__(self, snapshot_dir: Optional[str] = None):
+        super().__init__()
+        self.snapshot_dir = Path(snapshot_dir or settings.content_snapshot_dir)
+        self.snapshot: Optional[Dict[str, Any]] = None
+        self.last_sync: Optional[datetime] = None
+        self.last_sync_error: Optional[str] = None
+        self.sync_task: Optional[asyncio.Task] = None
+    
+    async def check_health(self) -> bool:
+        """Healthy while a snapshot is loaded, even if Airtable is unreachable"""
+        return self.snapshot is not None
+    
+    async def get_content_for_topic(self, topic: str) -> Optional[Dict[str, Any]]:
+        """Get curriculum content for a specific topic"""
+        if self.snapshot is None:
+            return self._get_fallback_content(topic)
+        
+        topics = self.snapshot['topics']
+        key = topic.lower()
+        if key in topics:
+            return topics[key]
+        # Same fallback as the live SEARCH() query: first topic containing the name
+        return next((content for name, content in topics.items() if key in name), None)
+    
+    async def get_canadian_examples(self, topic: str) -> List[str]:
+        """Get Canadian examples for a topic"""
+        if self.snapshot is None:
+            return self._get_fallback_canadian_examples(topic)
+        return self.snapshot['canadian_examples'].get(topic.lower(), [])
+    
+    async def get_activities(self, topic: str) -> List[Dict[str, Any]]:
+        """Get hands-on activities for a topic"""
+        if self.snapshot is None:
+            return self._get_fallback_activities(topic)
+        return self.snapshot['activities'].get(topic.lower(), [])
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get snapshot version and freshness"""
+        if self.snapshot is None:
+            return {'version': None, 'last_sync_error': self.last_sync_error}
+        
+        return {
+            'version': self.snapshot['version'],
+            'created_at': self.snapshot['created_at'],
+            'last_sync': self.last_sync.isoformat() if self.last_sync else None,
+            'last_sync_error': self.last_sync_error,
+            'topics': len(self.snapshot['topics'])
+        }
+    
+    async def sync(self) -> bool:
+        """Pull all curriculum tables and swap in a new snapshot if content changed"""
+        try:
+            records = await asyncio.gather(*(
+                self._fetch_records(table) for table in SNAPSHOT_TABLES
+            ))
+            tables = {
+                table: [{'id': r.get('id'), 'fields': r.get('fields', {})} for r in table_records]
+                for table, table_records in zip(SNAPSHOT_TABLES, records)
+            }
+            
+            payload = json.dumps(tables, separators=(',', ':'), sort_keys=True)
+            digest = hashlib.sha1(payload.encode('utf-8')).hexdigest()[:12]
+            
+            if self.snapshot is None or self.snapshot['digest'] != digest:
+                created_at = datetime.utcnow()
+                version = f"{created_at:%Y%m%dT%H%M%SZ}-{digest}"
+                document = {
+                    'version': version,
+                    'digest': digest,
+                    'created_at': created_at.isoformat(),
+                    'tables': tables
+                }
+                await asyncio.to_thread(self._write_snapshot, document)
+                self.snapshot = self._build_snapshot(document)
+                logger.info(f"Swapped in content snapshot {version}")
+            
+            self.last_sync = datetime.utcnow()
+            self.last_sync_error = None
+            return True
+        
+        except Exception as e:
+            self.last_sync_error = str(e)
+            logger.error(f"Content snapshot sync failed: {str(e)}")
+            return False
+    
+    async def _load_initial_content(self):
+        """Serve the newest snapshot on disk, then keep it fresh in the background"""
+        document = await asyncio.to_thread(self._read_current_snapshot)
+        if document:
+            self.snapshot = self._build_snapshot(document)
+            logger.info(f"Loaded content snapshot {document['version']} from disk")
+        else:
+            await self.sync()
+        
+        if self.sync_task is None or self.sync_task.done():
+            # A snapshot from disk may be old, so refresh it right away (off the startup path)
+            self.sync_task = asyncio.create_task(self._sync_loop(refresh_now=document is not None))
+    
+    async def _sync_loop(self, refresh_now: bool = False):
+        if refresh_now:
+            await self.sync()
+        while True:
+            interval = settings.content_sync_interval_seconds
+            if self.snapshot is None:
+                # Nothing to serve yet: retry sooner than the regular refresh
+                interval = min(interval, 60)
+            await asyncio.sleep(interval)
+            await self.sync()
+    
+    def _build_snapshot(self, document: Dict[str, Any]) -> Dict[str, Any]:
+        """Index raw table records by lowercase topic name"""
+        tables = document['tables']
+        
+        topics: Dict[str, Dict[str, Any]] = {}
+        for record in tables.get('Grade4_Science_Curriculum', []):
+            for key in self._topic_keys(record):
+                if key not in topics:
+                    topics[key] = self._format_curriculum_content(record)
+        
+        canadian_examples: Dict[str, List[str]] = {}
+        for record in tables.get('Canadian_Examples', []):
+            if 'Example Title' in record['fields']:
+                for key in self._topic_keys(record):
+                    canadian_examples.setdefault(key, []).append(self._format_canadian_example(record))
+        
+        activities: Dict[str, List[Dict[str, Any]]] = {}
+        for record in tables.get('Activity_Templates', []):
+            for key in self._topic_keys(record):
+                activities.setdefault(key, []).append(self._format_activity(record))
+        
+        return {
+            'version': document['version'],
+            'digest': document['digest'],
+            'created_at': document['created_at'],
+            'topics': topics,
+            'canadian_examples': canadian_examples,
+            'activities': activities
+        }
+    
+    @staticmethod
+    def _topic_keys(record: Dict[str, Any]) -> List[str]:
+        """Lowercase topic names of a record (lookup fields come back as lists)"""
+        names = record['fields'].get('Topic Name', '')
+        if isinstance(names, str):
+            names = [names]
+        return [name.lower() for name in names if isinstance(name, str) and name]
+    
+    def _write_snapshot(self, document: Dict[str, Any]):
+        """Write a versioned snapshot file, then atomically repoint CURRENT at it"""
+        self.snapshot_dir.mkdir(parents=True, exist_ok=True)
+        
+        snapshot_file = self.snapshot_dir / f"snapshot-{document['version']}.json"
+        self._atomic_write(snapshot_file, json.dumps(document, separators=(',', ':')))
+        self._atomic_write(self.snapshot_dir / 'CURRENT', snapshot_file.name)
+        
+        old_snapshots = sorted(self.snapshot_dir.glob('snapshot-*.json'))[:-settings.content_snapshot_keep]
+        for old_snapshot in old_snapshots:
+            old_snapshot.unlink(missing_ok=True)
+    
+    def _read_current_snapshot(self) -> Optional[Dict[str, Any]]:
+        current = self.snapshot_dir / 'CURRENT'
+        try:
+            snapshot_file = self.snapshot_dir / current.read_text(encoding='utf-8').strip()
+            with open(snapshot_file, 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable content snapshot: {str(e)}")
+            return None
+    
+    @staticmethod
+    def _atomic_write(path: Path, data: str):
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, path)
+    
+    async def cleanup(self):
+        """Stop the background sync and release resources"""
+        if self.sync_task:
+            self.sync_task.cancel()
+            self.sync_task = None
+        self.snapshot = None
+        await super().cleanup()
@@ -0,0 +1,103 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+from app.config import settings
+from app.models import SessionData, ChatMessage
+
+logger = logging.getLogger(__name__)
+
+# SessionData.metadata keys
+SUMMARY_KEY = 'conversation_summary'
+SUMMARY_THROUGH_KEY = 'summary_through'
+
+
+class ConversationSummarizer:
+    """Folds turns that no longer fit the prompt window into a running summary
+    
+    Turns leave the window when the token budget cuts them off, or when the
+    session's message cap evicts them; the latter are summarized just before
+    they are evicted.
+    
+    Runs as a background task after the reply has been sent, so it never adds
+    latency to a turn. The summary and the timestamp of the newest message it
+    covers are kept in `SessionData.metadata`; the orchestrator adds the
+    summary to the system prompt.
+    """
+    
+    def __init__(self, orchestrator, session_manager):
+        self.orchestrator = orchestrator
+        self.session_manager = session_manager
+        self.tasks: Dict[str, asyncio.Task] = {}
+    
+    def schedule(self, session: SessionData, history_cutoff: Optional[datetime]) -> Optional[asyncio.Task]:
+        """Summarize messages older than `history_cutoff` not yet in the summary
+        
+        `history_cutoff` is the timestamp of the oldest message the provider
+        was sent, or None if the whole history fit. Messages the message cap
+        is about to evict count as outside the window too. Waits until enough
+        turns have accumulated, and runs at most one summary per session at a
+        time; anything left over is picked up after a later turn.
+        """
+        history_cutoff = self._latest_cutoff(history_cutoff, self._eviction_cutoff(session))
+        if history_cutoff is None or session.session_id in self.tasks:
+            return None
+        
+        pending = self._pending_messages(session, history_cutoff)
+        if len(pending) < settings.summary_min_messages:
+            return None
+        
+        task = asyncio.create_task(
+            self._summarize(session.session_id, session.metadata.get(SUMMARY_KEY), pending)
+        )
+        self.tasks[session.session_id] = task
+        task.add_done_callback(lambda _: self.tasks.pop(session.session_id, None))
+        return task
+    
+    def _eviction_cutoff(self, session: SessionData) -> Optional[datetime]:
+        """Timestamp of the oldest message safe from the message cap for now, or None if none is at risk
+        
+        Each full turn evicts the two oldest messages, and summaries wait for
+        `summary_min_messages`, so messages are due that many (plus one turn
+        of slack) before the cap.
+        """
+        keep = self.session_manager.max_messages - settings.summary_min_messages - 2
+        if len(session.messages) <= max(keep, 0):
+            return None
+        return session.messages[len(session.messages) - max(keep, 1)].timestamp
+    
+    @staticmethod
+    def _latest_cutoff(*cutoffs: Optional[datetime]) -> Optional[datetime]:
+        cutoffs = [cutoff for cutoff in cutoffs if cutoff is not None]
+        return max(cutoffs) if cutoffs else None
+    
+    def _pending_messages(self, session: SessionData, history_cutoff: datetime) -> List[ChatMessage]:
+        summary_through = session.metadata.get(SUMMARY_THROUGH_KEY)
+        summary_through = datetime.fromisoformat(summary_through) if summary_through else None
+        
+        return [
+            m for m in session.messages
+            if m.role != "system"
+            and m.timestamp < history_cutoff
+            and (summary_through is None or m.timestamp > summary_through)
+        ]
+    
+    async def _summarize(self, session_id: str, previous_summary: Optional[str], messages: List[ChatMessage]):
+        try:
+            summary = await self.orchestrator.summarize_conversation(messages, previous_summary)
+            await self.session_manager.update_session_metadata(session_id, {
+                SUMMARY_KEY: summary.strip(),
+                SUMMARY_THROUGH_KEY: messages[-1].timestamp.isoformat()
+            })
+            logger.debug(f"Summarized {len(messages)} messages for session {session_id}")
+        except Exception as e:
+            # The turns are retried after the next reply
+            logger.warning(f"Conversation summary failed for session {session_id}: {str(e)}")
+    
+    async def cleanup(self):
+        """Cancel summaries still in flight"""
+        tasks = list(self.tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.tasks.clear()
@@ -0,0 +1,135 @@
+"""
+Cached service health: background deep probes plus live provider traffic
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+from app.config import settings
+from app.models import AIProvider
+
+logger = logging.getLogger(__name__)
+
+
+class ProbeResult:
+    """Outcome of the latest deep probe of one service"""
+    
+    def __init__(self, healthy: bool, error: Optional[str] = None):
+        self.healthy = healthy
+        self.error = error
+        self.checked_at = datetime.utcnow()
+        # Comparable with CircuitBreaker.last_success_at
+        self.monotonic_at = time.monotonic()
+
+
+class HealthMonitor:
+    """Serves `/api/health` from cached state
+    
+    Deep probes (a tiny completion per provider, a one-record content query)
+    run on a background schedule, never per request. A provider that has
+    answered real traffic since the last probe interval is not probed at all:
+    its circuit breaker already knows how it is doing.
+    """
+    
+    def __init__(self, orchestrator, content_service):
+        self.orchestrator = orchestrator
+        self.content_service = content_service
+        self.probes: Dict[str, Callable[[], Awaitable[bool]]] = {
+            AIProvider.CLAUDE.value: orchestrator.check_claude_health,
+            AIProvider.OPENAI.value: orchestrator.check_openai_health,
+            "content": content_service.check_health
+        }
+        self.results: Dict[str, ProbeResult] = {}
+        self.task: Optional[asyncio.Task] = None
+    
+    def start(self, interval_seconds: float):
+        """Probe every `interval_seconds` in the background
+        
+        Services were just initialized, so the first probe waits a full
+        interval; until then health reflects whether initialization succeeded.
+        """
+        if interval_seconds > 0 and self.task is None:
+            self.task = asyncio.create_task(self._run(interval_seconds))
+    
+    async def _run(self, interval_seconds: float):
+        while True:
+            await asyncio.sleep(interval_seconds)
+            await self.probe_all(skip_recent_traffic_seconds=interval_seconds)
+    
+    async def probe_all(self, skip_recent_traffic_seconds: float = 0.0):
+        """Run due deep probes concurrently and cache their results"""
+        names = [
+            name for name in self.probes
+            if not self._recent_success(name, skip_recent_traffic_seconds)
+        ]
+        await asyncio.gather(*(self._probe(name) for name in names))
+    
+    async def _probe(self, name: str):
+        try:
+            healthy = await asyncio.wait_for(
+                self.probes[name](),
+                timeout=settings.health_probe_timeout_seconds
+            )
+            self.results[name] = ProbeResult(bool(healthy))
+        except Exception as e:
+            logger.warning(f"Health probe for {name} failed: {str(e)}")
+            self.results[name] = ProbeResult(False, error=str(e) or type(e).__name__)
+    
+    def _recent_success(self, name: str, within_seconds: float) -> bool:
+        breaker = self._breaker(name)
+        if breaker is None or breaker.last_success_at is None or within_seconds <= 0:
+            return False
+        return time.monotonic() - breaker.last_success_at < within_seconds
+    
+    def _breaker(self, name: str):
+        try:
+            return self.orchestrator.breakers[AIProvider(name)]
+        except ValueError:
+            return None
+    
+    def is_healthy(self, name: str) -> bool:
+        """Traffic outcomes first, then the last deep probe, then whether the service started"""
+        result = self.results.get(name)
+        breaker = self._breaker(name)
+        if breaker is not None:
+            if breaker.state == breaker.OPEN:
+                return False
+            # A real reply newer than the last probe overrides it
+            if breaker.last_success_at is not None and (
+                result is None or breaker.last_success_at > result.monotonic_at
+            ):
+                return True
+        
+        if result is not None:
+            return result.healthy
+        
+        return self._initialized(name)
+    
+    def _initialized(self, name: str) -> bool:
+        if name == AIProvider.CLAUDE.value:
+            return self.orchestrator.claude_service.is_initialized
+        if name == AIProvider.OPENAI.value:
+            return self.orchestrator.openai_service.is_initialized
+        return self.content_service.is_initialized
+    
+    def services(self) -> Dict[str, bool]:
+        return {name: self.is_healthy(name) for name in self.probes}
+    
+    def details(self) -> Dict[str, Any]:
+        """Last probe per service, for debugging a degraded status"""
+        return {
+            name: {
+                'healthy': result.healthy,
+                'checked_at': result.checked_at.isoformat(),
+                'error': result.error
+            }
+            for name, result in self.results.items()
+        }
+    
+    async def cleanup(self):
+        if self.task:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
@@ -0,0 +1,40 @@
+"""
+Shared, pooled HTTP transport for the LLM provider clients
+"""
+
+import httpx
+import logging
+from typing import Optional
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# One connection pool shared by the Claude and OpenAI async clients
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the shared async HTTP client, creating it on first use"""
+    global _http_client
+    
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.llm_max_connections,
+                max_keepalive_connections=settings.llm_max_keepalive_connections
+            ),
+            timeout=httpx.Timeout(settings.llm_timeout_seconds, connect=10.0)
+        )
+        logger.debug("Created shared LLM HTTP client")
+    
+    return _http_client
+
+
+async def close_http_client():
+    """Close the shared HTTP client and release pooled connections"""
+    global _http_client
+    
+    if _http_client is not None and not _http_client.is_closed:
+        await _http_client.aclose()
+        logger.debug("Closed shared LLM HTTP client")
+    _http_client = None
@@ -0,0 +1,94 @@
+"""
+Multi-pattern keyword matching in one pass over the text (Aho-Corasick)
+"""
+
+from collections import deque
+from typing import Dict, Hashable, Iterable, List, Set, Tuple
+
+
+class KeywordMatcher:
+    """Precompiled automaton over labelled keyword phrases
+    
+    Matching is case-insensitive and word-aware at the start: a keyword must
+    begin a word, but may run on into it, so "light" matches "lights" but not
+    "flight", and "think" matches "thinking".
+    """
+    
+    def __init__(self, keywords: Dict[Hashable, Iterable[str]]):
+        self.patterns: List[Tuple[Hashable, str]] = []
+        # Trie transitions, failure links and the pattern ids ending at each state
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[List[int]] = [[]]
+        
+        for label, words in keywords.items():
+            for word in words:
+                self._add(label, word.lower())
+        self._link()
+    
+    def _add(self, label: Hashable, word: str):
+        state = 0
+        for char in word:
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][char] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+            state = next_state
+        self.output[state].append(len(self.patterns))
+        self.patterns.append((label, word))
+    
+    def _link(self):
+        """Breadth-first failure links, folded into a full transition table
+        
+        Afterwards `goto[state][char]` is the next state for every character
+        that appears in a keyword, and any other character returns to the
+        root, so scanning never has to follow failure links.
+        """
+        alphabet = {char for _, word in self.patterns for char in word}
+        queue = deque(self.goto[0].values())
+        for char in alphabet:
+            self.goto[0].setdefault(char, 0)
+        
+        while queue:
+            state = queue.popleft()
+            fallback = self.fail[state]
+            self.output[state] = self.output[state] + self.output[fallback]
+            for char in alphabet:
+                next_state = self.goto[state].get(char)
+                if next_state is None:
+                    self.goto[state][char] = self.goto[fallback][char]
+                else:
+                    self.fail[next_state] = self.goto[fallback][char]
+                    queue.append(next_state)
+    
+    def find(self, text: str) -> Set[int]:
+        """Ids of the distinct patterns found in `text`"""
+        text = text.lower()
+        goto, output, patterns = self.goto, self.output, self.patterns
+        found: Set[int] = set()
+        state = 0
+        
+        for end, char in enumerate(text):
+            state = goto[state].get(char, 0)
+            if not output[state]:
+                continue
+            
+            for pattern_id in output[state]:
+                if pattern_id in found:
+                    continue
+                before = end - len(patterns[pattern_id][1])
+                if before < 0 or not text[before].isalnum():
+                    found.add(pattern_id)
+        
+        return found
+    
+    def count(self, text: str) -> Dict[Hashable, int]:
+        """Number of distinct keywords found per label"""
+        counts: Dict[Hashable, int] = {}
+        for pattern_id in self.find(text):
+            label = self.patterns[pattern_id][0]
+            counts[label] = counts.get(label, 0) + 1
+        return counts
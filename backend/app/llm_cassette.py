@@ -0,0 +1,218 @@
+"""
+Record and replay of LLM calls for offline performance testing
+
+In record mode, every provider call made by ClaudeService and OpenAIService
+appends one JSON line to the cassette: a hash of the conversation turns
+sent, the reply text, how long the API took and, for streams, when each
+chunk arrived. In replay mode the services serve those replies instead of
+calling the API, sleeping for the recorded (optionally scaled) latencies.
+
+Lookups ignore the system prompt and the provider, so a cassette recorded
+on one build still replays after prompt edits or routing changes. A turn
+whose history no longer matches falls back to the recording for the same
+student message in the same session.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from app.background_writer import BackgroundAppender
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Session whose turn is being generated, tagged onto recordings so traffic can be re-driven per student
+cassette_session: ContextVar[Optional[str]] = ContextVar("cassette_session", default=None)
+
+
+class CassetteMiss(Exception):
+    """No recording matches a replayed request"""
+
+
+def request_key(messages: List[Dict[str, Any]]) -> str:
+    """Hash of the non-system turns of a provider request"""
+    turns = [(m["role"], m["content"]) for m in messages if m["role"] != "system"]
+    return hashlib.sha256(json.dumps(turns, ensure_ascii=False).encode()).hexdigest()[:32]
+
+
+def last_user_message(messages: List[Dict[str, Any]]) -> str:
+    return next((m["content"] for m in reversed(messages) if m["role"] == "user"), "")
+
+
+class Cassette:
+    """A JSON-lines file of recorded LLM calls
+    
+    Each line is {"k": request key, "p": provider, "o": "chat" or "complete",
+    "sid": session id, "q": latest user message, "r": reply text, "s": API
+    seconds, "c": [[seconds, text], ...] stream chunks, "u": [input tokens,
+    output tokens]}; empty fields are left out.
+    """
+    
+    def __init__(self, path: str, mode: str, latency_scale: float = 1.0):
+        self.path = path
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self.entries: List[Dict[str, Any]] = []
+        self.by_key: Dict[str, List[Dict[str, Any]]] = {}
+        self.by_message: Dict[Tuple[Optional[str], str], List[Dict[str, Any]]] = {}
+        # Next recording to serve per key; repeated identical requests get successive replies
+        self.cursors: Dict[Any, int] = {}
+        self.recorded = 0
+        # Recording happens on the request path, so lines are appended from a background thread
+        self.appender = BackgroundAppender(path)
+        self.hits = 0
+        self.fallbacks = 0
+        self.misses = 0
+        if self.replaying:
+            self.load()
+    
+    @property
+    def recording(self) -> bool:
+        return self.mode == "record"
+    
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+    
+    def load(self):
+        """Read the cassette file, indexing recordings by request key and by (session, message)"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                self.entries = [json.loads(line) for line in file if line.strip()]
+        except FileNotFoundError:
+            logger.warning(f"LLM cassette {self.path} not found; every call will miss")
+            self.entries = []
+        
+        self.by_key.clear()
+        self.by_message.clear()
+        self.cursors.clear()
+        for entry in self.entries:
+            self.by_key.setdefault(entry["k"], []).append(entry)
+            self.by_message.setdefault((entry.get("sid"), entry.get("q", "")), []).append(entry)
+        logger.info(f"Loaded {len(self.entries)} LLM recordings from {self.path}")
+    
+    def record(
+        self,
+        provider: str,
+        messages: List[Dict[str, Any]],
+        reply: str,
+        seconds: float,
+        chunks: Optional[List[Tuple[float, str]]] = None,
+        usage: Optional[Tuple[int, int]] = None,
+        operation: str = "chat"
+    ):
+        """Queue one call to be appended to the cassette file"""
+        entry: Dict[str, Any] = {
+            "k": request_key(messages),
+            "p": provider,
+            "o": operation,
+            "sid": cassette_session.get(),
+            "q": last_user_message(messages),
+            "r": reply,
+            "s": round(seconds, 3),
+            "c": [[round(offset, 3), text] for offset, text in chunks or []],
+            "u": list(usage) if usage else None
+        }
+        self.appender.append(json.dumps({k: v for k, v in entry.items() if v or k == "r"}, ensure_ascii=False) + "\n")
+        self.recorded += 1
+    
+    def flush(self):
+        """Block until every recorded call is in the file"""
+        self.appender.flush()
+    
+    def find(self, messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """The recording to serve for a request, or CassetteMiss"""
+        key = request_key(messages)
+        candidates = self.by_key.get(key)
+        if candidates:
+            self.hits += 1
+        else:
+            key = (cassette_session.get(), last_user_message(messages))
+            candidates = self.by_message.get(key)
+            if not candidates:
+                self.misses += 1
+                raise CassetteMiss(f"No recording for request {request_key(messages)}")
+            self.fallbacks += 1
+        
+        index = self.cursors.get(key, 0)
+        self.cursors[key] = index + 1
+        return candidates[index % len(candidates)]
+    
+    async def replay(self, messages: List[Dict[str, Any]]) -> str:
+        """Serve a recorded reply after its recorded latency"""
+        entry = self.find(messages)
+        await asyncio.sleep(entry.get("s", 0.0) * self.latency_scale)
+        return entry["r"]
+    
+    async def replay_stream(self, messages: List[Dict[str, Any]]) -> AsyncIterator[str]:
+        """Serve a recorded reply chunk by chunk at the recorded offsets"""
+        entry = self.find(messages)
+        chunks = entry.get("c") or [[entry.get("s", 0.0), entry["r"]]]
+        started = time.monotonic()
+        for offset, text in chunks:
+            delay = offset * self.latency_scale - (time.monotonic() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            yield text
+    
+    def sessions(self) -> Dict[str, List[str]]:
+        """Student messages per recorded session, in the order they were sent"""
+        sessions: Dict[str, List[str]] = {}
+        for entry in self.entries:
+            if entry.get("o", "chat") == "chat" and entry.get("sid") and entry.get("q"):
+                sessions.setdefault(entry["sid"], []).append(entry["q"])
+        return sessions
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "path": self.path,
+            "recordings": len(self.entries),
+            "recorded": self.recorded,
+            "hits": self.hits,
+            "fallbacks": self.fallbacks,
+            "misses": self.misses
+        }
+
+
+class StreamRecorder:
+    """Collects chunk arrival times while a stream is passed through"""
+    
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.chunks: List[Tuple[float, str]] = []
+    
+    def add(self, text: str):
+        self.chunks.append((time.perf_counter() - self.started, text))
+    
+    @property
+    def text(self) -> str:
+        return "".join(text for _, text in self.chunks)
+    
+    @property
+    def seconds(self) -> float:
+        return time.perf_counter() - self.started
+
+
+def create_cassette() -> Optional[Cassette]:
+    """Cassette selected by `settings.llm_cassette_mode` (record, replay or off)"""
+    mode = settings.llm_cassette_mode.lower()
+    if mode in ("record", "replay"):
+        return Cassette(settings.llm_cassette_path, mode, settings.llm_cassette_latency_scale)
+    return None
+
+
+_cassette: Optional[Cassette] = None
+
+
+def set_cassette(cassette: Optional[Cassette]):
+    global _cassette
+    _cassette = cassette
+
+
+def get_cassette() -> Optional[Cassette]:
+    return _cassette
@@ -0,0 +1,175 @@
+import json
+import logging
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Type
+from pydantic import BaseModel, ValidationError
+from app.content_provider import ContentProvider
+from app.models.content import CurriculumTopic, ActivityTemplate, CanadianExample, StoryCharacter
+
+logger = logging.getLogger(__name__)
+
+
+class LocalContentService(ContentProvider):
+    """Serves curriculum content from the repo's content/*.json files
+    
+    Everything is validated and pre-formatted into per-topic indexes at
+    startup, so lookups are dictionary reads with no network round-trips.
+    """
+    
+    def __init__(self, content_dir: str):
+        self.content_dir = Path(content_dir)
+        self.is_initialized = False
+        self.topics: Dict[str, Dict[str, Any]] = {}
+        self.canadian_examples: Dict[str, List[str]] = {}
+        self.activities: Dict[str, List[Dict[str, Any]]] = {}
+        self.story_characters: Dict[str, List[StoryCharacter]] = {}
+    
+    async def initialize(self):
+        """Load and index the content files"""
+        try:
+            curriculum = self._load_file('curriculum_data.json')['grade4_science_curriculum']
+            topics = [
+                topic
+                for unit in curriculum.values()
+                for topic in self._validate(CurriculumTopic, unit.get('topics', []))
+            ]
+            
+            examples = [
+                example
+                for group in self._load_file('canadian_examples.json')['canadian_examples'].values()
+                for example in self._validate(CanadianExample, group)
+            ]
+            
+            activities = self._validate(
+                ActivityTemplate,
+                self._load_file('activity_templates.json')['activity_templates']
+            )
+            
+            characters = self._validate(
+                StoryCharacter,
+                self._load_file('story_characters.json')['story_characters']
+            )
+            
+            self._build_indexes(topics, examples, activities, characters)
+            self.is_initialized = True
+            logger.info(
+                f"Local content loaded: {len(topics)} topics, {len(examples)} examples, "
+                f"{len(activities)} activities, {len(characters)} characters"
+            )
+        
+        except Exception as e:
+            logger.error(f"Failed to load local content from {self.content_dir}: {str(e)}")
+            self.is_initialized = False
+    
+    async def check_health(self) -> bool:
+        """Check if local content is loaded"""
+        return self.is_initialized and bool(self.topics)
+    
+    async def get_content_for_topic(self, topic: str) -> Optional[Dict[str, Any]]:
+        """Get curriculum content for a specific topic"""
+        key = self._resolve_topic(topic, self.topics)
+        return self.topics.get(key) if key else None
+    
+    async def get_canadian_examples(self, topic: str) -> List[str]:
+        """Get Canadian examples for a topic"""
+        key = self._resolve_topic(topic, self.canadian_examples)
+        return self.canadian_examples.get(key, []) if key else []
+    
+    async def get_activities(self, topic: str) -> List[Dict[str, Any]]:
+        """Get hands-on activities for a topic"""
+        key = self._resolve_topic(topic, self.activities)
+        return self.activities.get(key, []) if key else []
+    
+    async def get_story_characters(self, topic: str) -> List[StoryCharacter]:
+        """Get story characters connected to a topic"""
+        return self.story_characters.get(topic.lower(), [])
+    
+    def _load_file(self, name: str) -> Dict[str, Any]:
+        with open(self.content_dir / name, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    
+    def _validate(self, model: Type[BaseModel], records: List[Dict[str, Any]]) -> List[Any]:
+        """Validate records against a content model, skipping invalid ones"""
+        valid = []
+        for record in records:
+            try:
+                valid.append(model(**record))
+            except ValidationError as e:
+                logger.warning(f"Skipping invalid {model.__name__} record: {e.errors()[0]['msg']}")
+        return valid
+    
+    def _build_indexes(
+        self,
+        topics: List[CurriculumTopic],
+        examples: List[CanadianExample],
+        activities: List[ActivityTemplate],
+        characters: List[StoryCharacter]
+    ):
+        """Pre-format content into per-topic lookups"""
+        topics_by_name: Dict[str, List[CurriculumTopic]] = defaultdict(list)
+        for topic in topics:
+            topics_by_name[topic.topic_name.lower()].append(topic)
+        
+        self.topics = {
+            name: self._format_curriculum_content(subtopics)
+            for name, subtopics in topics_by_name.items()
+        }
+        
+        canadian_examples: Dict[str, List[str]] = defaultdict(list)
+        for example in examples:
+            text = example.example_title
+            if example.description:
+                text = f"{text}: {example.description}"
+            canadian_examples[self._topic_key(example.curriculum_topic)].append(text)
+        self.canadian_examples = dict(canadian_examples)
+        
+        formatted_activities: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for activity in activities:
+            formatted_activities[self._topic_key(activity.curriculum_topic)].append({
+                'name': activity.activity_name,
+                'description': activity.instructions,
+                'materials': [m.strip() for m in activity.materials_needed.split(',') if m.strip()],
+                'steps': activity.instructions.split('\n') if activity.instructions else [],
+                'learning_outcome': activity.discussion_prompts
+            })
+        self.activities = dict(formatted_activities)
+        
+        story_characters: Dict[str, List[StoryCharacter]] = defaultdict(list)
+        for character in characters:
+            for connection in character.curriculum_connection:
+                story_characters[connection.lower()].append(character)
+        self.story_characters = dict(story_characters)
+    
+    def _format_curriculum_content(self, subtopics: List[CurriculumTopic]) -> Dict[str, Any]:
+        """Format a topic's subtopics like AirtableService formats a curriculum record"""
+        first = subtopics[0]
+        key_concepts: List[str] = []
+        for subtopic in subtopics:
+            key_concepts.extend(c for c in subtopic.key_concepts if c not in key_concepts)
+        
+        return {
+            'topic': first.topic_name,
+            'content': first.description,
+            'grade_level': 'Grade 4',
+            'learning_objectives': [s.curriculum_expectation for s in subtopics],
+            'key_concepts': key_concepts,
+            'vocabulary': [],
+            'ontario_expectations': first.curriculum_expectation,
+            'assessment_ideas': [],
+            'canadian_examples': [s.canadian_connection for s in subtopics if s.canadian_connection],
+            'indigenous_perspective': first.indigenous_perspective
+        }
+    
+    @staticmethod
+    def _topic_key(curriculum_topic: str) -> str:
+        """Map "Light - Shadows" style references to their main topic key"""
+        return curriculum_topic.split(' - ')[0].strip().lower()
+    
+    @staticmethod
+    def _resolve_topic(topic: str, index: Dict[str, Any]) -> Optional[str]:
+        """Exact topic match, falling back to a substring match like Airtable's SEARCH"""
+        key = topic.lower()
+        if key in index:
+            return key
+        return next((name for name in index if key in name), None)
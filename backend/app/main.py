@@ -1,22 +1,33 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Dict, Any, List
+import asyncio
+import json
 import logging
+import time
 import uuid
 
 from app.config import settings
 from app.models import (
     ChatRequest, 
     ChatResponse, 
+    BatchChatRequest,
+    BatchChatResponse,
+    BatchChatResult,
     HealthResponse, 
     ErrorResponse,
     SessionData
 )
 from app.session_manager import SessionManager
 from app.ai_orchestrator import AIOrchestrator
-from app.airtable_service import AirtableService
+from app.conversation_summarizer import ConversationSummarizer
+from app.health_monitor import HealthMonitor
+from app.content_provider import create_content_provider
+from app.prompts import watch_prompts
+from app.tracing import flush_exporter, iterate_in_span, span, start_span, use_span
+from app.metrics import ACTIVE_SESSIONS, HTTP_LATENCY, HTTP_REQUESTS, REGISTRY, CallbackMetric
 from app.api import content
 
 logging.basicConfig(
@@ -39,12 +50,77 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Include content router for Airtable curriculum endpoints
+# Include content router for curriculum content endpoints
 app.include_router(content.router, prefix="/api/content", tags=["content"])
 
 session_manager = SessionManager()
 ai_orchestrator = AIOrchestrator()
-airtable_service = AirtableService()
+conversation_summarizer = ConversationSummarizer(ai_orchestrator, session_manager)
+content_service = create_content_provider()
+health_monitor = HealthMonitor(ai_orchestrator, content_service)
+
+# Shared with the content router so both use the same warm cache and cached health
+app.state.content_service = content_service
+app.state.health_monitor = health_monitor
+
+
+def _cache_lookups(stats: Dict[str, Any], results: Dict[str, str]) -> Dict[tuple, float]:
+    """One label value per counter in a stats() dict, skipping counters it doesn't keep"""
+    return {(label,): stats[key] for label, key in results.items() if key in stats}
+
+
+# Read from the existing stats objects at scrape time
+REGISTRY.register(CallbackMetric(
+    "tutor_content_cache_lookups_total", "Content cache lookups by result", "counter",
+    lambda: _cache_lookups(content_service.get_cache_stats(), {"hit": "hits", "stale_hit": "stale_hits", "miss": "misses"}),
+    ("result",)
+))
+REGISTRY.register(CallbackMetric(
+    "tutor_response_cache_lookups_total", "Response cache lookups by result", "counter",
+    lambda: _cache_lookups(ai_orchestrator.get_response_cache_stats(), {"hit": "hits", "near_hit": "near_hits", "miss": "misses"}),
+    ("result",)
+))
+REGISTRY.register(CallbackMetric(
+    "tutor_prompt_cache_input_tokens_total", "Provider input tokens by prompt cache outcome", "counter",
+    lambda: {
+        (provider, kind): stats[f"{kind}_input_tokens"]
+        for provider, stats in ai_orchestrator.get_prompt_cache_stats().items()
+        for kind in ("uncached", "cache_read", "cache_write")
+    },
+    ("provider", "kind")
+))
+REGISTRY.register(CallbackMetric(
+    "tutor_llm_hedging_total", "Hedged-request events: eligible turns, hedges fired, wins by side, failures", "counter",
+    lambda: _cache_lookups(ai_orchestrator.get_provider_stats()["hedging"], {
+        "request": "requests", "hedged": "hedged", "hedge_win": "hedge_wins",
+        "primary_win": "primary_wins", "failure": "failures"
+    }),
+    ("event",)
+))
+REGISTRY.register(CallbackMetric(
+    "tutor_circuit_open", "1 while a provider's circuit breaker is open", "gauge",
+    lambda: {
+        (provider,): float(circuit["state"] == "open")
+        for provider, circuit in ai_orchestrator.get_provider_stats()["circuits"].items()
+    },
+    ("provider",)
+))
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    started = time.perf_counter()
+    status = "500"
+    try:
+        # An unhandled exception propagates through here and is answered with a 500 further out
+        response = await call_next(request)
+        status = str(response.status_code)
+        return response
+    finally:
+        route = request.scope.get("route")
+        path = route.path if route else "unmatched"
+        HTTP_REQUESTS.inc(route=path, method=request.method, status=status)
+        HTTP_LATENCY.observe(time.perf_counter() - started, route=path, method=request.method)
 
 
 @app.on_event("startup")
@@ -53,7 +129,14 @@ async def startup_event():
     logger.info(f"Starting {settings.app_name} v{settings.app_version}")
     try:
         await ai_orchestrator.initialize()
-        await airtable_service.initialize()
+        await content_service.initialize()
+        await ai_orchestrator.precompile_prompts(content_service)
+        if settings.prompts_watch_interval_seconds > 0:
+            app.state.prompts_watcher = asyncio.create_task(watch_prompts(
+                settings.prompts_watch_interval_seconds,
+                on_change=lambda: ai_orchestrator.precompile_prompts(content_service)
+            ))
+        health_monitor.start(settings.health_probe_interval_seconds)
         logger.info("All services initialized successfully")
     except Exception as e:
         logger.error(f"Failed to initialize services: {str(e)}")
@@ -63,8 +146,14 @@ async def startup_event():
 async def shutdown_event():
     """Cleanup on shutdown"""
     logger.info("Shutting down application")
+    if getattr(app.state, "prompts_watcher", None):
+        app.state.prompts_watcher.cancel()
+    await health_monitor.cleanup()
+    await conversation_summarizer.cleanup()
     await ai_orchestrator.cleanup()
-    await airtable_service.cleanup()
+    await content_service.cleanup()
+    await session_manager.cleanup()
+    await asyncio.to_thread(flush_exporter)
 
 
 @app.exception_handler(Exception)
@@ -93,102 +182,150 @@ async def root():
 
 @app.get("/api/health", response_model=HealthResponse)
 async def health_check():
-    """Health check endpoint"""
-    services_status = {
-        "claude": await ai_orchestrator.check_claude_health(),
-        "openai": await ai_orchestrator.check_openai_health(),
-        "airtable": await airtable_service.check_health(),
-        "session_manager": True
-    }
+    """Health check endpoint (cached; never calls the providers)"""
+    services_status = health_monitor.services()
+    services_status["session_manager"] = True
     
     return HealthResponse(
         status="healthy" if all(services_status.values()) else "degraded",
         version=settings.app_version,
         timestamp=datetime.utcnow(),
-        services=services_status
+        services=services_status,
+        checks=health_monitor.details()
     )
 
 
-@app.post("/api/chat/message", response_model=ChatResponse)
-async def chat_message(request: ChatRequest):
-    """Main chat endpoint"""
-    try:
-        session_id = request.session_id or str(uuid.uuid4())
-        
-        session = session_manager.get_or_create_session(session_id)
-        
-        session_manager.add_message(
+@app.get("/api/stats")
+async def stats():
+    """Cache effectiveness counters"""
+    return {
+        "providers": ai_orchestrator.get_provider_stats(),
+        "prompt_cache": ai_orchestrator.get_prompt_cache_stats(),
+        "response_cache": ai_orchestrator.get_response_cache_stats(),
+        "llm_cassette": ai_orchestrator.get_cassette_stats(),
+        "content_cache": content_service.get_cache_stats()
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text exposition of request, provider, cache and session metrics"""
+    ACTIVE_SESSIONS.set(await session_manager.get_session_count())
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+async def _prepare_chat_turn(
+    request: ChatRequest,
+    topic_bundles: Optional[Dict[str, Dict[str, Any]]] = None
+) -> Dict[str, Any]:
+    """Record the user message and gather curriculum content for a chat turn
+    
+    `topic_bundles` holds content already fetched for a batch, by topic.
+    """
+    session_id = request.session_id or str(uuid.uuid4())
+    
+    with span("session.add_user_message"):
+        session = await session_manager.add_message(
             session_id, 
             role="user",
             content=request.message
         )
-        
-        curriculum_content = None
-        canadian_examples = []
-        activities = []
+    
+    curriculum_content = None
+    enriched_content = None
+    canadian_examples = []
+    activities = []
+    with span("extract_topic"):
         topic = ai_orchestrator.extract_topic(request.message)
-        if topic:
-            # Fetch all content types for the topic
-            curriculum_content = await airtable_service.get_content_for_topic(topic)
-            canadian_examples = await airtable_service.get_canadian_examples(topic)
-            activities = await airtable_service.get_activities(topic)
-            
-            session_manager.update_session_metadata(
+    if topic:
+        # Fetch all content types for the topic concurrently
+        with span("content.topic_bundle", topic=topic):
+            bundle = (topic_bundles or {}).get(topic) or await content_service.get_topic_bundle(topic)
+        curriculum_content = bundle["curriculum_content"]
+        canadian_examples = bundle["canadian_examples"]
+        activities = bundle["activities"]
+        enriched_content = bundle["enriched_content"]
+        
+        with span("session.update_metadata"):
+            await session_manager.update_session_metadata(
                 session_id, 
                 {"current_topic": topic}
             )
-        
-        # Prepare enriched content for AI orchestrator
-        enriched_content = None
+    
+    # Build metadata for response
+    metadata = {}
+    if topic:
+        metadata["curriculum_topic"] = topic
         if curriculum_content:
-            enriched_content = {
-                **curriculum_content,
-                "canadian_examples": canadian_examples,
-                "activities": activities
-            }
+            metadata["learning_objectives"] = curriculum_content.get("learning_objectives", [])
+        if canadian_examples:
+            metadata["canadian_examples"] = canadian_examples[:2]  # Limit to 2 examples
+        if activities:
+            metadata["suggested_activity"] = activities[0] if activities else None
+    
+    return {
+        "session_id": session_id,
+        "session": session,
+        "curriculum_content": curriculum_content,
+        "enriched_content": enriched_content,
+        "metadata": metadata
+    }
+
+
+async def _run_chat_turn(
+    request: ChatRequest,
+    topic_bundles: Optional[Dict[str, Dict[str, Any]]] = None
+) -> ChatResponse:
+    """Run one non-streaming chat turn and save the reply"""
+    with span("chat.turn") as root:
+        turn = await _prepare_chat_turn(request, topic_bundles)
+        session_id = turn["session_id"]
+        root.set_attribute("session_id", session_id)
         
         ai_response = await ai_orchestrator.process_message(
             message=request.message,
-            session=session,
-            curriculum_content=enriched_content,
+            session=turn["session"],
+            curriculum_content=turn["enriched_content"],
             force_provider=request.force_provider,
             force_mode=request.force_mode
         )
         
-        session_manager.add_message(
-            session_id,
-            role="assistant",
-            content=ai_response["response"],
-            provider=ai_response["provider"],
-            mode=ai_response["mode"]
-        )
+        with span("session.add_assistant_message"):
+            await session_manager.add_message(
+                session_id,
+                role="assistant",
+                content=ai_response["response"],
+                provider=ai_response["provider"],
+                mode=ai_response["mode"]
+            )
+        conversation_summarizer.schedule(turn["session"], ai_response["history_cutoff"])
         
         activity_markers = ai_orchestrator.extract_activity_markers(
             ai_response["response"]
         )
-        
-        # Build metadata for response
-        metadata = {}
-        if topic:
-            metadata["curriculum_topic"] = topic
-            if curriculum_content:
-                metadata["learning_objectives"] = curriculum_content.get("learning_objectives", [])
-            if canadian_examples:
-                metadata["canadian_examples"] = canadian_examples[:2]  # Limit to 2 examples
-            if activities:
-                metadata["suggested_activity"] = activities[0] if activities else None
-        
-        return ChatResponse(
-            response=ai_response["response"],
-            session_id=session_id,
-            provider=ai_response["provider"],
-            mode=ai_response["mode"],
-            has_activity=len(activity_markers) > 0,
-            activity_markers=activity_markers if activity_markers else None,
-            curriculum_content=curriculum_content,
-            metadata=metadata if metadata else None
-        )
-        
+    
+    metadata = turn["metadata"]
+    if settings.tracing_timings_in_response:
+        metadata = {**metadata, "timings_ms": root.trace.timings()}
+    
+    return ChatResponse(
+        response=ai_response["response"],
+        session_id=session_id,
+        provider=ai_response["provider"],
+        mode=ai_response["mode"],
+        has_activity=len(activity_markers) > 0,
+        activity_markers=activity_markers if activity_markers else None,
+        curriculum_content=turn["curriculum_content"],
+        metadata=metadata if metadata else None
+    )
+
+
+@app.post("/api/chat/message", response_model=ChatResponse)
+async def chat_message(request: ChatRequest):
+    """Main chat endpoint"""
+    try:
+        return await _run_chat_turn(request)
+    
     except Exception as e:
         logger.error(f"Error processing chat message: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -197,10 +334,165 @@ async def chat_message(request: ChatRequest):
         )
 
 
+@app.post("/api/chat/batch", response_model=BatchChatResponse)
+async def chat_batch(request: BatchChatRequest):
+    """Process many independent chat turns in one call
+    
+    Each topic's content is fetched once for the whole batch. Items for the
+    same session run in request order; other items generate concurrently,
+    at most `chat_batch_concurrency` at a time. A failed item gets an error
+    instead of failing the batch.
+    """
+    if len(request.items) > settings.chat_batch_max_items:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch has {len(request.items)} items; the limit is {settings.chat_batch_max_items}"
+        )
+    
+    # Items without a session each start their own
+    items = [
+        item if item.session_id else item.model_copy(update={"session_id": str(uuid.uuid4())})
+        for item in request.items
+    ]
+    
+    topics = {t for t in (ai_orchestrator.extract_topic(item.message) for item in items) if t}
+    bundles = await asyncio.gather(
+        *(content_service.get_topic_bundle(topic) for topic in topics),
+        return_exceptions=True
+    )
+    # A failed lookup is retried per item, so its error is reported there
+    topic_bundles = {
+        topic: bundle for topic, bundle in zip(topics, bundles) if not isinstance(bundle, Exception)
+    }
+    
+    by_session: Dict[str, List[int]] = {}
+    for index, item in enumerate(items):
+        by_session.setdefault(item.session_id, []).append(index)
+    
+    results: List[Optional[BatchChatResult]] = [None] * len(items)
+    semaphore = asyncio.Semaphore(settings.chat_batch_concurrency)
+    
+    async def run_session(indexes: List[int]):
+        for index in indexes:
+            item = items[index]
+            try:
+                async with semaphore:
+                    response = await _run_chat_turn(item, topic_bundles)
+                results[index] = BatchChatResult(index=index, session_id=item.session_id, response=response)
+            except Exception as e:
+                logger.error(f"Batch item {index} failed: {str(e)}")
+                results[index] = BatchChatResult(index=index, session_id=item.session_id, error=str(e))
+    
+    await asyncio.gather(*(run_session(indexes) for indexes in by_session.values()))
+    
+    failed = sum(1 for result in results if result.error is not None)
+    return BatchChatResponse(results=results, succeeded=len(results) - failed, failed=failed)
+
+
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Format a server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@app.post("/api/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """Streaming chat endpoint (server-sent events)
+    
+    Emits a "meta" event with the session, provider, mode and curriculum
+    metadata before generation starts, "token" events as text arrives, and a
+    final "done" event once the assistant message has been saved. A "meta"
+    event is re-sent if the provider falls back before its first token.
+    
+    The turn is traced like a non-streaming one; its root span stays open
+    until the stream ends.
+    """
+    root = start_span("chat.turn", streaming=True)
+    try:
+        with use_span(root):
+            turn = await _prepare_chat_turn(request)
+    except Exception as e:
+        root.end(error=str(e))
+        logger.error(f"Error preparing chat stream: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to process message: {str(e)}"
+        )
+    
+    session_id = turn["session_id"]
+    metadata = turn["metadata"]
+    root.set_attribute("session_id", session_id)
+    
+    async def event_stream():
+        error = None
+        try:
+            async for item in iterate_in_span(ai_orchestrator.stream_message(
+                message=request.message,
+                session=turn["session"],
+                curriculum_content=turn["enriched_content"],
+                force_provider=request.force_provider,
+                force_mode=request.force_mode
+            ), root):
+                if item["event"] in ("start", "fallback"):
+                    yield _sse_event("meta", {
+                        "session_id": session_id,
+                        "provider": item["provider"].value,
+                        "mode": item["mode"].value,
+                        "curriculum_content": turn["curriculum_content"],
+                        "metadata": metadata if metadata else None
+                    })
+                elif item["event"] == "token":
+                    yield _sse_event("token", {"text": item["text"]})
+                elif item["event"] == "end":
+                    with use_span(root), span("session.add_assistant_message"):
+                        await session_manager.add_message(
+                            session_id,
+                            role="assistant",
+                            content=item["response"],
+                            provider=item["provider"],
+                            mode=item["mode"]
+                        )
+                    conversation_summarizer.schedule(turn["session"], item["history_cutoff"])
+                    
+                    activity_markers = ai_orchestrator.extract_activity_markers(
+                        item["response"]
+                    )
+                    
+                    done = {
+                        "session_id": session_id,
+                        "provider": item["provider"].value,
+                        "mode": item["mode"].value,
+                        "has_activity": len(activity_markers) > 0,
+                        "activity_markers": activity_markers if activity_markers else None,
+                        "timestamp": datetime.utcnow().isoformat()
+                    }
+                    if settings.tracing_timings_in_response:
+                        done["timings_ms"] = {**root.trace.timings(), "chat.turn": round(root.duration_ms, 2)}
+                    yield _sse_event("done", done)
+        except Exception as e:
+            error = str(e) or type(e).__name__
+            logger.error(f"Error streaming chat message: {str(e)}", exc_info=True)
+            yield _sse_event("error", {
+                "error": "Failed to process message",
+                "detail": str(e)
+            })
+        except BaseException:
+            # Client disconnected mid-stream
+            error = "cancelled"
+            raise
+        finally:
+            root.end(error=error)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @app.get("/api/session/{session_id}", response_model=SessionData)
 async def get_session(session_id: str):
     """Get session data"""
-    session = session_manager.get_session(session_id)
+    session = await session_manager.get_session(session_id)
     if not session:
         raise HTTPException(
             status_code=404,
@@ -212,7 +504,7 @@ async def get_session(session_id: str):
 @app.delete("/api/session/{session_id}")
 async def clear_session(session_id: str):
     """Clear a session"""
-    if session_manager.clear_session(session_id):
+    if await session_manager.clear_session(session_id):
         return {"message": f"Session {session_id} cleared successfully"}
     else:
         raise HTTPException(
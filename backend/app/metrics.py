@@ -0,0 +1,197 @@
+"""
+In-process metrics registry rendered in the Prometheus text exposition format
+
+A small subset of prometheus_client (counters, gauges, histograms with
+labels, and callback metrics read at scrape time), so `/metrics` needs no
+extra dependency or external service.
+"""
+
+import math
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+LabelValues = Tuple[str, ...]
+
+# Seconds; LLM calls run from well under a second to tens of seconds
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace("\n", r"\n").replace('"', r'\"')
+
+
+def _labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric:
+    type = "untyped"
+    
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+    
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+    
+    def samples(self) -> List[Tuple[str, str, float]]:
+        """(name suffix, rendered labels, value) per sample"""
+        return []
+    
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(f"{self.name}{suffix}{labels} {_format_value(value)}" for suffix, labels, value in self.samples())
+        return "\n".join(lines)
+
+
+class _ValueMetric(Metric):
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, help, labelnames)
+        self.values: Dict[LabelValues, float] = {} if self.labelnames else {(): 0.0}
+    
+    def value(self, **labels: str) -> float:
+        return self.values.get(self._key(labels), 0.0)
+    
+    def samples(self) -> List[Tuple[str, str, float]]:
+        return [("", _labels(self.labelnames, key), value) for key, value in sorted(self.values.items())]
+
+
+class Counter(_ValueMetric):
+    type = "counter"
+    
+    def inc(self, amount: float = 1.0, **labels: str):
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0.0) + amount
+
+
+class Gauge(_ValueMetric):
+    type = "gauge"
+    
+    def set(self, value: float, **labels: str):
+        self.values[self._key(labels)] = value
+    
+    def inc(self, amount: float = 1.0, **labels: str):
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0.0) + amount
+
+
+class Histogram(Metric):
+    type = "histogram"
+    
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # Per label set: non-cumulative bucket counts, sum, count
+        self.series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+    
+    def observe(self, value: float, **labels: str):
+        key = self._key(labels)
+        series = self.series.get(key)
+        if series is None:
+            series = self.series[key] = ([0] * len(self.buckets), [0.0, 0.0])
+        counts, totals = series
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+                break
+        totals[0] += value
+        totals[1] += 1
+    
+    def samples(self) -> List[Tuple[str, str, float]]:
+        samples = []
+        for key, (counts, (total, count)) in sorted(self.series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _labels(self.labelnames + ("le",), key + (_format_value(bound),))
+                samples.append(("_bucket", labels, cumulative))
+            samples.append(("_sum", _labels(self.labelnames, key), total))
+            samples.append(("_count", _labels(self.labelnames, key), count))
+        return samples
+
+
+class CallbackMetric(Metric):
+    """Counter or gauge whose values are read from elsewhere at scrape time"""
+    
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        type: str,
+        callback: Callable[[], Dict[LabelValues, float]],
+        labelnames: Iterable[str] = ()
+    ):
+        super().__init__(name, help, labelnames)
+        self.type = type
+        self.callback = callback
+    
+    def samples(self) -> List[Tuple[str, str, float]]:
+        return [
+            ("", _labels(self.labelnames, key), value)
+            for key, value in sorted(self.callback().items())
+        ]
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+    
+    def register(self, metric: Metric) -> Metric:
+        """Add a metric; registering a name again replaces the earlier metric"""
+        self.metrics[metric.name] = metric
+        return metric
+    
+    def counter(self, name: str, help: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labelnames))
+    
+    def gauge(self, name: str, help: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self.register(Gauge(name, help, labelnames))
+    
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labelnames: Iterable[str] = (),
+        buckets: Optional[Iterable[float]] = None
+    ) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets or DEFAULT_BUCKETS))
+    
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self.metrics.values()) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "tutor_http_requests_total", "HTTP requests by route, method and status", ("route", "method", "status")
+)
+HTTP_LATENCY = REGISTRY.histogram(
+    "tutor_http_request_duration_seconds", "Time to response start per route", ("route", "method")
+)
+LLM_LATENCY = REGISTRY.histogram(
+    "tutor_llm_request_duration_seconds", "Successful provider call latency (whole stream for streaming)", ("provider",)
+)
+LLM_ERRORS = REGISTRY.counter(
+    "tutor_llm_errors_total", "Failed provider calls and streams", ("provider", "error")
+)
+LLM_FALLBACKS = REGISTRY.counter(
+    "tutor_llm_fallbacks_total", "Turns that fell back from a failed provider", ("from_provider",)
+)
+LLM_TOKENS = REGISTRY.counter(
+    "tutor_llm_tokens_total", "Tokens reported by the providers", ("provider", "direction")
+)
+SESSIONS_CREATED = REGISTRY.counter("tutor_sessions_created_total", "Sessions created")
+ACTIVE_SESSIONS = REGISTRY.gauge("tutor_active_sessions", "Live sessions in the session store")
@@ -0,0 +1,207 @@
+from pydantic import BaseModel, Field, GetCoreSchemaHandler
+from pydantic_core import core_schema
+from typing import Optional, List, Dict, Any, Literal, Union
+from datetime import datetime, timezone
+from enum import Enum
+import time
+
+
+class AIProvider(str, Enum):
+    CLAUDE = "claude"
+    OPENAI = "openai"
+
+
+class ConversationMode(str, Enum):
+    LEARNING = "learning"
+    EXPLANATORY = "explanatory"
+    STORY = "story"
+    DISCOVERY = "discovery"
+
+
+class ChatMessage(BaseModel):
+    role: Literal["user", "assistant", "system"]
+    content: str
+    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    provider: Optional[AIProvider] = None
+    mode: Optional[ConversationMode] = None
+
+
+# Canonical role strings, so every stored message shares one object per role
+_ROLES = {role: role for role in ("user", "assistant", "system")}
+
+
+class CompactMessage:
+    """Slotted in-memory form of a ChatMessage for session history
+    
+    A ChatMessage carries an instance dict, pydantic bookkeeping and a
+    datetime; this keeps five references and an epoch float. Role strings
+    and the provider/mode enum members are shared across all messages.
+    It has the same attributes, so history code reads either. Sessions
+    validate ChatMessages (or their dicts) into this form and serialize it
+    back as a ChatMessage, so the API shape is unchanged.
+    """
+    
+    __slots__ = ('role', 'content', 'created', 'provider', 'mode')
+    
+    def __init__(
+        self,
+        role: str,
+        content: str,
+        created: Optional[float] = None,
+        provider: Optional[AIProvider] = None,
+        mode: Optional[ConversationMode] = None
+    ):
+        self.role = _ROLES[role]
+        self.content = content
+        self.created = time.time() if created is None else created
+        self.provider = AIProvider(provider) if provider else None
+        self.mode = ConversationMode(mode) if mode else None
+    
+    @property
+    def timestamp(self) -> datetime:
+        """Naive UTC datetime, as ChatMessage uses"""
+        return datetime.utcfromtimestamp(self.created)
+    
+    @classmethod
+    def of(cls, message: Union["CompactMessage", ChatMessage]) -> "CompactMessage":
+        if isinstance(message, cls):
+            return message
+        return cls(
+            message.role,
+            message.content,
+            _epoch(message.timestamp),
+            message.provider,
+            message.mode
+        )
+    
+    def to_model(self) -> ChatMessage:
+        return ChatMessage.model_construct(
+            role=self.role,
+            content=self.content,
+            timestamp=self.timestamp,
+            provider=self.provider,
+            mode=self.mode
+        )
+    
+    def model_dump_json(self) -> str:
+        return self.to_model().model_dump_json()
+    
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, CompactMessage):
+            return NotImplemented
+        return all(getattr(self, slot) == getattr(other, slot) for slot in self.__slots__)
+    
+    def __repr__(self) -> str:
+        return f"CompactMessage(role={self.role!r}, content={self.content!r}, timestamp={self.timestamp.isoformat()})"
+    
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source: Any, handler: GetCoreSchemaHandler) -> core_schema.CoreSchema:
+        chat_message = handler.generate_schema(ChatMessage)
+        from_chat_message = core_schema.no_info_after_validator_function(cls.of, chat_message)
+        return core_schema.json_or_python_schema(
+            json_schema=from_chat_message,
+            python_schema=core_schema.union_schema([core_schema.is_instance_schema(cls), from_chat_message]),
+            serialization=core_schema.plain_serializer_function_ser_schema(
+                lambda message: message.to_model(),
+                return_schema=chat_message
+            )
+        )
+
+
+def _epoch(timestamp: datetime) -> float:
+    """Seconds since the epoch, reading naive datetimes as UTC"""
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.timestamp()
+
+
+class ChatRequest(BaseModel):
+    message: str
+    session_id: Optional[str] = None
+    context: Optional[Dict[str, Any]] = None
+    force_provider: Optional[AIProvider] = None
+    force_mode: Optional[ConversationMode] = None
+
+
+class ChatResponse(BaseModel):
+    response: str
+    session_id: str
+    provider: AIProvider
+    mode: ConversationMode
+    has_activity: bool = False
+    activity_markers: Optional[List[str]] = None
+    curriculum_content: Optional[Dict[str, Any]] = None
+    metadata: Optional[Dict[str, Any]] = None  # Enhanced metadata
+    timestamp: datetime = Field(default_factory=datetime.utcnow)
+
+
+class BatchChatRequest(BaseModel):
+    items: List[ChatRequest]
+
+
+class BatchChatResult(BaseModel):
+    index: int
+    session_id: Optional[str] = None
+    response: Optional[ChatResponse] = None
+    error: Optional[str] = None
+
+
+class BatchChatResponse(BaseModel):
+    results: List[BatchChatResult]  # In request order
+    succeeded: int
+    failed: int
+
+
+class SessionStats(BaseModel):
+    """Running aggregates over every message a session has seen, including trimmed ones"""
+    messages_seen: int = 0
+    tokens_seen: int = 0
+    provider_counts: Dict[str, int] = Field(default_factory=dict)
+    mode_counts: Dict[str, int] = Field(default_factory=dict)
+    topics: List[str] = Field(default_factory=list)  # Each topic change, oldest first
+    confusion_count: int = 0
+    last_confusion_at: Optional[int] = None  # Index in messages_seen order of the last confused student message
+
+
+class SessionData(BaseModel):
+    session_id: str
+    messages: List[CompactMessage]  # Served as ChatMessage objects
+    created_at: datetime
+    last_activity: datetime
+    current_topic: Optional[str] = None
+    student_level: Optional[str] = "grade-4"
+    metadata: Dict[str, Any] = Field(default_factory=dict)
+    token_count: int = 0  # Running token estimate of `messages`, kept up to date on append/trim
+    stats: SessionStats = Field(default_factory=SessionStats)
+
+
+class HealthResponse(BaseModel):
+    status: str
+    version: str
+    timestamp: datetime
+    services: Dict[str, bool]
+    checks: Optional[Dict[str, Any]] = None
+
+
+class ErrorResponse(BaseModel):
+    error: str
+    detail: Optional[str] = None
+    status_code: int
+    timestamp: datetime = Field(default_factory=datetime.utcnow)
+
+
+class AirtableContent(BaseModel):
+    topic: str
+    content: str
+    grade_level: str
+    canadian_examples: Optional[List[str]] = None
+    activities: Optional[List[Dict[str, Any]]] = None
+    learning_objectives: Optional[List[str]] = None
+
+
+class AIProviderConfig(BaseModel):
+    provider: AIProvider
+    model: str
+    temperature: float = 0.7
+    max_tokens: int = 1000
+    system_prompt: str
\ No newline at end of file
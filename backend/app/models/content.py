@@ -9,6 +9,7 @@ from enum import Enum
 
 
 class DifficultyLevel(str, Enum):
+    BEGINNER = "Beginner"
     INTRODUCTORY = "Introductory"
     INTERMEDIATE = "Intermediate"
     ADVANCED = "Advanced"
@@ -64,6 +65,7 @@ class ProvinceTerritory(str, Enum):
     NORTHWEST_TERRITORIES = "Northwest Territories"
     YUKON = "Yukon"
     NUNAVUT = "Nunavut"
+    ALL_PROVINCES = "All Provinces"
 
 
 class CurriculumTopic(BaseModel):
@@ -1,11 +1,38 @@
 import openai
-from typing import List, Dict, Any, Optional
+import asyncio
+import time
+from typing import List, Dict, Any, Optional, AsyncIterator
 import logging
 from app.config import settings
+from app.http_client import get_http_client
 from app.models import ChatMessage, ConversationMode
+from app.prompt_compiler import PromptStyle, SystemPromptCompiler
+from app.prompt_cache import PromptSegment, PromptCacheMetrics, join_segments
+from app.tracing import span
+from app.metrics import LLM_TOKENS
+from app.llm_cassette import StreamRecorder, get_cassette
 
 logger = logging.getLogger(__name__)
 
+OPENAI_PROMPT_STYLE = PromptStyle(
+    mode_instructions={
+        ConversationMode.EXPLANATORY: "Mode: EXPLANATORY - Provide clear, detailed explanations. Break down complex concepts into simple terms. Use analogies and examples that a Grade 4 student can relate to.",
+        ConversationMode.STORY: "Mode: STORY - Use narrative and storytelling to teach. Create engaging scenarios that illustrate the concepts.",
+        ConversationMode.LEARNING: "Mode: LEARNING - Balance explanation with questions. Help the student understand by providing clear guidance."
+    },
+    closing=(
+        "Important Guidelines:\n"
+        "- You're talking to a Grade 4 student (age 9-10)\n"
+        "- Use simple, clear language\n"
+        "- Be encouraging and positive\n"
+        "- Make connections to everyday life\n"
+        "- Integrate Canadian examples naturally when provided\n"
+        "- Suggest activities conversationally, not as a separate section"
+    ),
+    activity_invite="like 'Here's something cool we could try...' or 'Want to experiment? We could...'",
+    include_grade_level=True
+)
+
 
 class OpenAIService:
     """Service for interacting with OpenAI API"""
@@ -14,11 +41,20 @@ class OpenAIService:
         self.client = None
         self.model = "gpt-4-turbo-preview"
         self.is_initialized = False
+        # Caps in-flight OpenAI calls per worker; excess requests wait here instead of at the API
+        self.semaphore = asyncio.Semaphore(settings.openai_max_concurrency)
+        # OpenAI caches long shared prompt prefixes automatically; this tracks how often it hits
+        self.prompt_cache = PromptCacheMetrics()
+        self.prompt_compiler = SystemPromptCompiler(OPENAI_PROMPT_STYLE)
     
     async def initialize(self):
         """Initialize OpenAI client"""
         try:
-            self.client = openai.OpenAI(api_key=settings.openai_api_key)
+            self.client = openai.AsyncOpenAI(
+                api_key=settings.openai_api_key,
+                base_url=settings.openai_base_url,
+                http_client=get_http_client()
+            )
             self.is_initialized = True
             logger.info("OpenAI service initialized successfully")
         except Exception as e:
@@ -31,11 +67,15 @@ class OpenAIService:
         if not self.is_initialized or not self.client:
             return False
         
+        cassette = get_cassette()
+        if cassette and cassette.replaying:
+            return True
+        
         try:
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model="gpt-3.5-turbo",
                 messages=[{"role": "user", "content": "ping"}],
-                max_tokens=10
+                max_tokens=1
             )
             return True
         except Exception as e:
@@ -48,24 +88,44 @@ class OpenAIService:
         system_prompt: str,
         mode: ConversationMode,
         curriculum_content: Optional[Dict[str, Any]] = None,
+        session_context: Optional[str] = None,
         temperature: float = 0.7,
         max_tokens: int = 1000
     ) -> str:
         """Generate response using OpenAI"""
         try:
-            formatted_messages = self._format_messages(messages, system_prompt, mode, curriculum_content)
-            
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=formatted_messages,
-                temperature=temperature,
-                max_tokens=max_tokens,
-                presence_penalty=0.1,
-                frequency_penalty=0.1
-            )
+            with span("openai.format"):
+                formatted_messages = self._format_messages(messages, system_prompt, mode, curriculum_content, session_context)
             
-            return response.choices[0].message.content
+            cassette = get_cassette()
+            # Time waiting for the semaphore is the gap between provider.call and openai.api
+            async with self.semaphore:
+                with span("openai.api", model=self.model) as api_span:
+                    if cassette and cassette.replaying:
+                        return await cassette.replay(formatted_messages)
+                    
+                    started = time.perf_counter()
+                    response = await self.client.chat.completions.create(
+                        model=self.model,
+                        messages=formatted_messages,
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        presence_penalty=0.1,
+                        frequency_penalty=0.1
+                    )
+                    if response.usage:
+                        api_span.set_attribute("input_tokens", response.usage.prompt_tokens)
+                        api_span.set_attribute("output_tokens", response.usage.completion_tokens)
             
+            self._record_usage(response.usage)
+            text = response.choices[0].message.content
+            if cassette and cassette.recording:
+                cassette.record(
+                    "openai", formatted_messages, text, time.perf_counter() - started,
+                    usage=self._usage_pair(response.usage)
+                )
+            return text
+        
         except openai.APIError as e:
             logger.error(f"OpenAI API error: {str(e)}")
             raise
@@ -73,18 +133,119 @@ class OpenAIService:
             logger.error(f"Unexpected error in OpenAI service: {str(e)}")
             raise
     
+    async def stream_response(
+        self,
+        messages: List[ChatMessage],
+        system_prompt: str,
+        mode: ConversationMode,
+        curriculum_content: Optional[Dict[str, Any]] = None,
+        session_context: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 1000
+    ) -> AsyncIterator[str]:
+        """Stream response text from OpenAI as it is generated"""
+        try:
+            formatted_messages = self._format_messages(messages, system_prompt, mode, curriculum_content, session_context)
+            
+            cassette = get_cassette()
+            async with self.semaphore:
+                if cassette and cassette.replaying:
+                    async for text in cassette.replay_stream(formatted_messages):
+                        yield text
+                    return
+                
+                recorder = StreamRecorder()
+                stream = await self.client.chat.completions.create(
+                    model=self.model,
+                    messages=formatted_messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    presence_penalty=0.1,
+                    frequency_penalty=0.1,
+                    stream=True,
+                    # Usage arrives in a final chunk with no choices
+                    extra_body={"stream_options": {"include_usage": True}}
+                )
+                async for chunk in stream:
+                    if getattr(chunk, 'usage', None):
+                        self._record_usage(chunk.usage)
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        recorder.add(chunk.choices[0].delta.content)
+                        yield chunk.choices[0].delta.content
+            
+            if cassette and cassette.recording:
+                cassette.record("openai", formatted_messages, recorder.text, recorder.seconds, chunks=recorder.chunks)
+        
+        except openai.APIError as e:
+            logger.error(f"OpenAI API streaming error: {str(e)}")
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error in OpenAI stream: {str(e)}")
+            raise
+    
+    async def complete(
+        self,
+        prompt: str,
+        system_prompt: str,
+        temperature: float = 0.3,
+        max_tokens: int = 300
+    ) -> str:
+        """Single-turn completion with a plain system prompt (no tutoring additions)"""
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": prompt}
+        ]
+        cassette = get_cassette()
+        try:
+            async with self.semaphore:
+                if cassette and cassette.replaying:
+                    return await cassette.replay(messages)
+                
+                started = time.perf_counter()
+                response = await self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens
+                )
+            
+            self._record_usage(response.usage)
+            text = response.choices[0].message.content
+            if cassette and cassette.recording:
+                cassette.record(
+                    "openai", messages, text, time.perf_counter() - started,
+                    usage=self._usage_pair(response.usage), operation="complete"
+                )
+            return text
+        
+        except openai.APIError as e:
+            logger.error(f"OpenAI API error: {str(e)}")
+            raise
+    
+    def _record_usage(self, usage: Any):
+        """Feed reported usage into prompt cache accounting and token metrics"""
+        self.prompt_cache.record_openai(usage)
+        if usage:
+            LLM_TOKENS.inc(usage.prompt_tokens or 0, provider="openai", direction="input")
+            LLM_TOKENS.inc(usage.completion_tokens or 0, provider="openai", direction="output")
+    
+    @staticmethod
+    def _usage_pair(usage: Any) -> Optional[tuple]:
+        return (usage.prompt_tokens, usage.completion_tokens) if usage else None
+    
     def _format_messages(
         self, 
         messages: List[ChatMessage],
         system_prompt: str,
         mode: ConversationMode,
-        curriculum_content: Optional[Dict[str, Any]] = None
+        curriculum_content: Optional[Dict[str, Any]] = None,
+        session_context: Optional[str] = None
     ) -> List[Dict[str, str]]:
         """Format messages for OpenAI API"""
         formatted = []
         
-        enhanced_system = self._enhance_system_prompt(system_prompt, mode, curriculum_content)
-        formatted.append({"role": "system", "content": enhanced_system})
+        segments = self._system_segments(system_prompt, mode, curriculum_content, session_context)
+        formatted.append({"role": "system", "content": join_segments(segments)})
         
         for msg in messages:
             if msg.role != "system":
@@ -95,67 +256,19 @@ class OpenAIService:
         
         return formatted
     
-    def _enhance_system_prompt(
+    def _system_segments(
         self, 
         base_prompt: str, 
         mode: ConversationMode,
-        curriculum_content: Optional[Dict[str, Any]] = None
-    ) -> str:
-        """Enhance system prompt based on mode and curriculum content"""
-        enhanced = base_prompt
-        
-        if mode == ConversationMode.EXPLANATORY:
-            enhanced += "\n\nMode: EXPLANATORY - Provide clear, detailed explanations. Break down complex concepts into simple terms. Use analogies and examples that a Grade 4 student can relate to."
-        elif mode == ConversationMode.STORY:
-            enhanced += "\n\nMode: STORY - Use narrative and storytelling to teach. Create engaging scenarios that illustrate the concepts."
-        elif mode == ConversationMode.LEARNING:
-            enhanced += "\n\nMode: LEARNING - Balance explanation with questions. Help the student understand by providing clear guidance."
-        
-        if curriculum_content:
-            enhanced += f"\n\n=== CURRICULUM CONTENT TO INTEGRATE ===\nTopic: {curriculum_content.get('topic', 'General')}"
-            enhanced += f"\nGrade Level: {curriculum_content.get('grade_level', 'Grade 4')}"
-            
-            # Add learning objectives
-            if curriculum_content.get('learning_objectives'):
-                enhanced += f"\n\nLearning Objectives to cover:"
-                for obj in curriculum_content['learning_objectives'][:3]:
-                    enhanced += f"\n• {obj}"
-            
-            # Add Canadian examples to weave in naturally
-            if curriculum_content.get('canadian_examples'):
-                enhanced += f"\n\nCanadian Examples - MUST naturally incorporate at least one:"
-                for i, example in enumerate(curriculum_content['canadian_examples'][:2], 1):
-                    enhanced += f"\n{i}. {example}"
-                enhanced += "\nWeave these examples into your explanation naturally, don't just list them."
-            
-            # Add activities to suggest
-            if curriculum_content.get('activities'):
-                activity = curriculum_content['activities'][0]
-                enhanced += f"\n\nActivity to naturally suggest (work this into the conversation):"
-                enhanced += f"\nActivity: {activity.get('name', 'Hands-on activity')}"
-                enhanced += f"\nDescription: {activity.get('description', '')}"
-                if activity.get('materials'):
-                    materials_str = ', '.join(activity['materials'][:5])
-                    enhanced += f"\nMaterials: {materials_str}"
-                enhanced += "\n\nDon't just append this activity - introduce it naturally as part of your response, like 'Here's something cool we could try...' or 'Want to experiment? We could...'"
-            
-            enhanced += "\n\nIMPORTANT: Integrate all content naturally into your response. Don't use obvious markers or sections. Make it flow as one cohesive, engaging explanation."
-        
-        enhanced += """
-        
-Important Guidelines:
-- You're talking to a Grade 4 student (age 9-10)
-- Use simple, clear language
-- Be encouraging and positive
-- Make connections to everyday life
-- Integrate Canadian examples naturally when provided
-- Suggest activities conversationally, not as a separate section
-"""
-        
-        return enhanced
+        curriculum_content: Optional[Dict[str, Any]] = None,
+        session_context: Optional[str] = None
+    ) -> List[PromptSegment]:
+        """System prompt segments, pre-rendered per mode and topic"""
+        return self.prompt_compiler.segments(base_prompt, mode, curriculum_content, session_context)
     
     async def cleanup(self):
         """Cleanup OpenAI service resources"""
+        # The underlying HTTP pool is shared and closed by the orchestrator
         self.client = None
         self.is_initialized = False
         logger.info("OpenAI service cleaned up")
\ No newline at end of file
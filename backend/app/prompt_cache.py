@@ -0,0 +1,87 @@
+"""
+System prompt segments and provider prompt-cache accounting
+"""
+
+from typing import Any, Dict, List, NamedTuple
+
+
+class PromptSegment(NamedTuple):
+    """One part of a system prompt
+    
+    Segments are ordered most-stable first (persona and mode, then topic
+    content, then per-session context) so students on the same mode and topic
+    share the longest possible cached prefix.
+    """
+    text: str
+    cacheable: bool = True
+
+
+def join_segments(segments: List[PromptSegment]) -> str:
+    """Flatten segments into one system prompt string"""
+    return "\n\n".join(segment.text for segment in segments if segment.text)
+
+
+def claude_system_blocks(segments: List[PromptSegment]) -> List[Dict[str, Any]]:
+    """Claude system blocks with a cache breakpoint after each cacheable segment
+    
+    Claude allows at most four breakpoints; there are never more than three
+    cacheable segments. Prefixes shorter than the model's minimum cacheable
+    length are simply processed uncached.
+    """
+    blocks = []
+    for segment in segments:
+        if not segment.text:
+            continue
+        block: Dict[str, Any] = {"type": "text", "text": segment.text}
+        if segment.cacheable:
+            block["cache_control"] = {"type": "ephemeral"}
+        blocks.append(block)
+    return blocks
+
+
+def _field(obj: Any, name: str) -> Any:
+    """Read a usage field from an SDK model or a plain dict (newer API fields arrive as extras)"""
+    if obj is None:
+        return None
+    return obj.get(name) if isinstance(obj, dict) else getattr(obj, name, None)
+
+
+class PromptCacheMetrics:
+    """Counts cached vs uncached input tokens reported by a provider"""
+    
+    def __init__(self):
+        self.requests = 0
+        self.uncached_input_tokens = 0
+        self.cache_read_input_tokens = 0
+        self.cache_write_input_tokens = 0
+    
+    def record_claude(self, usage: Any):
+        """Record a Claude `usage` (input_tokens excludes cache reads and writes)"""
+        self._record(
+            uncached=_field(usage, 'input_tokens') or 0,
+            cache_read=_field(usage, 'cache_read_input_tokens') or 0,
+            cache_write=_field(usage, 'cache_creation_input_tokens') or 0
+        )
+    
+    def record_openai(self, usage: Any):
+        """Record an OpenAI `usage` (prompt_tokens includes cached tokens)"""
+        cached = _field(_field(usage, 'prompt_tokens_details'), 'cached_tokens') or 0
+        self._record(uncached=(_field(usage, 'prompt_tokens') or 0) - cached, cache_read=cached)
+    
+    def _record(self, uncached: int, cache_read: int, cache_write: int = 0):
+        self.requests += 1
+        self.uncached_input_tokens += uncached
+        self.cache_read_input_tokens += cache_read
+        self.cache_write_input_tokens += cache_write
+    
+    def stats(self) -> Dict[str, Any]:
+        total = self.uncached_input_tokens + self.cache_read_input_tokens + self.cache_write_input_tokens
+        return {
+            'requests': self.requests,
+            'input_tokens': total,
+            'uncached_input_tokens': self.uncached_input_tokens,
+            'cache_read_input_tokens': self.cache_read_input_tokens,
+            'cache_write_input_tokens': self.cache_write_input_tokens,
+            'cached_ratio': round(self.cache_read_input_tokens / total, 3) if total else 0.0
+        }
+
@@ -0,0 +1,152 @@
+"""
+Pre-rendered system prompt segments per (mode, topic)
+"""
+
+import logging
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from app.models import ConversationMode
+from app.prompt_cache import PromptSegment
+
+logger = logging.getLogger(__name__)
+
+
+class PromptStyle(NamedTuple):
+    """Provider-specific wording wrapped around the shared prompts.yaml text"""
+    mode_instructions: Dict[ConversationMode, str]
+    closing: str
+    activity_invite: str
+    include_grade_level: bool = False
+
+
+class SystemPromptCompiler:
+    """Renders system prompt segments once and serves them from dictionaries
+    
+    Persona segments are keyed by (system prompt, mode). `get_system_prompt`
+    hands out one string object per mode until prompts.yaml changes, so the
+    key hashes in constant time. Topic segments are keyed by the curriculum
+    fields they render, so refreshed content gets a new entry rather than a
+    stale one.
+    """
+    
+    MAX_ENTRIES = 256
+    
+    def __init__(self, style: PromptStyle):
+        self.style = style
+        self.personas: Dict[Tuple[str, ConversationMode], str] = {}
+        self.topics: Dict[Tuple, str] = {}
+    
+    def segments(
+        self,
+        system_prompt: str,
+        mode: ConversationMode,
+        curriculum_content: Optional[Dict[str, Any]] = None,
+        session_context: Optional[str] = None
+    ) -> List[PromptSegment]:
+        """System prompt segments, most stable first: persona and mode, topic content, session"""
+        segments = [PromptSegment(self.persona(system_prompt, mode))]
+        
+        if curriculum_content:
+            segments.append(PromptSegment(self.topic(curriculum_content)))
+        
+        if session_context:
+            # Differs per student, so it goes last and is never cached
+            segments.append(PromptSegment(session_context, cacheable=False))
+        
+        return segments
+    
+    def persona(self, system_prompt: str, mode: ConversationMode) -> str:
+        key = (system_prompt, mode)
+        persona = self.personas.get(key)
+        if persona is None:
+            if len(self.personas) >= self.MAX_ENTRIES:
+                self.personas.clear()
+            persona = self.personas[key] = self._render_persona(system_prompt, mode)
+        return persona
+    
+    def topic(self, curriculum_content: Dict[str, Any]) -> str:
+        try:
+            key = self._topic_key(curriculum_content)
+            topic = self.topics.get(key)
+        except TypeError:
+            # Unhashable field values from a content source: render without caching
+            return self._render_topic(curriculum_content)
+        
+        if topic is None:
+            if len(self.topics) >= self.MAX_ENTRIES:
+                self.topics.clear()
+            topic = self.topics[key] = self._render_topic(curriculum_content)
+        return topic
+    
+    def precompile(
+        self,
+        system_prompts: Dict[ConversationMode, str],
+        curriculum_contents: Iterable[Dict[str, Any]]
+    ):
+        """Render every mode and topic up front, dropping anything compiled before"""
+        self.personas.clear()
+        self.topics.clear()
+        
+        for mode, system_prompt in system_prompts.items():
+            self.persona(system_prompt, mode)
+        for curriculum_content in curriculum_contents:
+            self.topic(curriculum_content)
+    
+    def _render_persona(self, system_prompt: str, mode: ConversationMode) -> str:
+        parts = [system_prompt]
+        if mode in self.style.mode_instructions:
+            parts.append(self.style.mode_instructions[mode])
+        parts.append(self.style.closing)
+        return "\n\n".join(parts)
+    
+    def _render_topic(self, curriculum_content: Dict[str, Any]) -> str:
+        lines = [
+            "=== CURRICULUM CONTENT TO INTEGRATE ===",
+            f"Topic: {curriculum_content.get('topic', 'General')}"
+        ]
+        if self.style.include_grade_level:
+            lines.append(f"Grade Level: {curriculum_content.get('grade_level', 'Grade 4')}")
+        
+        # Add learning objectives
+        if curriculum_content.get('learning_objectives'):
+            lines.append("\nLearning Objectives to cover:")
+            lines.extend(f"• {obj}" for obj in curriculum_content['learning_objectives'][:3])
+        
+        # Add Canadian examples to weave in naturally
+        if curriculum_content.get('canadian_examples'):
+            lines.append("\nCanadian Examples - MUST naturally incorporate at least one:")
+            lines.extend(
+                f"{i}. {example}"
+                for i, example in enumerate(curriculum_content['canadian_examples'][:2], 1)
+            )
+            lines.append("Weave these examples into your explanation naturally, don't just list them.")
+        
+        # Add activities to suggest
+        if curriculum_content.get('activities'):
+            activity = curriculum_content['activities'][0]
+            lines.append("\nActivity to naturally suggest (work this into the conversation):")
+            lines.append(f"Activity: {activity.get('name', 'Hands-on activity')}")
+            lines.append(f"Description: {activity.get('description', '')}")
+            if activity.get('materials'):
+                lines.append(f"Materials: {', '.join(activity['materials'][:5])}")
+            lines.append(f"\nDon't just append this activity - introduce it naturally as part of your response, {self.style.activity_invite}")
+        
+        lines.append(
+            "\nIMPORTANT: Integrate all content naturally into your response. Don't use obvious "
+            "markers or sections. Make it flow as one cohesive, engaging explanation."
+        )
+        return "\n".join(lines)
+    
+    @staticmethod
+    def _topic_key(curriculum_content: Dict[str, Any]) -> Tuple:
+        """The fields `_render_topic` reads, as a hashable key"""
+        activities = curriculum_content.get('activities') or []
+        activity = activities[0] if activities else {}
+        return (
+            curriculum_content.get('topic', 'General'),
+            curriculum_content.get('grade_level', 'Grade 4'),
+            tuple((curriculum_content.get('learning_objectives') or [])[:3]),
+            tuple((curriculum_content.get('canadian_examples') or [])[:2]),
+            activity.get('name', 'Hands-on activity'),
+            activity.get('description', ''),
+            tuple((activity.get('materials') or [])[:5])
+        )
@@ -1,19 +1,28 @@
+import asyncio
+import logging
 import yaml
 import os
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Awaitable, Callable, Dict, Any, Optional
 from app.models import ConversationMode
 
+logger = logging.getLogger(__name__)
+
+# Map conversation modes to prompt keys
+MODE_KEYS = {
+    ConversationMode.LEARNING: 'learning',
+    ConversationMode.EXPLANATORY: 'explanatory',
+    ConversationMode.STORY: 'story',
+    ConversationMode.DISCOVERY: 'discovery'
+}
+
 # Cache for loaded prompts
 _prompts_cache: Optional[Dict[str, Any]] = None
+_prompts_mtime: Optional[float] = None
+# Pre-rendered base + mode prompt for every mode, rebuilt only when the file changes
+_system_prompts: Dict[ConversationMode, str] = {}
 
-def load_prompts() -> Dict[str, Any]:
-    """Load prompts from YAML file with caching"""
-    global _prompts_cache
-    
-    if _prompts_cache is not None:
-        return _prompts_cache
-    
+def _prompts_file() -> Path:
     # Find the prompts.yaml file
     current_dir = Path(__file__).parent
     prompts_file = current_dir / "prompts.yaml"
@@ -26,54 +35,98 @@ def load_prompts() -> Dict[str, Any]:
     if not prompts_file.exists():
         raise FileNotFoundError(f"Prompts file not found at {prompts_file}")
     
-    with open(prompts_file, 'r', encoding='utf-8') as file:
-        _prompts_cache = yaml.safe_load(file)
+    return prompts_file
+
+def load_prompts() -> Dict[str, Any]:
+    """Load prompts from YAML file with caching"""
+    if _prompts_cache is not None:
+        return _prompts_cache
     
-    return _prompts_cache
+    return _read_prompts()
 
 def reload_prompts():
-    """Force reload of prompts from file (useful for development)"""
-    global _prompts_cache
-    _prompts_cache = None
-    return load_prompts()
+    """Force reload of prompts from file (useful for development)
+    
+    If the file can't be read or parsed, this raises and the prompts
+    loaded before stay in use.
+    """
+    return _read_prompts()
 
-def get_system_prompt(mode: ConversationMode) -> str:
-    """Get the appropriate system prompt based on conversation mode"""
-    prompts = load_prompts()
+def _read_prompts() -> Dict[str, Any]:
+    """Parse and compile the prompts file, swapping it in only once both succeed"""
+    global _prompts_cache, _prompts_mtime, _system_prompts
     
-    base_prompt = prompts.get('base_prompt', '')
+    prompts_file = _prompts_file()
+    mtime = prompts_file.stat().st_mtime
     
-    # Map conversation modes to prompt keys
-    mode_mapping = {
-        ConversationMode.LEARNING: 'learning',
-        ConversationMode.EXPLANATORY: 'explanatory',
-        ConversationMode.STORY: 'story',
-        ConversationMode.DISCOVERY: 'discovery'
-    }
+    with open(prompts_file, 'r', encoding='utf-8') as file:
+        prompts = yaml.safe_load(file)
+    system_prompts = _compile_system_prompts(prompts)
     
-    mode_key = mode_mapping.get(mode, 'discovery')
-    mode_config = prompts.get('modes', {}).get(mode_key, {})
-    mode_prompt = mode_config.get('prompt', '')
+    _system_prompts = system_prompts
+    _prompts_cache = prompts
+    _prompts_mtime = mtime
+    
+    return _prompts_cache
+
+def reload_prompts_if_changed() -> bool:
+    """Reload and recompile prompts if the file's mtime changed; return whether it did"""
+    try:
+        mtime = _prompts_file().stat().st_mtime
+    except FileNotFoundError:
+        return False
+    
+    if _prompts_cache is not None and mtime == _prompts_mtime:
+        return False
     
-    return base_prompt + "\n\n" + mode_prompt
+    reload_prompts()
+    return True
+
+async def watch_prompts(
+    interval_seconds: float,
+    on_change: Optional[Callable[[], Awaitable[None]]] = None
+):
+    """Poll the prompts file and recompile when it changes (hot reload without per-request reads)"""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            if reload_prompts_if_changed():
+                logger.info("Reloaded prompts.yaml")
+                if on_change:
+                    await on_change()
+        except Exception as e:
+            # Keep serving the last good prompts (e.g. while the file is mid-edit)
+            logger.error(f"Failed to reload prompts: {str(e)}")
+
+def _compile_system_prompts(prompts: Dict[str, Any]) -> Dict[ConversationMode, str]:
+    base_prompt = prompts.get('base_prompt', '')
+    modes = prompts.get('modes', {})
+    
+    return {
+        mode: base_prompt + "\n\n" + modes.get(mode_key, {}).get('prompt', '')
+        for mode, mode_key in MODE_KEYS.items()
+    }
+
+def get_system_prompt(mode: ConversationMode) -> str:
+    """Get the appropriate system prompt based on conversation mode"""
+    load_prompts()
+    return _system_prompts.get(mode) or _system_prompts[ConversationMode.DISCOVERY]
 
 def get_activity_prompt() -> str:
     """Get prompt for generating TODO activities"""
     prompts = load_prompts()
     return prompts.get('activity_prompt', '')
 
+def get_summary_prompt() -> str:
+    """Get prompt for summarizing turns that fall out of the context window"""
+    prompts = load_prompts()
+    return prompts.get('summary_prompt', '')
+
 def get_mode_info(mode: ConversationMode) -> Dict[str, str]:
     """Get mode name and description for a given conversation mode"""
     prompts = load_prompts()
     
-    mode_mapping = {
-        ConversationMode.LEARNING: 'learning',
-        ConversationMode.EXPLANATORY: 'explanatory',
-        ConversationMode.STORY: 'story',
-        ConversationMode.DISCOVERY: 'discovery'
-    }
-    
-    mode_key = mode_mapping.get(mode, 'discovery')
+    mode_key = MODE_KEYS.get(mode, 'discovery')
     mode_config = prompts.get('modes', {}).get(mode_key, {})
     
     return {
@@ -107,24 +160,3 @@ def get_mode_prompt(mode_key: str) -> str:
     mode_config = prompts.get('modes', {}).get(mode_key, {})
     return mode_config.get('prompt', '')
 
-# For development: Hot reload capability
-if os.getenv('DEBUG') == 'true':
-    # In debug mode, reload prompts on each access
-    def get_system_prompt(mode: ConversationMode) -> str:
-        reload_prompts()  # Reload in debug mode
-        prompts = load_prompts()
-        
-        base_prompt = prompts.get('base_prompt', '')
-        
-        mode_mapping = {
-            ConversationMode.LEARNING: 'learning',
-            ConversationMode.EXPLANATORY: 'explanatory',
-            ConversationMode.STORY: 'story',
-            ConversationMode.DISCOVERY: 'discovery'
-        }
-        
-        mode_key = mode_mapping.get(mode, 'discovery')
-        mode_config = prompts.get('modes', {}).get(mode_key, {})
-        mode_prompt = mode_config.get('prompt', '')
-        
-        return base_prompt + "\n\n" + mode_prompt
\ No newline at end of file
@@ -0,0 +1,175 @@
+"""
+Live per-provider latency, hedging counters and circuit breakers
+"""
+
+import logging
+import math
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyWindow:
+    """Rolling window of recent successful call latencies"""
+    
+    def __init__(self, size: int = 200, min_samples: int = 20):
+        self.samples: Deque[float] = deque(maxlen=size)
+        self.min_samples = min_samples
+    
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+    
+    def percentile(self, q: float) -> Optional[float]:
+        """Latency at quantile `q` (0-1), or None until there are enough samples"""
+        if len(self.samples) < self.min_samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1)]
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'samples': len(self.samples),
+            'p50': self.percentile(0.5),
+            'p95': self.percentile(0.95)
+        }
+
+
+class HedgeStats:
+    """How often hedged requests fire and which provider wins"""
+    
+    def __init__(self):
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.primary_wins = 0
+        self.failures = 0
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'requests': self.requests,
+            'hedged': self.hedged,
+            'hedge_wins': self.hedge_wins,
+            'primary_wins': self.primary_wins,
+            'failures': self.failures,
+            'hedge_rate': round(self.hedged / self.requests, 3) if self.requests else 0.0,
+            'hedge_win_rate': round(self.hedge_wins / self.hedged, 3) if self.hedged else 0.0
+        }
+
+
+class CircuitBreaker:
+    """Per-provider circuit breaker fed by live call outcomes
+    
+    Tracks an EWMA of the error rate and of latency. The circuit opens when
+    the error rate or the recent p95 latency crosses its threshold; while open
+    the router sends traffic to the other provider. After a cooldown a single
+    probe request is let through: success closes the circuit, failure reopens
+    it for another cooldown.
+    """
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    
+    def __init__(
+        self,
+        name: str,
+        latency: LatencyWindow,
+        error_threshold: float,
+        latency_threshold: float,
+        cooldown_seconds: float,
+        alpha: float = 0.2,
+        min_calls: int = 5
+    ):
+        self.name = name
+        self.latency = latency
+        self.error_threshold = error_threshold
+        self.latency_threshold = latency_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.alpha = alpha
+        self.min_calls = min_calls
+        
+        self.state = self.CLOSED
+        self.error_rate = 0.0
+        self.ewma_latency: Optional[float] = None
+        self.calls = 0
+        self.trips = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.last_trip_reason: Optional[str] = None
+        self.last_success_at: Optional[float] = None
+    
+    def allow_request(self) -> bool:
+        """Whether to route a request here; doesn't claim the half-open probe slot (see `call`)"""
+        if self.state == self.CLOSED:
+            return True
+        
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.cooldown_seconds:
+            self.state = self.HALF_OPEN
+            self.probe_in_flight = False
+        
+        return self.state == self.HALF_OPEN and not self.probe_in_flight
+    
+    @contextmanager
+    def call(self) -> Iterator[None]:
+        """Wrap one provider call; when half-open, it holds the probe slot until it ends
+        
+        The slot is released however the call ends, including cancellation,
+        so an abandoned probe can't leave the provider half-open forever.
+        """
+        probing = self.state == self.HALF_OPEN and not self.probe_in_flight
+        if probing:
+            self.probe_in_flight = True
+        try:
+            yield
+        finally:
+            if probing and self.state == self.HALF_OPEN:
+                self.probe_in_flight = False
+    
+    def record_success(self, seconds: float):
+        self.calls += 1
+        self.last_success_at = time.monotonic()
+        self.error_rate *= (1 - self.alpha)
+        self.ewma_latency = seconds if self.ewma_latency is None else (
+            self.alpha * seconds + (1 - self.alpha) * self.ewma_latency
+        )
+        
+        if self.state == self.HALF_OPEN:
+            # Recovered: forget the history that tripped the circuit
+            self.state = self.CLOSED
+            self.error_rate = 0.0
+            self.latency.samples.clear()
+            self.probe_in_flight = False
+            logger.info(f"Circuit for {self.name} closed after a successful probe")
+        elif self.state == self.CLOSED:
+            p95 = self.latency.percentile(0.95)
+            if p95 is not None and p95 >= self.latency_threshold:
+                self._trip(f"p95 latency {p95:.1f}s")
+    
+    def record_failure(self):
+        self.calls += 1
+        self.error_rate = self.alpha + (1 - self.alpha) * self.error_rate
+        
+        if self.state == self.HALF_OPEN:
+            self._trip("probe failed")
+        elif self.state == self.CLOSED and self.calls >= self.min_calls and self.error_rate >= self.error_threshold:
+            self._trip(f"error rate {self.error_rate:.2f}")
+    
+    def _trip(self, reason: str):
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+        self.probe_in_flight = False
+        self.trips += 1
+        self.last_trip_reason = reason
+        logger.warning(f"Circuit for {self.name} opened ({reason}); retrying in {self.cooldown_seconds}s")
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'state': self.state,
+            'error_rate': round(self.error_rate, 3),
+            'ewma_latency': round(self.ewma_latency, 3) if self.ewma_latency is not None else None,
+            'trips': self.trips,
+            'last_trip_reason': self.last_trip_reason
+        }
@@ -0,0 +1,136 @@
+"""
+Response cache for repeated opening questions
+"""
+
+import hashlib
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+from app.models import AIProvider, ChatMessage, ConversationMode
+
+_NOT_WORD = re.compile(r"[^\w\s]")
+
+
+class ResponseKey(NamedTuple):
+    text: str
+    mode: ConversationMode
+    topic: Optional[str]
+    history: str
+
+
+class CachedResponse(NamedTuple):
+    response: str
+    provider: AIProvider
+
+
+def normalize_message(message: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace"""
+    return " ".join(_NOT_WORD.sub("", message.lower()).split())
+
+
+def history_fingerprint(messages: List[ChatMessage]) -> str:
+    """Short stable digest of the turns before the current message"""
+    digest = hashlib.sha1()
+    for message in messages:
+        digest.update(f"{message.role}:{normalize_message(message.content)}\n".encode())
+    return digest.hexdigest()[:16]
+
+
+def trigrams(text: str) -> FrozenSet[str]:
+    padded = f" {text} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+class ResponseCache:
+    """LRU + TTL cache of generated replies
+    
+    Entries are keyed on the normalized message, mode, topic and a fingerprint
+    of the preceding turns. With a similarity threshold, a miss falls back to
+    the most similar message (trigram Jaccard) under the same mode, topic and
+    history, so "how does light travel" and "how does the light travel?"
+    share an answer.
+    """
+    
+    def __init__(self, max_entries: int, ttl_seconds: float, similarity_threshold: float = 0.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.entries: "OrderedDict[ResponseKey, Tuple[float, CachedResponse]]" = OrderedDict()
+        # (mode, topic, history) -> {normalized text: trigrams}, for near-duplicate lookups
+        self.index: Dict[Tuple, Dict[str, FrozenSet[str]]] = {}
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+    
+    def get(self, key: ResponseKey) -> Optional[CachedResponse]:
+        value = self._lookup(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        
+        if self.similarity_threshold > 0:
+            similar = self._most_similar(key)
+            if similar is not None:
+                value = self._lookup(similar)
+                if value is not None:
+                    self.near_hits += 1
+                    return value
+        
+        self.misses += 1
+        return None
+    
+    def put(self, key: ResponseKey, value: CachedResponse):
+        if key in self.entries:
+            self.entries.move_to_end(key)
+        elif len(self.entries) >= self.max_entries:
+            self._remove(next(iter(self.entries)))
+        
+        self.entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        if self.similarity_threshold > 0:
+            self.index.setdefault(key[1:], {})[key.text] = trigrams(key.text)
+    
+    def _lookup(self, key: ResponseKey) -> Optional[CachedResponse]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            self._remove(key)
+            return None
+        
+        self.entries.move_to_end(key)
+        return value
+    
+    def _most_similar(self, key: ResponseKey) -> Optional[ResponseKey]:
+        candidates = self.index.get(key[1:])
+        if not candidates:
+            return None
+        
+        grams = trigrams(key.text)
+        best, best_score = None, self.similarity_threshold
+        for text, other in candidates.items():
+            score = len(grams & other) / len(grams | other)
+            if score >= best_score:
+                best, best_score = text, score
+        
+        return key._replace(text=best) if best is not None else None
+    
+    def _remove(self, key: ResponseKey):
+        self.entries.pop(key, None)
+        bucket = self.index.get(key[1:])
+        if bucket is not None:
+            bucket.pop(key.text, None)
+            if not bucket:
+                del self.index[key[1:]]
+    
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.near_hits + self.misses
+        return {
+            'entries': len(self.entries),
+            'hits': self.hits,
+            'near_hits': self.near_hits,
+            'misses': self.misses,
+            'hit_rate': round((self.hits + self.near_hits) / lookups, 3) if lookups else 0.0
+        }
@@ -0,0 +1,51 @@
+"""
+Incremental per-session aggregates used for routing and session summaries
+"""
+
+from typing import List, Optional
+from app.keyword_matcher import KeywordMatcher
+from app.models import ChatMessage, SessionStats
+from app.token_budget import SESSION_ESTIMATOR
+
+# Student phrases that push mode selection towards explanations
+CONFUSION_KEYWORDS = ["confused", "don't understand"]
+# How many recent messages a confused message keeps influencing
+CONFUSION_WINDOW = 5
+
+_confusion_matcher = KeywordMatcher({"confusion": CONFUSION_KEYWORDS})
+
+
+def record_message(stats: SessionStats, message: ChatMessage):
+    """Fold one appended message into the aggregates"""
+    if message.role == "user" and _confusion_matcher.find(message.content):
+        stats.confusion_count += 1
+        stats.last_confusion_at = stats.messages_seen
+    if message.role != "system":
+        stats.tokens_seen += SESSION_ESTIMATOR.count_message(message)
+    if message.provider:
+        stats.provider_counts[message.provider.value] = stats.provider_counts.get(message.provider.value, 0) + 1
+    if message.mode:
+        stats.mode_counts[message.mode.value] = stats.mode_counts.get(message.mode.value, 0) + 1
+    stats.messages_seen += 1
+
+
+def record_topic(stats: SessionStats, topic: Optional[str]):
+    if topic and (not stats.topics or stats.topics[-1] != topic):
+        stats.topics.append(topic)
+
+
+def recently_confused(stats: SessionStats) -> bool:
+    """Whether a confused student message is among the last CONFUSION_WINDOW messages"""
+    return (
+        stats.last_confusion_at is not None
+        and stats.messages_seen - stats.last_confusion_at <= CONFUSION_WINDOW
+    )
+
+
+def build_stats(messages: List[ChatMessage], current_topic: Optional[str] = None) -> SessionStats:
+    """Aggregates for sessions stored before they were tracked (trimmed messages are lost)"""
+    stats = SessionStats()
+    for message in messages:
+        record_message(stats, message)
+    record_topic(stats, current_topic)
+    return stats
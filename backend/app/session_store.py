@@ -0,0 +1,453 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+from datetime import datetime
+import heapq
+import json
+import logging
+import time
+from app.models import SessionData, SessionStats, ChatMessage, CompactMessage
+from app.config import settings
+from app.token_budget import SESSION_ESTIMATOR, count_session_tokens
+from app.session_signals import build_stats, record_message, record_topic
+
+logger = logging.getLogger(__name__)
+
+
+class SessionStore(ABC):
+    """Storage backend for conversation sessions"""
+    
+    @abstractmethod
+    async def load(self, session_id: str) -> Optional[SessionData]:
+        """Load a live session, or None if missing or expired"""
+    
+    @abstractmethod
+    async def create(self, session: SessionData) -> bool:
+        """Store a new session; return False, leaving it untouched, if one with its ID already exists"""
+    
+    @abstractmethod
+    async def append_message(self, session: SessionData, message: Union[CompactMessage, ChatMessage], max_messages: int):
+        """Append a message to the session, keeping at most `max_messages`
+        
+        Also applies the append to the given session object so callers see it.
+        """
+    
+    @abstractmethod
+    async def save_metadata(self, session: SessionData, updates: Dict[str, Any]):
+        """Merge `updates` into the session's metadata, persisting it with its topic and last activity
+        
+        Never rewrites messages or running counts. Also applies the update to
+        the given session object so callers see it.
+        """
+    
+    @abstractmethod
+    async def touch(self, session: SessionData):
+        """Record activity and push back the session's expiry"""
+    
+    @abstractmethod
+    async def delete(self, session_id: str) -> bool:
+        """Delete a session, returning whether it existed"""
+    
+    @abstractmethod
+    async def session_ids(self) -> List[str]:
+        """IDs of all live sessions"""
+    
+    @abstractmethod
+    async def count(self) -> int:
+        """Number of live sessions"""
+    
+    @abstractmethod
+    async def clear(self) -> int:
+        """Delete all sessions, returning how many were removed"""
+    
+    async def close(self):
+        """Release backend resources"""
+    
+    @staticmethod
+    def _append(session: SessionData, message: Union[CompactMessage, ChatMessage], max_messages: int) -> bool:
+        """Append a message, updating the running token count and stats; return whether history was trimmed"""
+        message = CompactMessage.of(message)
+        session.messages.append(message)
+        if message.role != "system":
+            session.token_count += SESSION_ESTIMATOR.count_message(message)
+        record_message(session.stats, message)
+        return SessionStore._trim(session, max_messages)
+    
+    @staticmethod
+    def _apply_metadata(session: SessionData, updates: Dict[str, Any]):
+        """Merge metadata updates; a `current_topic` key also sets the topic and records it in the stats"""
+        session.metadata.update(updates)
+        if 'current_topic' in updates:
+            session.current_topic = updates['current_topic']
+            record_topic(session.stats, session.current_topic)
+    
+    @staticmethod
+    def _trim(session: SessionData, max_messages: int) -> bool:
+        """Trim old non-system messages beyond `max_messages`; return whether any were dropped"""
+        messages = session.messages
+        excess = len(messages) - max_messages
+        if excess <= 0:
+            return False
+        
+        # At the cap each append drops one message, so only scan up to the
+        # oldest non-system messages and delete those in place
+        dropped = []
+        for index, message in enumerate(messages):
+            if message.role != "system":
+                dropped.append(index)
+                if len(dropped) == excess:
+                    break
+        
+        for index in reversed(dropped):
+            session.token_count -= SESSION_ESTIMATOR.count_message(messages[index])
+            del messages[index]
+        return True
+
+
+class InMemorySessionStore(SessionStore):
+    """Process-local session storage (single worker only)"""
+    
+    def __init__(self, ttl_minutes: int):
+        self.ttl_seconds = ttl_minutes * 60
+        self.sessions: Dict[str, SessionData] = {}
+        self.session_expiry: Dict[str, float] = {}
+        # Min-heap of (expiry, session_id) with at most one entry per session.
+        # Touches only update session_expiry; a popped entry whose session was
+        # touched since is pushed back at its real expiry.
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._queued: Set[str] = set()
+    
+    async def load(self, session_id: str) -> Optional[SessionData]:
+        self._cleanup_expired_sessions()
+        return self.sessions.get(session_id)
+    
+    async def create(self, session: SessionData) -> bool:
+        self._cleanup_expired_sessions()
+        if session.session_id in self.sessions:
+            return False
+        self.sessions[session.session_id] = session
+        self._update_session_expiry(session.session_id)
+        return True
+    
+    async def append_message(self, session: SessionData, message: Union[CompactMessage, ChatMessage], max_messages: int):
+        if self._append(session, message, max_messages):
+            logger.debug(f"Trimmed session {session.session_id} to max length")
+        self.sessions[session.session_id] = session
+        self._update_session_expiry(session.session_id)
+    
+    async def save_metadata(self, session: SessionData, updates: Dict[str, Any]):
+        self._apply_metadata(session, updates)
+        self.sessions[session.session_id] = session
+        self._update_session_expiry(session.session_id)
+    
+    async def touch(self, session: SessionData):
+        self._update_session_expiry(session.session_id)
+    
+    async def delete(self, session_id: str) -> bool:
+        if session_id in self.sessions:
+            del self.sessions[session_id]
+            self.session_expiry.pop(session_id, None)
+            return True
+        return False
+    
+    async def session_ids(self) -> List[str]:
+        self._cleanup_expired_sessions()
+        return list(self.sessions)
+    
+    async def count(self) -> int:
+        self._cleanup_expired_sessions()
+        return len(self.sessions)
+    
+    async def clear(self) -> int:
+        count = len(self.sessions)
+        self.sessions.clear()
+        self.session_expiry.clear()
+        self._expiry_heap.clear()
+        self._queued.clear()
+        return count
+    
+    def _update_session_expiry(self, session_id: str):
+        """Update session expiry time"""
+        expiry = time.monotonic() + self.ttl_seconds
+        self.session_expiry[session_id] = expiry
+        if session_id not in self._queued:
+            heapq.heappush(self._expiry_heap, (expiry, session_id))
+            self._queued.add(session_id)
+    
+    def _cleanup_expired_sessions(self):
+        """Remove expired sessions
+        
+        O(1) when nothing has expired (a peek at the heap minimum); otherwise
+        O(log n) per expired or re-queued entry.
+        """
+        current_time = time.monotonic()
+        expired_sessions = 0
+        
+        while self._expiry_heap and self._expiry_heap[0][0] <= current_time:
+            _, session_id = heapq.heappop(self._expiry_heap)
+            expiry_time = self.session_expiry.get(session_id)
+            
+            if expiry_time is None:
+                # Deleted since it was queued
+                self._queued.discard(session_id)
+            elif expiry_time > current_time:
+                # Touched since it was queued
+                heapq.heappush(self._expiry_heap, (expiry_time, session_id))
+            else:
+                self._queued.discard(session_id)
+                del self.sessions[session_id]
+                del self.session_expiry[session_id]
+                expired_sessions += 1
+                logger.info(f"Cleaned up expired session: {session_id}")
+        
+        if expired_sessions:
+            logger.info(f"Cleaned up {expired_sessions} expired sessions")
+
+
+class RedisSessionStore(SessionStore):
+    """Redis-backed session storage shared by all workers and replicas
+    
+    Each session is a hash of its metadata plus an append-only list of
+    JSON-encoded messages. Both keys carry a native TTL that is refreshed on
+    every access, so Redis expires idle sessions itself. A sorted set of
+    session IDs scored by expiry time supports counting and listing.
+    
+    Creates and appends are optimistic WATCH/MULTI transactions, so workers
+    racing on one session neither wipe each other's history nor overwrite
+    each other's running token count and stats.
+    """
+    
+    def __init__(self, client, ttl_minutes: int, key_prefix: str = "maple:"):
+        self.client = client
+        self.ttl_seconds = ttl_minutes * 60
+        self.key_prefix = key_prefix
+        self.index_key = f"{key_prefix}sessions"
+    
+    @classmethod
+    def from_url(cls, url: str, ttl_minutes: int, key_prefix: str = "maple:") -> "RedisSessionStore":
+        """Connect to Redis (requires the optional `redis` package)"""
+        try:
+            import redis.asyncio as aioredis
+        except ImportError:
+            raise RuntimeError("SESSION_STORE=redis requires the 'redis' package: pip install redis")
+        
+        return cls(aioredis.from_url(url, decode_responses=True), ttl_minutes, key_prefix)
+    
+    def _meta_key(self, session_id: str) -> str:
+        return f"{self.key_prefix}session:{session_id}:meta"
+    
+    def _messages_key(self, session_id: str) -> str:
+        return f"{self.key_prefix}session:{session_id}:messages"
+    
+    async def load(self, session_id: str) -> Optional[SessionData]:
+        pipe = self.client.pipeline(transaction=False)
+        pipe.hgetall(self._meta_key(session_id))
+        pipe.lrange(self._messages_key(session_id), 0, -1)
+        meta, messages = await pipe.execute()
+        return self._parse(session_id, meta, messages)
+    
+    @staticmethod
+    def _parse(session_id: str, meta: Dict[str, str], messages: List[str]) -> Optional[SessionData]:
+        if 'created_at' not in meta:
+            # Missing, or only a stray last_activity written as the session expired
+            return None
+        
+        messages = [CompactMessage.of(ChatMessage.model_validate_json(m)) for m in messages]
+        current_topic = meta.get('current_topic') or None
+        return SessionData(
+            session_id=session_id,
+            messages=messages,
+            created_at=datetime.fromisoformat(meta['created_at']),
+            last_activity=datetime.fromisoformat(meta['last_activity']),
+            current_topic=current_topic,
+            student_level=meta.get('student_level') or None,
+            metadata=json.loads(meta.get('metadata') or '{}'),
+            token_count=int(meta['token_count']) if 'token_count' in meta else count_session_tokens(messages),
+            stats=(
+                SessionStats.model_validate_json(meta['stats']) if 'stats' in meta
+                else build_stats(messages, current_topic)
+            )
+        )
+    
+    async def create(self, session: SessionData) -> bool:
+        from redis.exceptions import WatchError
+        
+        meta_key, messages_key = self._meta_key(session.session_id), self._messages_key(session.session_id)
+        async with self.client.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    await pipe.watch(meta_key)
+                    if await pipe.hexists(meta_key, 'created_at'):
+                        # Another worker created it first; its history must survive
+                        await pipe.unwatch()
+                        return False
+                    
+                    pipe.multi()
+                    # Only a leftover list without a session can be here
+                    pipe.delete(messages_key)
+                    if session.messages:
+                        pipe.rpush(messages_key, *[m.model_dump_json() for m in session.messages])
+                    self._queue_metadata(pipe, session)
+                    self._queue_expiry(pipe, session.session_id)
+                    await pipe.execute()
+                    return True
+                except WatchError:
+                    continue
+    
+    async def append_message(self, session: SessionData, message: Union[CompactMessage, ChatMessage], max_messages: int):
+        from redis.exceptions import WatchError
+        
+        message = CompactMessage.of(message)
+        meta_key, messages_key = self._meta_key(session.session_id), self._messages_key(session.session_id)
+        # Stats count every message appended, so they differ once any other append lands
+        loaded_stats = session.stats.model_dump_json()
+        async with self.client.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    await pipe.watch(meta_key, messages_key)
+                    base = session
+                    stored_stats = await pipe.hget(meta_key, 'stats')
+                    if stored_stats is not None and stored_stats != loaded_stats:
+                        # Another worker appended since `session` was loaded: build on the stored history
+                        stored = self._parse(
+                            session.session_id, await pipe.hgetall(meta_key), await pipe.lrange(messages_key, 0, -1)
+                        )
+                        base = stored or session
+                    
+                    # Work on a copy so a retried transaction starts from a clean state
+                    updated = base.model_copy(update={
+                        'messages': list(base.messages),
+                        'stats': base.stats.model_copy(deep=True),
+                        'last_activity': session.last_activity
+                    })
+                    trimmed = self._append(updated, message, max_messages)
+                    
+                    pipe.multi()
+                    if trimmed and any(m.role == "system" for m in updated.messages):
+                        # Trimming must keep system messages, which LTRIM can't express: rewrite the list
+                        pipe.delete(messages_key)
+                        pipe.rpush(messages_key, *[m.model_dump_json() for m in updated.messages])
+                    else:
+                        pipe.rpush(messages_key, message.model_dump_json())
+                        pipe.ltrim(messages_key, -max_messages, -1)
+                    pipe.hset(meta_key, mapping={
+                        'last_activity': updated.last_activity.isoformat(),
+                        'token_count': updated.token_count,
+                        'stats': updated.stats.model_dump_json()
+                    })
+                    self._queue_expiry(pipe, session.session_id)
+                    await pipe.execute()
+                    break
+                except WatchError:
+                    continue
+        
+        for field in ('messages', 'token_count', 'stats', 'current_topic', 'student_level', 'metadata'):
+            setattr(session, field, getattr(updated, field))
+    
+    async def save_metadata(self, session: SessionData, updates: Dict[str, Any]):
+        from redis.exceptions import WatchError
+        
+        meta_key = self._meta_key(session.session_id)
+        async with self.client.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    await pipe.watch(meta_key)
+                    meta = await pipe.hgetall(meta_key)
+                    if 'created_at' not in meta:
+                        # Expired or deleted since it was loaded; don't resurrect part of it
+                        await pipe.unwatch()
+                        self._apply_metadata(session, updates)
+                        return
+                    
+                    # Apply the updates to what is stored now, not to the possibly stale `session`
+                    stored = session.model_copy(update={
+                        'metadata': json.loads(meta.get('metadata') or '{}'),
+                        'current_topic': meta.get('current_topic') or None,
+                        'stats': (
+                            SessionStats.model_validate_json(meta['stats']) if 'stats' in meta
+                            else session.stats.model_copy(deep=True)
+                        )
+                    })
+                    self._apply_metadata(stored, updates)
+                    fields = {
+                        'metadata': json.dumps(stored.metadata, default=str),
+                        'last_activity': session.last_activity.isoformat()
+                    }
+                    if 'current_topic' in updates:
+                        fields['current_topic'] = stored.current_topic or ''
+                        fields['stats'] = stored.stats.model_dump_json()
+                    
+                    pipe.multi()
+                    pipe.hset(meta_key, mapping=fields)
+                    self._queue_expiry(pipe, session.session_id)
+                    await pipe.execute()
+                    break
+                except WatchError:
+                    continue
+        
+        for field in ('metadata', 'current_topic', 'stats'):
+            setattr(session, field, getattr(stored, field))
+    
+    async def touch(self, session: SessionData):
+        pipe = self.client.pipeline(transaction=False)
+        pipe.hset(self._meta_key(session.session_id), 'last_activity', session.last_activity.isoformat())
+        self._queue_expiry(pipe, session.session_id)
+        await pipe.execute()
+    
+    async def delete(self, session_id: str) -> bool:
+        pipe = self.client.pipeline(transaction=True)
+        pipe.delete(self._meta_key(session_id), self._messages_key(session_id))
+        pipe.zrem(self.index_key, session_id)
+        deleted, _ = await pipe.execute()
+        return deleted > 0
+    
+    async def session_ids(self) -> List[str]:
+        await self._prune_index()
+        return list(await self.client.zrange(self.index_key, 0, -1))
+    
+    async def count(self) -> int:
+        await self._prune_index()
+        return await self.client.zcard(self.index_key)
+    
+    async def clear(self) -> int:
+        session_ids = await self.session_ids()
+        if session_ids:
+            keys = [k for sid in session_ids for k in (self._meta_key(sid), self._messages_key(sid))]
+            await self.client.delete(*keys)
+        await self.client.delete(self.index_key)
+        return len(session_ids)
+    
+    async def close(self):
+        await self.client.aclose()
+    
+    def _queue_metadata(self, pipe, session: SessionData):
+        """Every hash field of a new session (see `create`)"""
+        pipe.hset(self._meta_key(session.session_id), mapping={
+            'created_at': session.created_at.isoformat(),
+            'last_activity': session.last_activity.isoformat(),
+            'current_topic': session.current_topic or '',
+            'student_level': session.student_level or '',
+            'metadata': json.dumps(session.metadata, default=str),
+            'token_count': session.token_count,
+            'stats': session.stats.model_dump_json()
+        })
+    
+    def _queue_expiry(self, pipe, session_id: str):
+        pipe.expire(self._meta_key(session_id), self.ttl_seconds)
+        pipe.expire(self._messages_key(session_id), self.ttl_seconds)
+        pipe.zadd(self.index_key, {session_id: time.time() + self.ttl_seconds})
+    
+    async def _prune_index(self):
+        """Drop IDs whose keys Redis has already expired"""
+        await self.client.zremrangebyscore(self.index_key, '-inf', time.time())
+
+
+def create_session_store() -> SessionStore:
+    """Create the session store selected by `settings.session_store`"""
+    if settings.session_store.lower() == "redis":
+        return RedisSessionStore.from_url(
+            settings.redis_url,
+            ttl_minutes=settings.session_ttl_minutes,
+            key_prefix=settings.redis_key_prefix
+        )
+    
+    return InMemorySessionStore(ttl_minutes=settings.session_ttl_minutes)
@@ -0,0 +1,75 @@
+"""
+Token estimation and token-budget windowing of conversation history
+"""
+
+import math
+from typing import Dict, List, Optional
+from app.models import AIProvider, ChatMessage
+
+
+class TokenEstimator:
+    """Cheap character-based token estimate for one provider's tokenizer
+    
+    Neither SDK ships an offline tokenizer, so this errs slightly high:
+    overshooting only drops an extra old turn, undershooting could overflow
+    the prompt.
+    """
+    
+    def __init__(self, chars_per_token: float, message_overhead: int):
+        self.chars_per_token = chars_per_token
+        self.message_overhead = message_overhead
+    
+    def count_text(self, text: str) -> int:
+        return math.ceil(len(text) / self.chars_per_token)
+    
+    def count_message(self, message: ChatMessage) -> int:
+        return self.count_text(message.content) + self.message_overhead
+
+
+TOKEN_ESTIMATORS: Dict[AIProvider, TokenEstimator] = {
+    AIProvider.CLAUDE: TokenEstimator(chars_per_token=3.5, message_overhead=5),
+    AIProvider.OPENAI: TokenEstimator(chars_per_token=4.0, message_overhead=4)
+}
+
+# Used for the running count stored on each session; it never under-counts
+# relative to any single provider's estimate.
+SESSION_ESTIMATOR = TOKEN_ESTIMATORS[AIProvider.CLAUDE]
+
+
+def count_session_tokens(messages: List[ChatMessage]) -> int:
+    """Running-count estimate for a whole message list"""
+    return sum(SESSION_ESTIMATOR.count_message(m) for m in messages if m.role != "system")
+
+
+def window_messages(
+    messages: List[ChatMessage],
+    budget: int,
+    estimator: TokenEstimator,
+    total_tokens: Optional[int] = None
+) -> List[ChatMessage]:
+    """Newest messages whose estimated tokens fit in `budget`
+    
+    `total_tokens` is the session's running count; when it already fits,
+    the whole history is returned without walking it. Otherwise the walk
+    goes newest-first and stops at the budget, so its cost is bounded by the
+    window rather than the history. The latest message is always kept, and
+    the window never starts on an assistant turn.
+    """
+    if total_tokens is not None and total_tokens <= budget:
+        return messages
+    
+    used = 0
+    start = len(messages)
+    for i in range(len(messages) - 1, -1, -1):
+        message = messages[i]
+        if message.role == "system":
+            continue
+        used += estimator.count_message(message)
+        if used > budget and start < len(messages):
+            break
+        start = i
+    
+    while start < len(messages) - 1 and messages[start].role != "user":
+        start += 1
+    
+    return messages[start:]
@@ -0,0 +1,215 @@
+"""
+Lightweight request tracing with OpenTelemetry-shaped spans
+
+Spans nest through a context variable, so they follow a request across
+awaits and into tasks started with asyncio.gather. When a root span ends,
+its whole trace is handed to the configured exporter. Exported spans use
+OTLP/JSON field names (traceId, spanId, parentSpanId, startTimeUnixNano,
+endTimeUnixNano, attributes, status), so the file output can be replayed
+into an OpenTelemetry collector.
+"""
+
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncGenerator, AsyncIterator, Dict, Iterator, List, Optional, TypeVar
+from app.background_writer import BackgroundAppender
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class Trace:
+    """Finished spans of one request"""
+    
+    def __init__(self):
+        self.trace_id = os.urandom(16).hex()
+        self.spans: List["Span"] = []
+    
+    def timings(self) -> Dict[str, float]:
+        """Milliseconds per span name, summed over repeats (concurrent spans overlap)"""
+        timings: Dict[str, float] = {}
+        for span in self.spans:
+            timings[span.name] = round(timings.get(span.name, 0.0) + span.duration_ms, 2)
+        return timings
+
+
+class Span:
+    def __init__(self, name: str, trace: Trace, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.error: Optional[str] = None
+    
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+    
+    def end(self, error: Optional[str] = None):
+        """Finish the span, exporting its trace if it is the root"""
+        if error:
+            self.error = error
+        self.end_ns = time.time_ns()
+        self.trace.spans.append(self)
+        if self.parent_id is None and _exporter is not None:
+            _exporter.export(self.trace)
+    
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+    
+    def to_otlp(self) -> Dict[str, Any]:
+        return {
+            'traceId': self.trace.trace_id,
+            'spanId': self.span_id,
+            'parentSpanId': self.parent_id or '',
+            'name': self.name,
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns),
+            'attributes': [
+                {'key': key, 'value': _otlp_value(value)} for key, value in self.attributes.items()
+            ],
+            'status': {'code': 2, 'message': self.error} if self.error else {'code': 1}
+        }
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+class SpanExporter:
+    def export(self, trace: Trace):
+        """Hand off a finished trace; called on the event loop, so it must not block"""
+    
+    def flush(self):
+        """Block until every exported trace has been written"""
+
+
+class ConsoleSpanExporter(SpanExporter):
+    """One log line per trace with its stage timings"""
+    
+    def export(self, trace: Trace):
+        if logger.isEnabledFor(logging.DEBUG):
+            root = trace.spans[-1]
+            stages = ", ".join(f"{name}={ms:.1f}ms" for name, ms in trace.timings().items())
+            logger.debug(f"trace {trace.trace_id} {root.name} {root.duration_ms:.1f}ms: {stages}")
+
+
+class FileSpanExporter(SpanExporter):
+    """Appends spans as OTLP/JSON lines
+    
+    Traces are queued and written in batches by a background thread, so
+    requests never wait on disk I/O.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.appender = BackgroundAppender(path, render=_otlp_lines)
+    
+    def export(self, trace: Trace):
+        self.appender.append(trace)
+    
+    def flush(self):
+        self.appender.flush()
+
+
+def _otlp_lines(trace: Trace) -> str:
+    return "".join(json.dumps(span.to_otlp()) + "\n" for span in trace.spans)
+
+
+def create_exporter() -> Optional[SpanExporter]:
+    """Exporter selected by `settings.tracing_exporter` (console, file or none)"""
+    exporter = settings.tracing_exporter.lower()
+    if exporter == "file":
+        return FileSpanExporter(settings.tracing_file)
+    if exporter == "console":
+        return ConsoleSpanExporter()
+    return None
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+_exporter: Optional[SpanExporter] = create_exporter()
+
+
+def set_exporter(exporter: Optional[SpanExporter]):
+    global _exporter
+    _exporter = exporter
+
+
+def flush_exporter():
+    """Block until the configured exporter has written every finished trace"""
+    if _exporter is not None:
+        _exporter.flush()
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def start_span(name: str, parent: Optional[Span] = None, **attributes: Any) -> Span:
+    """Open a span without making it current; finish it with `Span.end()`
+    
+    For spans that stay open across an async generator's `yield`, where
+    `span()` can't be used. `use_span` parents other spans under it.
+    """
+    return Span(name, parent.trace if parent else Trace(), parent, attributes)
+
+
+@contextmanager
+def use_span(active: Span) -> Iterator[Span]:
+    """Make an open span the current one for a block, without ending it"""
+    token = _current_span.set(active)
+    try:
+        yield active
+    finally:
+        _current_span.reset(token)
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span]:
+    """Time a block as a span, a child of the current span if there is one
+    
+    Only use around code that doesn't yield to a caller (not across an async
+    generator's `yield`): the span is tied to the context it was entered in.
+    """
+    new_span = start_span(name, _current_span.get(), **attributes)
+    try:
+        with use_span(new_span):
+            yield new_span
+    except BaseException as e:
+        new_span.error = str(e) or type(e).__name__
+        raise
+    finally:
+        new_span.end()
+
+
+async def iterate_in_span(iterator: AsyncGenerator[T, None], parent: Span) -> AsyncIterator[T]:
+    """Step an async generator with `parent` as the current span
+    
+    Each step runs under `parent`, so spans the generator opens between its
+    yields nest in the trace even though the consumer yields in between.
+    """
+    try:
+        while True:
+            with use_span(parent):
+                try:
+                    item = await iterator.__anext__()
+                except StopAsyncIteration:
+                    return
+            yield item
+    finally:
+        await iterator.aclose()
@@ -0,0 +1,3 @@
+"""
+Offline benchmarks for the AI Tutor backend (run from the backend directory)
+"""
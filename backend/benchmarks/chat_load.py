@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Load benchmark: concurrent student conversations against the whole FastAPI app.
+
+The app runs in-process behind httpx's ASGI transport, with the real provider
+SDK clients talking to the local fake LLM server and AirtableService reading
+from a fake pyairtable client. Latency, jitter and error rate are configurable
+and seeded, so runs are reproducible. Each student works through a short
+scripted conversation on /api/chat/message, one turn at a time.
+
+Reports end-to-end p50/p95/p99 latency, requests per second, failed turns and
+memory per stored session, and compares them with a baseline file.
+
+Usage (from the backend directory):
+    python -m benchmarks.chat_load --students 50 --turns 6
+    python -m benchmarks.chat_load --save-baseline     # record benchmarks/baseline.json
+"""
+
+import argparse
+import asyncio
+import copy
+import json
+import logging
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from app.config import settings
+from benchmarks.fake_airtable import FakeAirtableApi
+from benchmarks.fake_llm_server import run_fake_llm_server
+
+BASELINE_FILE = Path(__file__).with_name("baseline.json")
+
+# Scripted conversations, cycled across students; they cover every mode and topic
+CONVERSATIONS = [
+    ["How does light travel?", "Why do shadows change during the day?", "I don't understand refraction",
+     "Can you explain it simpler?", "What if there was no sun?", "Tell me a story about a prism"],
+    ["What is an echo?", "Why can bats hear echoes?", "I'm confused about pitch",
+     "Show me an example", "How loud is thunder?", "What makes sound travel faster?"],
+    ["Tell me a story about a beaver building a dam", "Why are dams strong?", "What makes a bridge strong?",
+     "Can you clarify what a load is?", "Imagine a bridge made of paper", "How do engineers test structures?"],
+    ["What animals live in the Arctic?", "How do polar bears survive the cold?", "What is a habitat?",
+     "I'm stuck on adaptations", "Why do geese fly south?", "What if the ice melted?"],
+    ["How are rocks made?", "What is a fossil?", "Why do rocks have layers?",
+     "Explain erosion", "Pretend you're a pebble in a river", "Where can I find fossils in Canada?"],
+    ["What is a pulley?", "How does a lever help me lift things?", "I don't understand gears",
+     "Can you explain with a bike?", "Why is a ramp easier?", "Tell a story about a crane"],
+]
+
+# Higher is better for these; lower is better for the rest
+HIGHER_IS_BETTER = {"requests_per_second"}
+
+
+def configure(base_url: str, airtable_latency: float):
+    """Point the app at the fakes; must run before app.main is imported"""
+    import app.airtable_service as airtable_module
+    
+    settings.claude_api_key = "fake-key"
+    settings.openai_api_key = "fake-key"
+    settings.claude_base_url = base_url
+    settings.openai_base_url = f"{base_url}/v1"
+    settings.airtable_api_key = "fake-key"
+    settings.airtable_base_id = "fake-base"
+    settings.content_provider = "airtable"
+    settings.session_store = "memory"
+    settings.tracing_exporter = "none"
+    settings.health_probe_interval_seconds = 0
+    settings.prompts_watch_interval_seconds = 0
+    
+    FakeAirtableApi.latency = airtable_latency
+    airtable_module.Api = FakeAirtableApi
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+def scripted_students(students: int, turns: int) -> Dict[str, List[str]]:
+    """Messages per session ID, cycling through the scripted conversations"""
+    scripts = {}
+    for index in range(students):
+        conversation = CONVERSATIONS[index % len(CONVERSATIONS)]
+        scripts[f"student-{index}"] = [conversation[turn % len(conversation)] for turn in range(turns)]
+    return scripts
+
+
+async def run_load(scripts: Dict[str, List[str]], runs: int) -> List[Dict[str, Any]]:
+    """Start the app, run every script `runs` times over fresh sessions, and shut it down"""
+    from app import main
+    from app.tracing import set_exporter
+    
+    set_exporter(None)
+    # app.main configures DEBUG logging; per-request lines would dominate the run
+    logging.getLogger().setLevel(logging.WARNING)
+    await main.startup_event()
+    results = []
+    for _ in range(runs):
+        await main.session_manager.store.clear()
+        results.append(await run_round(main, scripts))
+    await main.shutdown_event()
+    return results
+
+
+async def run_round(main, scripts: Dict[str, List[str]]) -> Dict[str, Any]:
+    """One pass of every student's conversation through the app, turns in order per student"""
+    latencies: List[float] = []
+    failures = 0
+    
+    async def student(session_id: str, messages: List[str], client: httpx.AsyncClient):
+        nonlocal failures
+        for message in messages:
+            started = time.perf_counter()
+            response = await client.post("/api/chat/message", json={
+                "session_id": session_id,
+                "message": message
+            })
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                failures += 1
+    
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://tutor", timeout=120) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(student(sid, messages, client) for sid, messages in scripts.items()))
+        elapsed = time.perf_counter() - started
+    
+    session_bytes = measure_session_bytes(main.session_manager.store.sessions)
+    
+    return {
+        "requests": len(latencies),
+        "failed": failures,
+        "requests_per_second": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 1),
+        "bytes_per_session": session_bytes // max(len(main.session_manager.store.sessions), 1)
+    }
+
+
+def median_result(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Per-metric median across runs, which damps scheduler noise"""
+    return {name: statistics.median(r[name] for r in results) for name in results[0]}
+
+
+def measure_session_bytes(sessions: Dict[str, Any]) -> int:
+    """Bytes allocated by a deep copy of the stored sessions"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    copied = copy.deepcopy(sessions)
+    allocated = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del copied
+    return allocated
+
+
+def compare(result: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Print each metric against the baseline; return the names that regressed beyond `tolerance`"""
+    regressions = []
+    print(f"{'metric':<22} {'baseline':>12} {'current':>12} {'change':>9}")
+    for name, value in result.items():
+        base = baseline.get(name)
+        if name == "failed":
+            # Any new failure is a regression, whatever the tolerance
+            flag = "  REGRESSION" if value > (base or 0) else ""
+            if flag:
+                regressions.append(name)
+            print(f"{name:<22} {base!s:>12} {value:>12} {'':>9}{flag}")
+            continue
+        if not isinstance(base, (int, float)) or not base:
+            print(f"{name:<22} {'-':>12} {value:>12}")
+            continue
+        
+        change = (value - base) / base
+        worse = -change if name in HIGHER_IS_BETTER else change
+        flag = "  REGRESSION" if worse > tolerance and name != "requests" else ""
+        if flag:
+            regressions.append(name)
+        print(f"{name:<22} {base:>12} {value:>12} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--students", type=int, default=50, help="Concurrent student conversations")
+    parser.add_argument("--turns", type=int, default=6, help="Messages per student")
+    parser.add_argument("--latency", type=float, default=0.3, help="Fake LLM latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.1, help="Fake LLM latency jitter in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fake LLM error rate (0-1)")
+    parser.add_argument("--airtable-latency", type=float, default=0.05, help="Fake Airtable query latency")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--runs", type=int, default=3, help="Repeat the load and report the median")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true", help="Write this run to the baseline file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed regression vs. baseline")
+    parser.add_argument("--record", type=Path, help="Also record the LLM calls to this cassette (see benchmarks.llm_replay)")
+    args = parser.parse_args(argv)
+    
+    with run_fake_llm_server(args.latency, jitter=args.jitter, error_rate=args.error_rate, seed=args.seed) as base_url:
+        configure(base_url, args.airtable_latency)
+        if args.record:
+            settings.llm_cassette_mode = "record"
+            settings.llm_cassette_path = str(args.record)
+        scripts = scripted_students(args.students, args.turns)
+        result = median_result(asyncio.run(run_load(scripts, args.runs)))
+    
+    config = {k: getattr(args, k) for k in ("students", "turns", "runs", "latency", "jitter", "error_rate", "airtable_latency", "seed")}
+    print(f"Config: {json.dumps(config)}")
+    
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps({"config": config, "result": result}, indent=2) + "\n")
+        print(json.dumps(result, indent=2))
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+    
+    if not args.baseline.exists():
+        print(json.dumps(result, indent=2))
+        return 0
+    
+    baseline = json.loads(args.baseline.read_text())
+    if baseline.get("config") != config:
+        print(f"Note: baseline was recorded with {json.dumps(baseline.get('config'))}")
+    regressions = compare(result, baseline["result"], args.tolerance)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
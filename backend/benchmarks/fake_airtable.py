@@ -0,0 +1,54 @@
+"""
+Stand-in for the pyairtable client with a fixed per-query latency, so the
+Airtable content provider can be benchmarked without an Airtable base.
+"""
+
+import time
+from typing import Any, Dict, List
+
+
+def _topic_from_formula(formula: str) -> str:
+    return formula.split("'")[1] if "'" in formula else "light"
+
+
+class FakeTable:
+    def __init__(self, name: str):
+        self.name = name
+    
+    def all(self, **kwargs) -> List[Dict[str, Any]]:
+        """Blocking, like pyairtable; AirtableService runs it in a worker thread"""
+        time.sleep(FakeAirtableApi.latency)
+        FakeAirtableApi.calls += 1
+        topic = _topic_from_formula(kwargs.get("formula", ""))
+        fields = {"Topic Name": topic.title()}
+        
+        if self.name == "Grade4_Science_Curriculum":
+            fields.update({
+                "Description": f"Grade 4 science: {topic}",
+                "Curriculum Expectation": f"Describe how {topic} works and find it in everyday life"
+            })
+        elif self.name == "Canadian_Examples":
+            fields.update({"Example Title": "Northern Lights", "Description": "Aurora over Yellowknife"})
+        else:
+            fields.update({"Activity Name": "Kitchen Science", "Instructions": f"Explore {topic} at home"})
+        return [{"id": f"rec-{self.name}-{topic}", "fields": fields}]
+
+
+class FakeAirtableApi:
+    """Drop-in for `pyairtable.Api`; set `latency` (seconds per query) before use
+    
+    Settings and counters are class attributes because AirtableService
+    constructs its own instance.
+    """
+    
+    latency = 0.05
+    calls = 0
+    
+    def __init__(self, api_key: str):
+        self.api_key = api_key
+    
+    def base(self, base_id: str) -> "FakeAirtableApi":
+        return self
+    
+    def table(self, name: str) -> FakeTable:
+        return FakeTable(name)
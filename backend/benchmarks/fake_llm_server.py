@@ -0,0 +1,183 @@
+"""
+Local fake LLM server speaking the Anthropic Messages and OpenAI Chat Completions
+wire formats, so the real provider clients can be benchmarked without API keys.
+"""
+
+import asyncio
+import json
+import random
+import socket
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Iterator
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+FAKE_REPLY = (
+    "Great question! Light travels in straight lines, which is why shadows form "
+    "when something blocks it. Want to try making shadow puppets with a flashlight?"
+)
+
+
+def _sse(data: dict, event: str = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+def _reply_chunks(size: int = 4):
+    """Split the fake reply into word chunks, like a model emitting tokens"""
+    words = FAKE_REPLY.split(" ")
+    for i in range(0, len(words), size):
+        yield " ".join(words[i:i + size]) + (" " if i + size < len(words) else "")
+
+
+def create_fake_llm_app(
+    latency: float = 0.5,
+    first_token_latency: float = None,
+    jitter: float = 0.0,
+    error_rate: float = 0.0,
+    seed: int = 0
+) -> FastAPI:
+    """Build an app that answers every completion after `latency` seconds
+    
+    Streaming requests emit their first chunk after `first_token_latency`
+    (default: a fifth of `latency`) and spread the rest over the remainder.
+    Non-streaming replies take `latency` plus or minus up to `jitter` seconds,
+    and fail with the provider's overloaded error at `error_rate`. Both are
+    drawn from a generator seeded with `seed`, so runs are reproducible.
+    """
+    app = FastAPI()
+    rng = random.Random(seed)
+    if first_token_latency is None:
+        first_token_latency = latency / 5
+    chunks = list(_reply_chunks())
+    chunk_delay = max(latency - first_token_latency, 0) / max(len(chunks) - 1, 1)
+    
+    async def anthropic_stream():
+        await asyncio.sleep(first_token_latency)
+        yield _sse({"type": "message_start", "message": {
+            "id": f"msg_{uuid.uuid4().hex}", "type": "message", "role": "assistant",
+            "model": "fake-claude", "content": [], "stop_reason": None, "stop_sequence": None,
+            "usage": {"input_tokens": 100, "output_tokens": 0}
+        }}, "message_start")
+        yield _sse({"type": "content_block_start", "index": 0,
+                    "content_block": {"type": "text", "text": ""}}, "content_block_start")
+        for i, chunk in enumerate(chunks):
+            if i:
+                await asyncio.sleep(chunk_delay)
+            yield _sse({"type": "content_block_delta", "index": 0,
+                        "delta": {"type": "text_delta", "text": chunk}}, "content_block_delta")
+        yield _sse({"type": "content_block_stop", "index": 0}, "content_block_stop")
+        yield _sse({"type": "message_delta", "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                    "usage": {"output_tokens": 40}}, "message_delta")
+        yield _sse({"type": "message_stop"}, "message_stop")
+    
+    async def openai_stream():
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        await asyncio.sleep(first_token_latency)
+        for i, chunk in enumerate(chunks):
+            if i:
+                await asyncio.sleep(chunk_delay)
+            yield _sse({
+                "id": completion_id, "object": "chat.completion.chunk",
+                "created": int(time.time()), "model": "fake-gpt",
+                "choices": [{"index": 0, "delta": {"content": chunk}, "finish_reason": None}]
+            })
+        yield _sse({
+            "id": completion_id, "object": "chat.completion.chunk",
+            "created": int(time.time()), "model": "fake-gpt",
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]
+        })
+        yield "data: [DONE]\n\n"
+    
+    def delay() -> float:
+        return max(latency + rng.uniform(-jitter, jitter), 0.0) if jitter else latency
+    
+    def fails() -> bool:
+        return error_rate > 0 and rng.random() < error_rate
+    
+    @app.post("/v1/messages")
+    async def anthropic_messages(request: Request):
+        body = await request.json()
+        if body.get("stream"):
+            return StreamingResponse(anthropic_stream(), media_type="text/event-stream")
+        await asyncio.sleep(delay())
+        if fails():
+            return JSONResponse(status_code=529, content={
+                "type": "error", "error": {"type": "overloaded_error", "message": "Overloaded"}
+            })
+        return {
+            "id": f"msg_{uuid.uuid4().hex}",
+            "type": "message",
+            "role": "assistant",
+            "model": "fake-claude",
+            "content": [{"type": "text", "text": FAKE_REPLY}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": {"input_tokens": 100, "output_tokens": 40}
+        }
+    
+    @app.post("/v1/chat/completions")
+    async def openai_chat_completions(request: Request):
+        body = await request.json()
+        if body.get("stream"):
+            return StreamingResponse(openai_stream(), media_type="text/event-stream")
+        await asyncio.sleep(delay())
+        if fails():
+            return JSONResponse(status_code=503, content={
+                "error": {"type": "server_error", "message": "The server is overloaded", "code": None}
+            })
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": "fake-gpt",
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": FAKE_REPLY},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 100, "completion_tokens": 40, "total_tokens": 140}
+        }
+    
+    return app
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def run_fake_llm_server(
+    latency: float = 0.5,
+    jitter: float = 0.0,
+    error_rate: float = 0.0,
+    seed: int = 0
+) -> Iterator[str]:
+    """Serve the fake LLM app on a background thread and yield its base URL"""
+    port = _free_port()
+    config = uvicorn.Config(
+        create_fake_llm_app(latency, jitter=jitter, error_rate=error_rate, seed=seed),
+        host="127.0.0.1",
+        port=port,
+        log_level="warning",
+        backlog=2048
+    )
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    
+    while not server.started:
+        time.sleep(0.01)
+    
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+        thread.join(timeout=5)
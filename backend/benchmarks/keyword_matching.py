@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: mode and topic detection per chat turn.
+
+Compares the previous classifier, which ran a separate substring scan per
+keyword list, looped over every topic and re-joined the last five messages
+on each turn, with the precompiled KeywordMatcher used by AIOrchestrator.
+Both classify the same corpus of student messages inside a running
+conversation.
+
+Usage (from the backend directory):
+    python -m benchmarks.keyword_matching --turns 20000
+"""
+
+import argparse
+import time
+from datetime import datetime
+from typing import List, Optional
+
+from app.ai_orchestrator import AIOrchestrator
+from app.models import ChatMessage, ConversationMode, SessionData
+
+STUDENT_MESSAGES = [
+    "How does light travel?",
+    "why is the sky blue",
+    "I don't understand what a shadow is",
+    "can you explain reflection again but simpler",
+    "tell me a story about a beaver who builds a dam",
+    "What does refraction mean?",
+    "im confused about echoes",
+    "What if sound could travel in space?",
+    "show me an example of a pulley",
+    "Why do rocks have layers? is it erosion?",
+    "Can you tell me about animal habitats in Canada",
+    "I wonder how bridges hold up so many cars",
+    "once upon a time there was a loon, can you keep going?",
+    "what is a fossil made of",
+    "I'm stuck on levers",
+    "How loud is a moose call? what's the pitch?",
+    "pretend you're a polar bear and tell me about your habitat",
+    "can you clarify what frequency means",
+    "ok",
+    "thanks! that was cool",
+    "what makes a structure strong",
+    "explain how a prism makes a rainbow",
+    "I think gears are like pulleys?",
+    "why do we see lightning before we hear thunder",
+]
+
+
+class SubstringClassifier:
+    """The previous behaviour: one substring scan per keyword on every turn"""
+    
+    def __init__(self, orchestrator: AIOrchestrator):
+        self.orchestrator = orchestrator
+    
+    def determine_mode(self, message_lower: str, session: SessionData) -> ConversationMode:
+        o = self.orchestrator
+        explanatory_score = sum(1 for kw in o.keywords_explanatory if kw in message_lower)
+        learning_score = sum(1 for kw in o.keywords_learning if kw in message_lower)
+        story_score = sum(1 for kw in o.keywords_story if kw in message_lower)
+        
+        if len(session.messages) > 5:
+            recent_messages = " ".join([m.content.lower() for m in session.messages[-5:]])
+            if "confused" in recent_messages or "don't understand" in recent_messages:
+                explanatory_score += 2
+        
+        if explanatory_score > learning_score and explanatory_score > story_score:
+            return ConversationMode.EXPLANATORY
+        elif story_score > learning_score:
+            return ConversationMode.STORY
+        elif learning_score > 0:
+            return ConversationMode.LEARNING
+        return ConversationMode.DISCOVERY
+    
+    def extract_topic(self, message: str) -> Optional[str]:
+        message_lower = message.lower()
+        for topic, keywords in self.orchestrator.topic_keywords.items():
+            if any(keyword in message_lower for keyword in keywords):
+                return topic
+        return None
+
+
+def make_session() -> SessionData:
+    messages = []
+    for i, content in enumerate(STUDENT_MESSAGES[:8]):
+        messages.append(ChatMessage(role="user", content=content))
+        messages.append(ChatMessage(role="assistant", content=f"Maple's answer number {i} about light and sound."))
+    return SessionData(
+        session_id="bench",
+        messages=messages,
+        created_at=datetime.utcnow(),
+        last_activity=datetime.utcnow()
+    )
+
+
+def turn_messages(turns: int, repeated: bool) -> List[str]:
+    """The corpus cycled; unless `repeated`, each turn's text is unique, like a real new message"""
+    return [
+        STUDENT_MESSAGES[i % len(STUDENT_MESSAGES)] + ("" if repeated else f" ({i})")
+        for i in range(turns)
+    ]
+
+
+def time_substring(orchestrator: AIOrchestrator, session: SessionData, messages: List[str]) -> float:
+    classifier = SubstringClassifier(orchestrator)
+    start = time.perf_counter()
+    for message in messages:
+        classifier.determine_mode(message.lower(), session)
+        classifier.extract_topic(message)
+    return (time.perf_counter() - start) / len(messages) * 1e6
+
+
+def time_matcher(orchestrator: AIOrchestrator, session: SessionData, messages: List[str]) -> float:
+    start = time.perf_counter()
+    for message in messages:
+        orchestrator._determine_mode(message, session)
+        orchestrator.extract_topic(message)
+    return (time.perf_counter() - start) / len(messages) * 1e6
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--turns", type=int, default=20_000)
+    args = parser.parse_args(argv)
+    
+    orchestrator = AIOrchestrator()
+    session = make_session()
+    
+    print(f"{'messages':<10} {'substring scans (us/turn)':>26} {'automaton (us/turn)':>20} {'speedup':>8}")
+    for label, repeated in (("new", False), ("repeated", True)):
+        messages = turn_messages(args.turns, repeated)
+        substring = time_substring(orchestrator, session, messages)
+        matcher = time_matcher(orchestrator, session, messages)
+        print(f"{label:<10} {substring:>26.1f} {matcher:>20.1f} {substring / matcher:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Load benchmark: chat throughput vs. concurrent sessions against a fake LLM server.
+
+Each simulated student session sends one message through AIOrchestrator, which
+routes to ClaudeService or OpenAIService using the real async SDK clients.
+With non-blocking clients, throughput should scale roughly linearly with the
+number of concurrent sessions until the provider concurrency limit is reached.
+
+Usage (from the backend directory):
+    python -m benchmarks.llm_concurrency --latency 0.5 --sessions 1 5 10 25 50
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import datetime
+from typing import List
+
+from app.config import settings
+from benchmarks.fake_llm_server import run_fake_llm_server
+
+MESSAGES = [
+    "How does light travel?",                 # learning -> Claude
+    "I don't understand echoes, help!",        # explanatory -> OpenAI
+]
+
+
+async def run_level(concurrency: int, rounds: int) -> float:
+    """Run `rounds` waves of `concurrency` sessions; return messages per second"""
+    from app.ai_orchestrator import AIOrchestrator
+    from app.models import SessionData, ChatMessage
+    
+    orchestrator = AIOrchestrator()
+    await orchestrator.initialize()
+    
+    async def one_session(index: int):
+        message = MESSAGES[index % len(MESSAGES)]
+        session = SessionData(
+            session_id=f"bench-{index}",
+            messages=[ChatMessage(role="user", content=message)],
+            created_at=datetime.utcnow(),
+            last_activity=datetime.utcnow()
+        )
+        await orchestrator.process_message(message=message, session=session)
+    
+    start = time.perf_counter()
+    for _ in range(rounds):
+        await asyncio.gather(*(one_session(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    
+    await orchestrator.cleanup()
+    return (concurrency * rounds) / elapsed
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--latency", type=float, default=0.5, help="Fake LLM latency in seconds")
+    parser.add_argument("--rounds", type=int, default=3, help="Waves per concurrency level")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 5, 10, 25, 50])
+    args = parser.parse_args(argv)
+    
+    with run_fake_llm_server(args.latency) as base_url:
+        settings.claude_api_key = settings.claude_api_key or "fake-key"
+        settings.openai_api_key = settings.openai_api_key or "fake-key"
+        settings.claude_base_url = base_url
+        settings.openai_base_url = f"{base_url}/v1"
+        
+        print(f"Fake LLM latency: {args.latency:.2f}s, "
+              f"provider limits: claude={settings.claude_max_concurrency} "
+              f"openai={settings.openai_max_concurrency}")
+        print("=" * 60)
+        print(f"{'sessions':>10} {'msg/s':>10} {'speedup':>10}")
+        
+        baseline = None
+        for concurrency in args.sessions:
+            throughput = asyncio.run(run_level(concurrency, args.rounds))
+            baseline = baseline or throughput
+            print(f"{concurrency:>10} {throughput:>10.2f} {throughput / baseline:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
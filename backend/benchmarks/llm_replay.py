@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Replay benchmark: re-drive recorded classroom traffic against this build.
+
+Reads an LLM cassette recorded with LLM_CASSETTE_MODE=record (for example
+during STUDENT_TESTING_PROTOCOL.md sessions, or `benchmarks.chat_load
+--record`), sends every recorded session's student messages through the
+whole app again, and serves the provider replies from the cassette with
+their original latencies times --latency-scale. No API is called.
+
+Reports the same latency, throughput and memory figures as chat_load, plus
+how many provider calls hit the cassette, matched only by student message,
+or missed (a miss fails the provider call and is counted as a failed turn).
+
+Usage (from the backend directory):
+    python -m benchmarks.chat_load --students 20 --turns 4 --record cassettes/bench.jsonl
+    python -m benchmarks.llm_replay cassettes/bench.jsonl
+    python -m benchmarks.llm_replay cassettes/classroom.jsonl --latency-scale 0   # orchestration only
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+from app.config import settings
+from app.llm_cassette import Cassette
+from benchmarks.chat_load import configure, median_result, run_load
+
+# Nothing listens here, so a call that bypasses the cassette fails fast instead of reaching an API
+UNREACHABLE_URL = "http://127.0.0.1:9"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("cassette", type=Path, help="Cassette recorded with LLM_CASSETTE_MODE=record")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="Multiplier for recorded latencies")
+    parser.add_argument("--airtable-latency", type=float, default=0.05, help="Fake Airtable query latency")
+    parser.add_argument("--runs", type=int, default=1, help="Repeat the replay and report the median")
+    args = parser.parse_args(argv)
+    
+    scripts = Cassette(str(args.cassette), "replay").sessions()
+    if not scripts:
+        print(f"No recorded sessions in {args.cassette}")
+        return 1
+    
+    configure(UNREACHABLE_URL, args.airtable_latency)
+    settings.llm_cassette_mode = "replay"
+    settings.llm_cassette_path = str(args.cassette)
+    settings.llm_cassette_latency_scale = args.latency_scale
+    
+    turns = sum(len(messages) for messages in scripts.values())
+    print(f"Replaying {turns} turns from {len(scripts)} sessions at {args.latency_scale}x recorded latency")
+    result = median_result(asyncio.run(run_load(scripts, args.runs)))
+    
+    from app import main as app_main
+    print(json.dumps(result, indent=2))
+    print(f"Cassette: {json.dumps(app_main.ai_orchestrator.get_cassette_stats())}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
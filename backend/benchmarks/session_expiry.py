@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: per-request session access cost vs. number of live sessions.
+
+Compares the heap-driven expiry in InMemorySessionStore with the previous
+full scan of every session's expiry on each access. A chat turn does one
+get_or_create_session and two add_message calls, which is what is timed.
+The live sessions are inserted into the store directly beforehand, since
+filling the full-scan store through the manager is itself quadratic.
+
+Usage (from the backend directory):
+    python -m benchmarks.session_expiry --sessions 10000 100000
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import datetime
+from typing import List
+
+from app.models import SessionData
+from app.session_manager import SessionManager
+from app.session_store import InMemorySessionStore
+
+
+class FullScanSessionStore(InMemorySessionStore):
+    """The previous behaviour: scan every expiry on every access"""
+    
+    def _cleanup_expired_sessions(self):
+        current_time = time.monotonic()
+        expired_sessions = [sid for sid, expiry in self.session_expiry.items() if current_time > expiry]
+        for session_id in expired_sessions:
+            del self.sessions[session_id]
+            del self.session_expiry[session_id]
+
+
+def fill(store: InMemorySessionStore, live_sessions: int):
+    """Insert empty sessions with their expiry, skipping the per-access cleanup"""
+    now = datetime.utcnow()
+    for i in range(live_sessions):
+        session_id = f"student-{i}"
+        store.sessions[session_id] = SessionData(
+            session_id=session_id, messages=[], created_at=now, last_activity=now
+        )
+        store._update_session_expiry(session_id)
+
+
+async def time_chat_turns(store: InMemorySessionStore, live_sessions: int, turns: int) -> float:
+    """Return mean microseconds per chat turn with `live_sessions` sessions stored"""
+    manager = SessionManager(store)
+    fill(store, live_sessions)
+    
+    start = time.perf_counter()
+    for i in range(turns):
+        session_id = f"student-{(i * 7919) % live_sessions}"
+        await manager.get_or_create_session(session_id)
+        await manager.add_message(session_id, role="user", content="How does light travel?")
+        await manager.add_message(session_id, role="assistant", content="In straight lines!")
+    return (time.perf_counter() - start) / turns * 1e6
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--turns", type=int, default=200)
+    args = parser.parse_args(argv)
+    
+    print(f"{'sessions':>10} {'full scan (us/turn)':>22} {'heap (us/turn)':>16} {'speedup':>9}")
+    for live_sessions in args.sessions:
+        full_scan = asyncio.run(time_chat_turns(FullScanSessionStore(ttl_minutes=60), live_sessions, args.turns))
+        heap = asyncio.run(time_chat_turns(InMemorySessionStore(ttl_minutes=60), live_sessions, args.turns))
+        print(f"{live_sessions:>10} {full_scan:>22.1f} {heap:>16.1f} {full_scan / heap:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: memory per stored session at a full history of chat turns.
+
+Compares session history held as CompactMessage records (the current
+InMemorySessionStore) with the previous pydantic ChatMessage objects. Each
+session gets `--turns` student/assistant exchanges through
+SessionManager.add_message, so the stats, token counts and expiry
+bookkeeping are included. Message text is identical in both runs and is
+reported separately, since only the per-message overhead differs. Turn
+times are measured under tracemalloc, so only their ratio is meaningful.
+
+Usage (from the backend directory):
+    python -m benchmarks.session_memory --sessions 2000 --turns 50
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+import tracemalloc
+from typing import Dict, List, Tuple
+
+from app.models import AIProvider, ChatMessage, CompactMessage, ConversationMode, SessionData
+from app.session_manager import SessionManager
+from app.session_signals import record_message
+from app.session_store import SESSION_ESTIMATOR, InMemorySessionStore
+
+STUDENT = "Why do shadows get longer in the evening? Is it because the sun is lower? (#{})"
+MAPLE = (
+    "Great thinking! When the sun is low in the sky, its light hits objects at a slant, so the "
+    "shadow stretches out much farther across the ground. Think about walking home from school "
+    "in Winnipeg in December: your shadow can be taller than a hockey net! Want to try an "
+    "experiment with a flashlight and a toy to see it happen? (#{})"
+)
+
+
+class ModelMessageStore(InMemorySessionStore):
+    """The previous behaviour: history kept as validated ChatMessage models"""
+    
+    async def append_message(self, session: SessionData, message: CompactMessage, max_messages: int):
+        model = ChatMessage(
+            role=message.role,
+            content=message.content,
+            timestamp=message.timestamp,
+            provider=message.provider,
+            mode=message.mode
+        )
+        session.messages.append(model)
+        session.token_count += SESSION_ESTIMATOR.count_message(model)
+        record_message(session.stats, model)
+        self._trim(session, max_messages)
+        self.sessions[session.session_id] = session
+        self._update_session_expiry(session.session_id)
+
+
+async def fill(store: InMemorySessionStore, sessions: int, turns: int) -> Tuple[int, float, int]:
+    """Return (bytes allocated per session, microseconds per turn, text bytes per session)"""
+    manager = SessionManager(store)
+    text_bytes = 0
+    
+    tracemalloc.start()
+    started = time.perf_counter()
+    for i in range(sessions):
+        session_id = f"student-{i}"
+        for turn in range(turns):
+            student, maple = STUDENT.format(turn), MAPLE.format(turn)
+            text_bytes += sys.getsizeof(student) + sys.getsizeof(maple)
+            await manager.add_message(session_id, "user", student)
+            await manager.add_message(
+                session_id, "assistant", maple, provider=AIProvider.CLAUDE, mode=ConversationMode.DISCOVERY
+            )
+    elapsed = time.perf_counter() - started
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    
+    return allocated // sessions, elapsed / (sessions * turns) * 1e6, text_bytes // sessions
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--turns", type=int, default=50, help="Student/assistant exchanges per session")
+    args = parser.parse_args(argv)
+    
+    results: Dict[str, Tuple[int, float, int]] = {}
+    for name, store_class in (("ChatMessage", ModelMessageStore), ("CompactMessage", InMemorySessionStore)):
+        results[name] = asyncio.run(fill(store_class(ttl_minutes=60), args.sessions, args.turns))
+    
+    text = results["CompactMessage"][2]
+    print(f"{args.sessions} sessions x {args.turns} turns, {text} bytes of message text per session")
+    print(f"{'history':<16} {'bytes/session':>14} {'overhead/session':>17} {'us/turn':>9}")
+    for name, (per_session, per_turn, _) in results.items():
+        print(f"{name:<16} {per_session:>14} {per_session - text:>17} {per_turn:>9.1f}")
+    
+    old, new = results["ChatMessage"][0], results["CompactMessage"][0]
+    print(f"Compact history uses {1 - new / old:.0%} less memory per session "
+          f"({1 - (new - text) / (old - text):.0%} less excluding message text)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Tests for the async TTL + LRU content cache:
+    pytest test_cache.py
+"""
+
+import asyncio
+
+import pytest
+
+from app.cache import AsyncTTLCache
+
+
+class CountingLoader:
+    """Loader that counts calls and takes `delay` seconds"""
+    
+    def __init__(self, value="content", delay: float = 0.0):
+        self.value = value
+        self.delay = delay
+        self.calls = 0
+    
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return self.value
+
+
+@pytest.mark.asyncio
+async def test_hit_after_miss():
+    cache = AsyncTTLCache(ttl_seconds=60)
+    loader = CountingLoader()
+    
+    assert await cache.get_or_load("light", loader) == "content"
+    assert await cache.get_or_load("light", loader) == "content"
+    
+    assert loader.calls == 1
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_load():
+    cache = AsyncTTLCache(ttl_seconds=60)
+    loader = CountingLoader(delay=0.05)
+    
+    results = await asyncio.gather(*(cache.get_or_load("sound", loader) for _ in range(20)))
+    
+    assert results == ["content"] * 20
+    assert loader.calls == 1
+    assert cache.stats()["coalesced"] == 19
+
+
+@pytest.mark.asyncio
+async def test_least_recently_used_entry_is_evicted():
+    cache = AsyncTTLCache(ttl_seconds=60, max_entries=2)
+    
+    await cache.get_or_load("a", CountingLoader("a"))
+    await cache.get_or_load("b", CountingLoader("b"))
+    await cache.get_or_load("a", CountingLoader("a"))  # "a" is now most recent
+    await cache.get_or_load("c", CountingLoader("c"))
+    
+    assert cache.get("a") == "a"
+    assert cache.get("b") is None
+    assert cache.get("c") == "c"
+    assert cache.stats()["evictions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_stale_value_served_while_refreshing():
+    cache = AsyncTTLCache(ttl_seconds=0.01, stale_ttl_seconds=60)
+    await cache.get_or_load("rocks", CountingLoader("old"))
+    await asyncio.sleep(0.02)
+    
+    refresh = CountingLoader("new", delay=0.05)
+    assert await cache.get_or_load("rocks", refresh) == "old"
+    assert await cache.get_or_load("rocks", refresh) == "old"
+    
+    await asyncio.sleep(0.1)
+    assert refresh.calls == 1
+    assert await cache.get_or_load("rocks", refresh) == "new"
+
+
+@pytest.mark.asyncio
+async def test_failed_load_is_not_cached():
+    cache = AsyncTTLCache(ttl_seconds=60)
+    
+    async def failing():
+        raise RuntimeError("Airtable unavailable")
+    
+    with pytest.raises(RuntimeError):
+        await cache.get_or_load("habitats", failing)
+    
+    assert await cache.get_or_load("habitats", CountingLoader()) == "content"
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Tests for the batch chat endpoint, with fake providers and content:
+    pytest test_chat_batch.py
+"""
+
+import asyncio
+import sys
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.session_manager import SessionManager
+from app.session_store import InMemorySessionStore
+
+
+class FakeContent:
+    def __init__(self):
+        self.bundle_calls = []
+    
+    async def get_topic_bundle(self, topic: str):
+        self.bundle_calls.append(topic)
+        content = {"topic": topic.title()}
+        return {
+            "topic": topic,
+            "curriculum_content": content,
+            "canadian_examples": [],
+            "activities": [],
+            "enriched_content": content
+        }
+
+
+@pytest.fixture
+def env(monkeypatch):
+    content = FakeContent()
+    manager = SessionManager(InMemorySessionStore(ttl_minutes=60))
+    monkeypatch.setattr(main, "content_service", content)
+    monkeypatch.setattr(main, "session_manager", manager)
+    monkeypatch.setattr(main.conversation_summarizer, "session_manager", manager)
+    monkeypatch.setattr(main.settings, "chat_batch_concurrency", 4)
+    
+    state = {"in_flight": 0, "peak": 0}
+    
+    async def provider(messages, *args, **kwargs):
+        last = messages[-1].content
+        if "fail" in last:
+            raise RuntimeError("provider down")
+        state["in_flight"] += 1
+        state["peak"] = max(state["peak"], state["in_flight"])
+        await asyncio.sleep(0.02)
+        state["in_flight"] -= 1
+        return f"reply to {last} after {len(messages)} messages"
+    
+    monkeypatch.setattr(main.ai_orchestrator, "_use_claude", provider)
+    monkeypatch.setattr(main.ai_orchestrator, "_use_openai", provider)
+    return TestClient(main.app), content, manager, state
+
+
+def test_batch_returns_results_in_order(env):
+    client, content, _, state = env
+    items = [{"session_id": f"student-{i}", "message": f"How does light travel? ({i})"} for i in range(12)]
+    
+    response = client.post("/api/chat/batch", json={"items": items})
+    
+    body = response.json()
+    assert response.status_code == 200
+    assert body["succeeded"] == 12 and body["failed"] == 0
+    assert [r["index"] for r in body["results"]] == list(range(12))
+    assert body["results"][5]["response"]["response"].startswith("reply to How does light travel? (5)")
+    # One content lookup for the shared topic, bounded generation fan-out
+    assert content.bundle_calls == ["light"]
+    assert 1 < state["peak"] <= 4
+
+
+def test_same_session_items_run_in_order(env):
+    client, _, manager, _ = env
+    items = [
+        {"session_id": "s1", "message": "What is an echo?"},
+        {"session_id": "s1", "message": "Why?"},
+        {"message": "Tell me a story"}
+    ]
+    
+    body = client.post("/api/chat/batch", json={"items": items}).json()
+    
+    assert body["results"][1]["response"]["response"] == "reply to Why? after 3 messages"
+    assert body["results"][2]["session_id"] not in ("s1", None)
+    session = asyncio.run(manager.get_session("s1"))
+    assert [m.content for m in session.messages][::2] == ["What is an echo?", "Why?"]
+
+
+def test_item_errors_do_not_fail_the_batch(env):
+    client, _, _, _ = env
+    items = [{"message": "please fail"}, {"message": "What is an echo?"}]
+    
+    body = client.post("/api/chat/batch", json={"items": items}).json()
+    
+    assert body["succeeded"] == 1 and body["failed"] == 1
+    assert "Both AI providers failed" in body["results"][0]["error"]
+    assert body["results"][1]["response"] is not None
+
+
+def test_oversized_batch_is_rejected(env, monkeypatch):
+    client, _, _, _ = env
+    monkeypatch.setattr(main.settings, "chat_batch_max_items", 2)
+    
+    response = client.post("/api/chat/batch", json={"items": [{"message": "hi"}] * 3})
+    
+    assert response.status_code == 413
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
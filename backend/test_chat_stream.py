@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Tests for the streaming chat endpoint, with fake streaming providers and content:
+    pytest test_chat_stream.py
+"""
+
+import json
+import sys
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.ai_orchestrator import AIOrchestrator
+from app.models import AIProvider
+from app.session_manager import SessionManager
+from app.session_store import InMemorySessionStore
+
+
+class FakeContent:
+    async def get_topic_bundle(self, topic: str):
+        content = {"topic": topic.title(), "learning_objectives": ["Light travels in straight lines"]}
+        return {
+            "topic": topic,
+            "curriculum_content": content,
+            "canadian_examples": [],
+            "activities": [],
+            "enriched_content": content
+        }
+
+
+def fake_stream(texts, error: Exception = None):
+    async def stream_response(**kwargs):
+        for text in texts:
+            yield text
+        if error:
+            raise error
+    return stream_response
+
+
+def parse_events(body: str):
+    """(event, data) pairs from a server-sent event stream"""
+    events = []
+    for block in body.strip().split("\n\n"):
+        event, data = block.split("\n")
+        events.append((event[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+
+@pytest.fixture
+def env(monkeypatch):
+    manager = SessionManager(InMemorySessionStore(ttl_minutes=60))
+    # Fresh circuit breakers, so the failures here don't open circuits for other tests
+    monkeypatch.setattr(main, "ai_orchestrator", AIOrchestrator())
+    monkeypatch.setattr(main, "content_service", FakeContent())
+    monkeypatch.setattr(main, "session_manager", manager)
+    monkeypatch.setattr(main.conversation_summarizer, "session_manager", manager)
+    monkeypatch.setattr(main.settings, "response_cache_enabled", False)
+    monkeypatch.setattr(main.settings, "tracing_timings_in_response", False)
+    return TestClient(main.app), manager
+
+
+def stream(client: TestClient, message: str, session_id: str = "s1"):
+    response = client.post("/api/chat/stream", json={"message": message, "session_id": session_id})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    return parse_events(response.text)
+
+
+@pytest.mark.asyncio
+async def test_stream_sends_meta_tokens_then_done(env, monkeypatch):
+    client, manager = env
+    monkeypatch.setattr(main.ai_orchestrator.claude_service, "stream_response", fake_stream(
+        ["Light travels ", "in straight lines!\n", "TODO: Shine a flashlight through a comb"]
+    ))
+    
+    # "how" routes to Claude
+    events = stream(client, "How does light travel?")
+    
+    assert [name for name, _ in events] == ["meta", "token", "token", "token", "done"]
+    meta, done = events[0][1], events[-1][1]
+    assert meta["session_id"] == "s1" and meta["provider"] == "claude"
+    assert meta["curriculum_content"]["topic"] == "Light"
+    assert meta["metadata"]["curriculum_topic"] == "light"
+    assert "".join(data["text"] for name, data in events if name == "token") == (
+        "Light travels in straight lines!\nTODO: Shine a flashlight through a comb"
+    )
+    assert done["session_id"] == "s1" and done["provider"] == "claude" and done["mode"] == meta["mode"]
+    assert done["has_activity"] is True
+    assert done["activity_markers"] == ["Shine a flashlight through a comb"]
+    
+    session = await manager.get_session("s1")
+    assert [m.role for m in session.messages] == ["user", "assistant"]
+    assert session.messages[-1].content == "Light travels in straight lines!\nTODO: Shine a flashlight through a comb"
+    assert session.messages[-1].provider == AIProvider.CLAUDE
+
+
+@pytest.mark.asyncio
+async def test_stream_without_activities(env, monkeypatch):
+    client, _ = env
+    monkeypatch.setattr(main.ai_orchestrator.claude_service, "stream_response", fake_stream(["In straight lines!"]))
+    
+    done = stream(client, "How does light travel?")[-1][1]
+    
+    assert done["has_activity"] is False
+    assert done["activity_markers"] is None
+
+
+@pytest.mark.asyncio
+async def test_fallback_before_the_first_token_resends_meta(env, monkeypatch):
+    client, manager = env
+    monkeypatch.setattr(main.ai_orchestrator.claude_service, "stream_response", fake_stream([], RuntimeError("overloaded")))
+    monkeypatch.setattr(main.ai_orchestrator.openai_service, "stream_response", fake_stream(["Straight lines!"]))
+    
+    events = stream(client, "How does light travel?")
+    
+    assert [name for name, _ in events] == ["meta", "meta", "token", "done"]
+    assert events[1][1]["provider"] == "openai" and events[-1][1]["provider"] == "openai"
+    assert (await manager.get_session("s1")).messages[-1].provider == AIProvider.OPENAI
+
+
+@pytest.mark.asyncio
+async def test_failures_end_with_an_error_event(env, monkeypatch):
+    client, manager = env
+    monkeypatch.setattr(main.ai_orchestrator.claude_service, "stream_response", fake_stream([], RuntimeError("overloaded")))
+    monkeypatch.setattr(main.ai_orchestrator.openai_service, "stream_response", fake_stream([], RuntimeError("down")))
+    
+    events = stream(client, "How does light travel?")
+    
+    assert [name for name, _ in events] == ["meta", "meta", "error"]
+    assert events[-1][1]["error"] == "Failed to process message"
+    assert "Both AI providers failed" in events[-1][1]["detail"]
+    
+    # Tokens already sent can't be retracted, so a mid-stream failure also ends in "error", not "done"
+    monkeypatch.setattr(main.ai_orchestrator.claude_service, "stream_response", fake_stream(
+        ["Light travels "], RuntimeError("connection reset")
+    ))
+    events = stream(client, "How does light travel?", session_id="s2")
+    
+    assert [name for name, _ in events] == ["meta", "token", "error"]
+    assert events[-1][1]["detail"] == "connection reset"
+    for session_id in ("s1", "s2"):
+        assert [m.role for m in (await manager.get_session(session_id)).messages] == ["user"]
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
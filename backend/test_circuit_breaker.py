@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Tests for per-provider circuit breakers and health-aware routing:
+    pytest test_circuit_breaker.py
+"""
+
+import asyncio
+import sys
+from datetime import datetime
+import pytest
+
+from app.ai_orchestrator import AIOrchestrator
+from app.models import AIProvider, ChatMessage, SessionData
+from app.provider_metrics import CircuitBreaker, LatencyWindow
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr("app.provider_metrics.time.monotonic", clock)
+    return clock
+
+
+def make_breaker(**kwargs) -> CircuitBreaker:
+    options = dict(error_threshold=0.5, latency_threshold=10.0, cooldown_seconds=30.0)
+    options.update(kwargs)
+    return CircuitBreaker("claude", LatencyWindow(size=50, min_samples=5), **options)
+
+
+def make_session() -> SessionData:
+    return SessionData(
+        session_id="s1",
+        messages=[ChatMessage(role="user", content="How does light travel?")],
+        created_at=datetime.utcnow(),
+        last_activity=datetime.utcnow()
+    )
+
+
+def test_errors_open_the_circuit(clock):
+    breaker = make_breaker()
+    for _ in range(4):
+        breaker.record_failure()
+    # Fewer than min_calls outcomes never trip
+    assert breaker.state == CircuitBreaker.CLOSED
+    
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+
+
+def test_occasional_errors_do_not_trip(clock):
+    breaker = make_breaker()
+    for i in range(50):
+        if i % 5 == 0:
+            breaker.record_failure()
+        else:
+            breaker.record_success(1.0)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_probe_recovers(clock):
+    breaker = make_breaker()
+    for _ in range(5):
+        breaker.record_failure()
+    
+    clock.now += 31
+    assert breaker.allow_request()
+    with breaker.call():
+        # Only one probe at a time
+        assert not breaker.allow_request()
+        breaker.record_success(1.0)
+    
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.error_rate == 0.0
+    assert breaker.allow_request()
+
+
+def test_failed_probe_reopens(clock):
+    breaker = make_breaker()
+    for _ in range(5):
+        breaker.record_failure()
+    
+    clock.now += 31
+    assert breaker.allow_request()
+    breaker.record_failure()
+    
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.trips == 2
+    assert not breaker.allow_request()
+
+
+def test_slow_p95_opens_the_circuit(clock):
+    breaker = make_breaker()
+    for _ in range(5):
+        breaker.latency.record(12.0)
+        breaker.record_success(12.0)
+    
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.last_trip_reason.startswith("p95 latency")
+
+
+@pytest.mark.asyncio
+async def test_router_shifts_traffic_away_from_open_circuit(clock):
+    orchestrator = AIOrchestrator()
+    calls = []
+    
+    async def failing_claude(*args, **kwargs):
+        calls.append("claude")
+        raise RuntimeError("overloaded")
+    
+    async def openai(*args, **kwargs):
+        calls.append("openai")
+        return "openai"
+    
+    orchestrator._use_claude = failing_claude
+    orchestrator._use_openai = openai
+    
+    # "how" routes to Claude; each failure falls back to OpenAI
+    for _ in range(5):
+        result = await orchestrator.process_message("How does light travel?", make_session())
+        assert result["provider"] == AIProvider.OPENAI
+    assert orchestrator.breakers[AIProvider.CLAUDE].state == CircuitBreaker.OPEN
+    
+    calls.clear()
+    result = await orchestrator.process_message("How does light travel?", make_session())
+    assert calls == ["openai"]
+    assert result["provider"] == AIProvider.OPENAI
+    
+    stats = orchestrator.get_provider_stats()
+    assert stats["circuits"]["claude"]["state"] == "open"
+
+
+def trip(breaker: CircuitBreaker, clock: Clock):
+    """Open the circuit and let its cooldown pass, leaving it ready for a probe"""
+    for _ in range(5):
+        breaker.record_failure()
+    clock.now += 31
+    assert breaker.allow_request()
+
+
+@pytest.mark.asyncio
+async def test_cancelled_probe_releases_the_slot(clock):
+    orchestrator = AIOrchestrator()
+    breaker = orchestrator.breakers[AIProvider.CLAUDE]
+    trip(breaker, clock)
+    hang = asyncio.Event()
+    
+    async def hanging_claude(*args, **kwargs):
+        await hang.wait()
+    
+    orchestrator._use_claude = hanging_claude
+    turn = asyncio.create_task(orchestrator.process_message("How does light travel?", make_session()))
+    for _ in range(5):
+        await asyncio.sleep(0)
+    assert breaker.probe_in_flight
+    
+    # e.g. the client disconnected, or the probe lost a hedge race
+    turn.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await turn
+    
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.probe_in_flight
+    
+    async def claude(*args, **kwargs):
+        return "claude"
+    
+    orchestrator._use_claude = claude
+    result = await orchestrator.process_message("How does light travel?", make_session())
+    assert result["provider"] == AIProvider.CLAUDE
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_cached_turn_does_not_hold_the_probe_slot(clock, monkeypatch):
+    monkeypatch.setattr("app.ai_orchestrator.settings.response_cache_enabled", True)
+    orchestrator = AIOrchestrator()
+    calls = []
+    
+    async def claude(*args, **kwargs):
+        calls.append("claude")
+        return "In straight lines!"
+    
+    orchestrator._use_claude = claude
+    await orchestrator.process_message("How does light travel?", make_session())
+    
+    breaker = orchestrator.breakers[AIProvider.CLAUDE]
+    trip(breaker, clock)
+    result = await orchestrator.process_message("How does light travel?", make_session())
+    assert result["cached"]
+    assert not breaker.probe_in_flight
+    
+    # The next uncached turn is still let through as the probe
+    result = await orchestrator.process_message("How does sound travel?", make_session())
+    assert result["provider"] == AIProvider.CLAUDE
+    assert calls == ["claude", "claude"]
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
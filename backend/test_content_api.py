@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Test that content endpoints reuse the shared, pre-warmed AirtableService
+instead of hitting Airtable on every request.
+
+Runs in-process against a fake Airtable client - no API keys needed:
+    pytest test_content_api.py
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.airtable_service as airtable_module
+from app import main
+from app.config import settings
+from app.content_snapshot_service import ContentSnapshotService
+from app.local_content_service import LocalContentService
+
+
+class FakeTable:
+    """Stands in for a pyairtable Table and counts upstream calls"""
+    
+    def __init__(self, api: "FakeApi", name: str):
+        self.api = api
+        self.name = name
+    
+    def all(self, **kwargs):
+        self.api.calls.append((self.name, kwargs))
+        topic = kwargs.get("formula", "").split("'")[1] if "'" in kwargs.get("formula", "") else "light"
+        if self.name == "Grade4_Science_Curriculum":
+            return [{"id": "rec1", "fields": {"Topic Name": topic.title(), "Description": f"All about {topic}"}}]
+        if self.name == "Canadian_Examples":
+            return [{"id": "rec2", "fields": {"Topic Name": topic.title(), "Example Title": "Northern Lights", "Description": "Aurora in Yukon"}}]
+        return [{"id": "rec3", "fields": {"Topic Name": topic.title(), "Activity Name": "Shadow Puppets", "Instructions": "Use a flashlight"}}]
+
+
+class FakeApi:
+    instances = []
+    
+    def __init__(self, api_key: str):
+        self.calls = []
+        FakeApi.instances.append(self)
+    
+    def base(self, base_id: str):
+        return self
+    
+    def table(self, name: str) -> FakeTable:
+        return FakeTable(self, name)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    FakeApi.instances.clear()
+    monkeypatch.setattr(airtable_module, "Api", FakeApi)
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+def upstream_calls() -> int:
+    return sum(len(api.calls) for api in FakeApi.instances)
+
+
+def test_content_router_shares_main_service(client):
+    """The content router must use the same instance main.py initializes"""
+    assert client.app.state.content_service is main.content_service
+    assert main.content_service.is_initialized
+    assert len(FakeApi.instances) == 1
+
+
+def test_cached_topic_costs_no_upstream_calls(client):
+    """Topics are pre-warmed at startup, so lookups are served from cache"""
+    before = upstream_calls()
+    for _ in range(3):
+        response = client.get("/api/content/curriculum/topics", params={"topic": "light"})
+        assert response.status_code == 200
+        assert response.json()["data"]["topic"] == "Light"
+    assert upstream_calls() == before
+
+
+def test_cached_examples_and_activities_cost_no_upstream_calls(client):
+    """Startup warms whole topic bundles, not just curriculum content"""
+    before = upstream_calls()
+    response = client.get("/api/content/activities", params={"topic": "sound"})
+    assert response.json()["count"] == 1
+    response = client.get("/api/content/canadian-examples", params={"topic": "sound"})
+    assert response.status_code == 200
+    assert upstream_calls() == before
+
+
+def test_topic_list_costs_no_upstream_calls(client):
+    before = upstream_calls()
+    response = client.get("/api/content/curriculum/topics")
+    assert response.status_code == 200
+    assert upstream_calls() == before
+
+
+def test_health_is_served_from_the_cached_probe(client):
+    """Repeated health probes must not query Airtable; the HealthMonitor does that on its own interval"""
+    before = upstream_calls()
+    for _ in range(5):
+        response = client.get("/api/content/health").json()
+        assert response["status"] == "healthy"
+        assert response["initialized"] is True
+    assert upstream_calls() == before
+
+
+@pytest.mark.asyncio
+async def test_local_provider_serves_bundled_content():
+    """The local provider loads content/*.json with no upstream calls at all"""
+    service = LocalContentService(settings.content_dir)
+    await service.initialize()
+    
+    assert await service.check_health()
+    bundle = await service.get_topic_bundle("light")
+    assert bundle["curriculum_content"]["topic"] == "Light"
+    assert bundle["canadian_examples"]
+    assert bundle["activities"][0]["name"]
+    assert bundle["enriched_content"]["activities"] == bundle["activities"]
+    assert await service.get_content_for_topic("volcanoes") is None
+
+
+@pytest.mark.asyncio
+async def test_snapshot_provider_reads_locally_and_survives_outages(monkeypatch, tmp_path):
+    """After a sync, reads cost no upstream calls and a restart serves the disk snapshot"""
+    FakeApi.instances.clear()
+    monkeypatch.setattr(airtable_module, "Api", FakeApi)
+    
+    service = ContentSnapshotService(str(tmp_path))
+    await service.initialize()
+    assert (tmp_path / "CURRENT").exists()
+    
+    before = upstream_calls()
+    bundle = await service.get_topic_bundle("light")
+    assert bundle["curriculum_content"]["topic"] == "Light"
+    assert bundle["activities"][0]["name"] == "Shadow Puppets"
+    assert upstream_calls() == before
+    await service.cleanup()
+    
+    def airtable_down(self, **kwargs):
+        raise ConnectionError("Airtable unavailable")
+    monkeypatch.setattr(FakeTable, "all", airtable_down)
+    
+    restarted = ContentSnapshotService(str(tmp_path))
+    await restarted.initialize()
+    assert await restarted.check_health()
+    assert (await restarted.get_content_for_topic("light"))["topic"] == "Light"
+    await restarted.cleanup()
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(pytest.main([__file__, "-q"]))
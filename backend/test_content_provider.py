@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared ContentProvider behaviour, with fake lookups:
+    pytest test_content_provider.py
+"""
+
+import asyncio
+import sys
+import time
+import pytest
+
+from app.content_provider import ContentProvider
+
+DELAY = 0.1
+
+
+class FakeProvider(ContentProvider):
+    """Each lookup takes DELAY seconds; names in `failing` raise instead"""
+    
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+    
+    async def initialize(self):
+        self.is_initialized = True
+    
+    async def check_health(self) -> bool:
+        return True
+    
+    async def lookup(self, name, value):
+        await asyncio.sleep(DELAY)
+        if name in self.failing:
+            raise RuntimeError(f"{name} table unavailable")
+        return value
+    
+    async def get_content_for_topic(self, topic):
+        return await self.lookup("content", {"topic": topic.title(), "grade_level": "4"})
+    
+    async def get_canadian_examples(self, topic):
+        return await self.lookup("examples", [f"{topic} in Banff"])
+    
+    async def get_activities(self, topic):
+        return await self.lookup("activities", [{"name": f"{topic} experiment"}])
+
+
+@pytest.mark.asyncio
+async def test_bundle_lookups_run_concurrently():
+    started = time.perf_counter()
+    bundle = await FakeProvider().get_topic_bundle("light")
+    elapsed = time.perf_counter() - started
+    
+    # About one lookup's delay, not three
+    assert DELAY <= elapsed < 2 * DELAY
+    assert bundle["topic"] == "light"
+    assert bundle["curriculum_content"] == {"topic": "Light", "grade_level": "4"}
+    assert bundle["canadian_examples"] == ["light in Banff"]
+    assert bundle["activities"] == [{"name": "light experiment"}]
+    assert bundle["enriched_content"] == {
+        "topic": "Light",
+        "grade_level": "4",
+        "canadian_examples": ["light in Banff"],
+        "activities": [{"name": "light experiment"}]
+    }
+
+
+@pytest.mark.asyncio
+async def test_failed_lookup_keeps_the_others():
+    bundle = await FakeProvider(failing={"examples"}).get_topic_bundle("sound")
+    assert bundle["curriculum_content"] == {"topic": "Sound", "grade_level": "4"}
+    assert bundle["canadian_examples"] == []
+    assert bundle["activities"] == [{"name": "sound experiment"}]
+    assert bundle["enriched_content"]["activities"] == [{"name": "sound experiment"}]
+    
+    bundle = await FakeProvider(failing={"content"}).get_topic_bundle("sound")
+    assert bundle["curriculum_content"] is None and bundle["enriched_content"] is None
+    assert bundle["canadian_examples"] == ["sound in Banff"]
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Tests for rolling conversation summaries of turns outside the prompt window:
+    pytest test_conversation_summarizer.py
+"""
+
+import sys
+import pytest
+
+from app.ai_orchestrator import AIOrchestrator
+from app.conversation_summarizer import ConversationSummarizer, SUMMARY_KEY, SUMMARY_THROUGH_KEY
+from app.models import AIProvider, ConversationMode
+from app.session_manager import SessionManager
+from app.session_store import InMemorySessionStore
+
+
+class FakeOrchestrator:
+    def __init__(self):
+        self.calls = []
+    
+    async def summarize_conversation(self, messages, previous_summary=None):
+        self.calls.append(([m.content for m in messages], previous_summary))
+        return f"covered {len(messages)} messages"
+
+
+async def long_session(manager: SessionManager, turns: int):
+    for i in range(turns):
+        await manager.add_message("s1", role="user", content=f"question {i}")
+        session = await manager.add_message("s1", role="assistant", content=f"answer {i}")
+    return session
+
+
+@pytest.mark.asyncio
+async def test_turns_before_cutoff_are_summarized_once(monkeypatch):
+    monkeypatch.setattr("app.conversation_summarizer.settings.summary_min_messages", 4)
+    manager = SessionManager(InMemorySessionStore(ttl_minutes=60))
+    orchestrator = FakeOrchestrator()
+    summarizer = ConversationSummarizer(orchestrator, manager)
+    
+    session = await long_session(manager, 5)
+    cutoff = session.messages[6].timestamp
+    
+    await summarizer.schedule(session, cutoff)
+    
+    assert orchestrator.calls == [([f"{kind} {i}" for i in range(3) for kind in ("question", "answer")], None)]
+    stored = await manager.get_session("s1")
+    assert stored.metadata[SUMMARY_KEY] == "covered 6 messages"
+    assert stored.metadata[SUMMARY_THROUGH_KEY] == session.messages[5].timestamp.isoformat()
+    
+    # Nothing new before the cutoff: no second summary
+    assert summarizer.schedule(stored, cutoff) is None
+
+
+@pytest.mark.asyncio
+async def test_waits_for_enough_turns_or_a_cutoff(monkeypatch):
+    monkeypatch.setattr("app.conversation_summarizer.settings.summary_min_messages", 4)
+    manager = SessionManager(InMemorySessionStore(ttl_minutes=60))
+    summarizer = ConversationSummarizer(FakeOrchestrator(), manager)
+    
+    session = await long_session(manager, 5)
+    
+    assert summarizer.schedule(session, None) is None
+    assert summarizer.schedule(session, session.messages[2].timestamp) is None
+
+
+@pytest.mark.asyncio
+async def test_turns_evicted_by_the_message_cap_are_summarized_first(monkeypatch):
+    """Short turns that all fit the token budget still leave when the cap evicts them"""
+    monkeypatch.setattr("app.conversation_summarizer.settings.summary_min_messages", 4)
+    monkeypatch.setattr("app.session_manager.settings.max_conversation_length", 5)
+    manager = SessionManager(InMemorySessionStore(ttl_minutes=60))
+    orchestrator = FakeOrchestrator()
+    summarizer = ConversationSummarizer(orchestrator, manager)
+    
+    for i in range(12):
+        await manager.add_message("s1", role="user", content=f"question {i}")
+        session = await manager.add_message("s1", role="assistant", content=f"answer {i}")
+        # The whole history fits the token window
+        task = summarizer.schedule(session, None)
+        if task:
+            await task
+    
+    stored = await manager.get_session("s1")
+    assert len(stored.messages) == 10
+    summarized = [content for contents, _ in orchestrator.calls for content in contents]
+    evicted = [f"{kind} {i}" for i in range(7) for kind in ("question", "answer")]
+    assert summarized[:len(evicted)] == evicted
+    assert len(summarized) == len(set(summarized))
+
+
+@pytest.mark.asyncio
+async def test_summary_is_added_to_system_prompt():
+    manager = SessionManager(InMemorySessionStore(ttl_minutes=60))
+    session = await long_session(manager, 1)
+    orchestrator = AIOrchestrator()
+    
+    assert orchestrator._session_context(session) is None
+    
+    session.metadata[SUMMARY_KEY] = "Student already knows that light travels in straight lines."
+    context = orchestrator._session_context(session)
+    segments = orchestrator.claude_service._system_segments("You are Maple.", ConversationMode.LEARNING, None, context)
+    assert segments[-1].text.endswith("Student already knows that light travels in straight lines.")
+    assert not segments[-1].cacheable
+    assert orchestrator._history_cutoff(session, AIProvider.CLAUDE, "You are Maple.", context) is None
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Tests for the cached health subsystem:
+    pytest test_health_monitor.py
+"""
+
+import asyncio
+import sys
+import pytest
+
+from app.ai_orchestrator import AIOrchestrator
+from app.health_monitor import HealthMonitor
+from app.models import AIProvider
+
+
+class FakeContent:
+    def __init__(self, healthy: bool = True):
+        self.healthy = healthy
+        self.is_initialized = True
+    
+    async def check_health(self) -> bool:
+        return self.healthy
+
+
+def probe(result, calls: list, name: str, delay: float = 0.0):
+    async def check() -> bool:
+        calls.append(name)
+        await asyncio.sleep(delay)
+        if isinstance(result, Exception):
+            raise result
+        return result
+    return check
+
+
+def make_monitor(claude=True, openai=True, content=True):
+    orchestrator = AIOrchestrator()
+    calls = []
+    orchestrator.check_claude_health = probe(claude, calls, "claude")
+    orchestrator.check_openai_health = probe(openai, calls, "openai")
+    monitor = HealthMonitor(orchestrator, FakeContent(content))
+    return monitor, orchestrator, calls
+
+
+def test_reading_health_never_probes():
+    monitor, orchestrator, calls = make_monitor()
+    orchestrator.claude_service.is_initialized = True
+    
+    services = monitor.services()
+    
+    assert calls == []
+    # Before the first probe: whether each client started
+    assert services == {"claude": True, "openai": False, "content": True}
+
+
+@pytest.mark.asyncio
+async def test_probe_results_are_cached():
+    monitor, _, calls = make_monitor(openai=RuntimeError("invalid api key"))
+    
+    await monitor.probe_all()
+    calls.clear()
+    
+    assert monitor.services() == {"claude": True, "openai": False, "content": True}
+    assert monitor.details()["openai"]["error"] == "invalid api key"
+    assert calls == []
+
+
+@pytest.mark.asyncio
+async def test_slow_probe_times_out(monkeypatch):
+    monkeypatch.setattr("app.health_monitor.settings.health_probe_timeout_seconds", 0.05)
+    monitor, orchestrator, _ = make_monitor()
+    orchestrator.check_claude_health = probe(True, [], "claude", delay=1.0)
+    monitor.probes["claude"] = orchestrator.check_claude_health
+    
+    await monitor.probe_all()
+    
+    assert monitor.services()["claude"] is False
+
+
+@pytest.mark.asyncio
+async def test_recent_traffic_replaces_probe():
+    monitor, orchestrator, calls = make_monitor(claude=False)
+    await monitor.probe_all()
+    assert monitor.is_healthy("claude") is False
+    
+    # A real reply after the failed probe
+    orchestrator.breakers[AIProvider.CLAUDE].record_success(1.0)
+    assert monitor.is_healthy("claude") is True
+    
+    calls.clear()
+    await monitor.probe_all(skip_recent_traffic_seconds=60)
+    assert calls == ["openai"]
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_reports_unhealthy():
+    monitor, orchestrator, _ = make_monitor()
+    await monitor.probe_all()
+    
+    breaker = orchestrator.breakers[AIProvider.OPENAI]
+    for _ in range(breaker.min_calls):
+        breaker.record_failure()
+    
+    assert monitor.is_healthy("openai") is False
+
+
+@pytest.mark.asyncio
+async def test_background_probing_stops_on_cleanup():
+    monitor, _, calls = make_monitor()
+    monitor.start(0.01)
+    await asyncio.sleep(0.05)
+    await monitor.cleanup()
+    
+    probed = len(calls)
+    assert probed >= 2
+    await asyncio.sleep(0.03)
+    assert len(calls) == probed
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Tests for hedged provider requests in AIOrchestrator:
+    pytest test_hedging.py
+"""
+
+import asyncio
+import sys
+from datetime import datetime
+import pytest
+
+from app.ai_orchestrator import AIOrchestrator
+from app.metrics import REGISTRY
+from app.models import AIProvider, ChatMessage, ConversationMode, SessionData
+
+
+def make_session() -> SessionData:
+    return SessionData(
+        session_id="s1",
+        messages=[ChatMessage(role="user", content="How does light travel?")],
+        created_at=datetime.utcnow(),
+        last_activity=datetime.utcnow()
+    )
+
+
+def fake_provider(delay: float, response: str = None, error: Exception = None, calls: list = None):
+    async def use(*args, **kwargs):
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            if calls is not None:
+                calls.append("cancelled")
+            raise
+        if error:
+            raise error
+        return response
+    return use
+
+
+@pytest.fixture
+def orchestrator(monkeypatch):
+    monkeypatch.setattr("app.ai_orchestrator.settings.hedge_enabled", True)
+    monkeypatch.setattr("app.ai_orchestrator.settings.hedge_delay_seconds", 0.05)
+    return AIOrchestrator()
+
+
+async def ask(orchestrator: AIOrchestrator):
+    # "how" routes to Claude in learning mode
+    return await orchestrator.process_message("How does light travel?", make_session())
+
+
+@pytest.mark.asyncio
+async def test_slow_primary_is_hedged_and_cancelled(orchestrator):
+    claude_calls = []
+    orchestrator._use_claude = fake_provider(1.0, "claude", calls=claude_calls)
+    orchestrator._use_openai = fake_provider(0.01, "openai")
+    
+    result = await ask(orchestrator)
+    await asyncio.sleep(0)
+    
+    assert result["provider"] == AIProvider.OPENAI and result["response"] == "openai"
+    assert claude_calls == ["cancelled"]
+    assert orchestrator.hedge_stats.stats()["hedge_wins"] == 1
+    
+    # The cancelled primary still counts, as a lower bound on its latency
+    samples = list(orchestrator.latency[AIProvider.CLAUDE].samples)
+    assert len(samples) == 1 and samples[0] >= 0.05
+
+
+@pytest.mark.asyncio
+async def test_hedge_events_are_exported(orchestrator, monkeypatch):
+    from app import main
+    
+    monkeypatch.setattr(main, "ai_orchestrator", orchestrator)
+    orchestrator._use_claude = fake_provider(1.0, "claude")
+    orchestrator._use_openai = fake_provider(0.01, "openai")
+    await ask(orchestrator)
+    
+    rendered = REGISTRY.render()
+    assert 'tutor_llm_hedging_total{event="hedged"} 1' in rendered
+    assert 'tutor_llm_hedging_total{event="hedge_win"} 1' in rendered
+
+
+@pytest.mark.asyncio
+async def test_fast_primary_is_not_hedged(orchestrator):
+    orchestrator._use_claude = fake_provider(0.0, "claude")
+    orchestrator._use_openai = fake_provider(0.0, "openai", error=AssertionError("should not be called"))
+    
+    result = await ask(orchestrator)
+    
+    assert result["provider"] == AIProvider.CLAUDE
+    assert orchestrator.hedge_stats.hedged == 0
+    assert orchestrator.latency[AIProvider.CLAUDE].samples
+
+
+@pytest.mark.asyncio
+async def test_failed_primary_hedges_without_waiting(orchestrator, monkeypatch):
+    monkeypatch.setattr("app.ai_orchestrator.settings.hedge_delay_seconds", 10)
+    orchestrator._use_claude = fake_provider(0.0, error=RuntimeError("overloaded"))
+    orchestrator._use_openai = fake_provider(0.0, "openai")
+    
+    result = await asyncio.wait_for(ask(orchestrator), timeout=1)
+    
+    assert result["provider"] == AIProvider.OPENAI
+
+
+@pytest.mark.asyncio
+async def test_both_failing_raises(orchestrator):
+    orchestrator._use_claude = fake_provider(0.0, error=RuntimeError("down"))
+    orchestrator._use_openai = fake_provider(0.0, error=RuntimeError("down"))
+    
+    with pytest.raises(Exception, match="Both AI providers failed"):
+        await ask(orchestrator)
+    assert orchestrator.hedge_stats.failures == 1
+
+
+@pytest.mark.asyncio
+async def test_hedge_delay_follows_observed_p95(orchestrator):
+    for i in range(100):
+        orchestrator.latency[AIProvider.CLAUDE].record(i / 100)
+    assert orchestrator._hedge_delay(AIProvider.CLAUDE) == pytest.approx(0.94)
+    assert orchestrator._hedge_delay(AIProvider.OPENAI) == 0.05
+
+
+def fake_stream(first_delay: float, texts: list, gap: float = 0.0):
+    async def stream_response(**kwargs):
+        await asyncio.sleep(first_delay)
+        for i, text in enumerate(texts):
+            if i:
+                await asyncio.sleep(gap)
+            yield text
+    return stream_response
+
+
+async def stream_events(orchestrator: AIOrchestrator):
+    return [event async for event in orchestrator.stream_message("How does light travel?", make_session())]
+
+
+@pytest.mark.asyncio
+async def test_stream_without_a_first_token_falls_back(orchestrator, monkeypatch):
+    monkeypatch.setattr("app.ai_orchestrator.settings.claude_timeout_seconds", 0.05)
+    orchestrator.claude_service.stream_response = fake_stream(10, ["never"])
+    orchestrator.openai_service.stream_response = fake_stream(0, ["Straight ", "lines!"])
+    
+    events = await asyncio.wait_for(stream_events(orchestrator), timeout=1)
+    
+    assert [e["event"] for e in events] == ["start", "fallback", "token", "token", "end"]
+    assert events[-1]["provider"] == AIProvider.OPENAI
+    assert events[-1]["response"] == "Straight lines!"
+    assert orchestrator.breakers[AIProvider.CLAUDE].error_rate > 0
+
+
+@pytest.mark.asyncio
+async def test_finished_stream_records_its_latency(orchestrator, monkeypatch):
+    monkeypatch.setattr("app.ai_orchestrator.settings.claude_timeout_seconds", 0.05)
+    # Only the first token is bounded by the timeout, not the whole reply
+    orchestrator.claude_service.stream_response = fake_stream(0.01, ["In ", "straight ", "lines!"], gap=0.04)
+    
+    events = await stream_events(orchestrator)
+    
+    assert events[-1]["provider"] == AIProvider.CLAUDE
+    assert events[-1]["response"] == "In straight lines!"
+    [elapsed] = orchestrator.latency[AIProvider.CLAUDE].samples
+    assert elapsed >= 0.09
+    assert 'tutor_llm_request_duration_seconds_count{provider="claude"}' in REGISTRY.render()
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
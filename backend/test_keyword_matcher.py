@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Tests for the keyword automaton and keyword-based mode/topic detection:
+    pytest test_keyword_matcher.py
+"""
+
+import sys
+from datetime import datetime
+import pytest
+
+from app.ai_orchestrator import AIOrchestrator
+from app.keyword_matcher import KeywordMatcher
+from app.models import ChatMessage, ConversationMode, SessionData
+from app.session_signals import build_stats
+
+
+def found(matcher: KeywordMatcher, text: str):
+    return sorted(matcher.patterns[i][1] for i in matcher.find(text))
+
+
+def make_session(*contents: str) -> SessionData:
+    messages = [ChatMessage(role="user", content=c) for c in contents]
+    return SessionData(
+        session_id="s1",
+        messages=messages,
+        created_at=datetime.utcnow(),
+        last_activity=datetime.utcnow(),
+        stats=build_stats(messages)
+    )
+
+
+def test_overlapping_keywords_are_all_found():
+    matcher = KeywordMatcher({"a": ["he", "she", "hers"], "b": ["can you explain", "explain"]})
+    
+    # "he" starts "hers" but sits inside "she"
+    assert found(matcher, "she said hers") == ["he", "hers", "she"]
+    assert found(matcher, "Can you EXPLAIN it") == ["can you explain", "explain"]
+    assert matcher.count("can you explain") == {"b": 2}
+
+
+def test_keywords_must_start_a_word():
+    matcher = KeywordMatcher({"topic": ["light", "rock"], "mode": ["how", "story"]})
+    
+    assert found(matcher, "lights and rocks") == ["light", "rock"]
+    assert found(matcher, "a flight over the bedrock") == []
+    assert found(matcher, "show me some history") == []
+    assert found(matcher, "how?") == ["how"]
+
+
+def test_topic_detection():
+    orchestrator = AIOrchestrator()
+    
+    assert orchestrator.extract_topic("Why do shadows change?") == "light"
+    assert orchestrator.extract_topic("The flight was bumpy") is None
+    # Earlier topics win, as before
+    assert orchestrator.extract_topic("the sound of rocks falling") == "sound"
+
+
+def test_mode_detection():
+    orchestrator = AIOrchestrator()
+    session = make_session("hi")
+    
+    assert orchestrator._determine_mode("How does light travel?", session) == ConversationMode.LEARNING
+    assert orchestrator._determine_mode("I'm stuck, can you help?", session) == ConversationMode.EXPLANATORY
+    assert orchestrator._determine_mode("tell a story about a beaver", session) == ConversationMode.STORY
+    assert orchestrator._determine_mode("ok", session) == ConversationMode.DISCOVERY
+
+
+def test_recent_confusion_favours_explanations():
+    orchestrator = AIOrchestrator()
+    session = make_session("hi", "I'm confused", "ok", "hmm", "sure", "why is that?")
+    
+    assert orchestrator._determine_mode("why is that?", session) == ConversationMode.EXPLANATORY
+    assert orchestrator._determine_mode("why is that?", make_session("why is that?")) == ConversationMode.LEARNING
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Tests for LLM call record and replay:
+    pytest test_llm_cassette.py
+"""
+
+import json
+import sys
+import threading
+import time
+from types import SimpleNamespace
+import pytest
+
+from app import llm_cassette
+from app.claude_service import ClaudeService
+from app.llm_cassette import Cassette, CassetteMiss, cassette_session
+from app.models import ChatMessage, ConversationMode
+
+
+class FakeMessages:
+    """Stands in for AsyncAnthropic().messages"""
+    
+    def __init__(self, reply):
+        self.reply = reply
+        self.calls = 0
+    
+    async def create(self, **kwargs):
+        self.calls += 1
+        return SimpleNamespace(
+            content=[SimpleNamespace(text=self.reply)],
+            usage=SimpleNamespace(input_tokens=12, output_tokens=5)
+        )
+
+
+def user_turns(*texts):
+    return [{"role": "user", "content": text} for text in texts]
+
+
+def record(path, *args, **kwargs):
+    """Record one call and wait for it to reach the file"""
+    recorder = Cassette(path, "record")
+    recorder.record(*args, **kwargs)
+    recorder.flush()
+
+
+@pytest.fixture
+def cassette_file(tmp_path):
+    return str(tmp_path / "llm.jsonl")
+
+
+@pytest.fixture(autouse=True)
+def no_cassette(monkeypatch):
+    monkeypatch.setattr(llm_cassette, "_cassette", None)
+
+
+def test_record_writes_compact_lines(cassette_file):
+    cassette = Cassette(cassette_file, "record")
+    cassette_session.set("student-1")
+    cassette.record("claude", user_turns("What is an echo?"), "A bounced sound!", 0.51234, usage=(10, 4))
+    cassette.flush()
+    
+    with open(cassette_file) as file:
+        entry = json.loads(file.readline())
+    assert entry["sid"] == "student-1"
+    assert entry["q"] == "What is an echo?"
+    assert entry["r"] == "A bounced sound!"
+    assert entry["s"] == 0.512
+    assert entry["u"] == [10, 4]
+    assert "c" not in entry
+
+
+def test_recording_writes_off_the_calling_thread(cassette_file, monkeypatch):
+    cassette = Cassette(cassette_file, "record")
+    writers = []
+    monkeypatch.setattr(cassette.appender, "_write", lambda text: writers.append(threading.current_thread()))
+    
+    for i in range(3):
+        cassette.record("claude", user_turns(f"Question {i}"), "Answer", 0.0)
+    cassette.flush()
+    
+    assert writers and threading.current_thread() not in writers
+    assert cassette.stats()["recorded"] == 3
+
+
+@pytest.mark.asyncio
+async def test_replay_ignores_system_prompt_and_provider(cassette_file):
+    record(cassette_file, "claude", user_turns("Why is the sky blue?"), "Sunlight scatters!", 0.0)
+    
+    cassette = Cassette(cassette_file, "replay")
+    messages = [{"role": "system", "content": "A new prompt"}] + user_turns("Why is the sky blue?")
+    assert await cassette.replay(messages) == "Sunlight scatters!"
+    assert cassette.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_replay_falls_back_to_session_and_message(cassette_file):
+    cassette_session.set("student-2")
+    record(cassette_file, "openai", user_turns("Hi", "What is a lever?"), "A bar!", 0.0)
+    
+    cassette = Cassette(cassette_file, "replay")
+    # History changed (e.g. a different context window), but the same student asked the same thing
+    assert await cassette.replay(user_turns("Hello", "What is a lever?")) == "A bar!"
+    assert cassette.stats()["fallbacks"] == 1
+    
+    cassette_session.set("student-3")
+    with pytest.raises(CassetteMiss):
+        await cassette.replay(user_turns("Hello", "What is a lever?"))
+    assert cassette.stats()["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_repeated_requests_get_successive_replies(cassette_file):
+    recorder = Cassette(cassette_file, "record")
+    recorder.record("claude", user_turns("Tell me a story"), "Once upon a time...", 0.0)
+    recorder.record("claude", user_turns("Tell me a story"), "Long ago...", 0.0)
+    recorder.flush()
+    
+    cassette = Cassette(cassette_file, "replay")
+    replies = [await cassette.replay(user_turns("Tell me a story")) for _ in range(3)]
+    assert replies == ["Once upon a time...", "Long ago...", "Once upon a time..."]
+
+
+@pytest.mark.asyncio
+async def test_stream_replays_chunks_at_scaled_offsets(cassette_file):
+    record(cassette_file, "claude", user_turns("Echo?"), "Hel" + "lo", 0.4, chunks=[(0.2, "Hel"), (0.4, "lo")])
+    
+    cassette = Cassette(cassette_file, "replay", latency_scale=0.25)
+    started = time.perf_counter()
+    chunks = [chunk async for chunk in cassette.replay_stream(user_turns("Echo?"))]
+    elapsed = time.perf_counter() - started
+    
+    assert chunks == ["Hel", "lo"]
+    assert 0.09 <= elapsed < 0.3
+
+
+def test_sessions_lists_student_messages_in_order(cassette_file):
+    recorder = Cassette(cassette_file, "record")
+    cassette_session.set("a")
+    recorder.record("claude", user_turns("one"), "1", 0.0)
+    recorder.record("claude", user_turns("summarize"), "s", 0.0, operation="complete")
+    cassette_session.set("b")
+    recorder.record("openai", user_turns("first"), "f", 0.0)
+    cassette_session.set("a")
+    recorder.record("claude", user_turns("one", "two"), "2", 0.0)
+    recorder.flush()
+    
+    assert Cassette(cassette_file, "replay").sessions() == {"a": ["one", "two"], "b": ["first"]}
+
+
+@pytest.mark.asyncio
+async def test_claude_service_records_then_replays(cassette_file, monkeypatch):
+    service = ClaudeService()
+    service.client = SimpleNamespace(messages=FakeMessages("Plants make food from light."))
+    messages = [ChatMessage(role="user", content="How do plants eat?")]
+    
+    recorder = Cassette(cassette_file, "record")
+    monkeypatch.setattr(llm_cassette, "_cassette", recorder)
+    recorded = await service.generate_response(messages, "You are Maple.", ConversationMode.LEARNING)
+    assert service.client.messages.calls == 1
+    recorder.flush()
+    
+    monkeypatch.setattr(llm_cassette, "_cassette", Cassette(cassette_file, "replay", latency_scale=0))
+    replayed = await service.generate_response(messages, "You are Maple, edited.", ConversationMode.STORY)
+    assert replayed == recorded == "Plants make food from light."
+    assert service.client.messages.calls == 1
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Tests for the metrics registry and the /metrics endpoint:
+    pytest test_metrics.py
+"""
+
+import sys
+from types import SimpleNamespace
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.metrics import HTTP_LATENCY, HTTP_REQUESTS, LLM_FALLBACKS, LLM_TOKENS, Registry
+
+
+def test_text_exposition_format():
+    registry = Registry()
+    requests = registry.counter("requests_total", "Requests", ("route",))
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    
+    requests.inc(route="/a")
+    requests.inc(2, route='/b"c')
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(5)
+    
+    assert registry.render().splitlines() == [
+        "# HELP requests_total Requests",
+        "# TYPE requests_total counter",
+        'requests_total{route="/a"} 1',
+        'requests_total{route="/b\\"c"} 2',
+        "# HELP latency_seconds Latency",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{le="0.1"} 1',
+        'latency_seconds_bucket{le="1"} 2',
+        'latency_seconds_bucket{le="+Inf"} 3',
+        "latency_seconds_sum 5.55",
+        "latency_seconds_count 3",
+    ]
+
+
+def test_labels_are_checked():
+    counter = Registry().counter("errors_total", "Errors", ("provider",))
+    with pytest.raises(ValueError):
+        counter.inc(model="x")
+    with pytest.raises(ValueError):
+        counter.inc(-1, provider="claude")
+
+
+def test_metrics_endpoint_after_a_fallback(monkeypatch):
+    async def claude(*args, **kwargs):
+        raise RuntimeError("overloaded")
+    
+    async def openai(*args, **kwargs):
+        return "Sound bounces back!"
+    
+    monkeypatch.setattr(main.ai_orchestrator, "_use_claude", claude)
+    monkeypatch.setattr(main.ai_orchestrator, "_use_openai", openai)
+    client = TestClient(main.app)
+    fallbacks = LLM_FALLBACKS.value(from_provider="claude")
+    
+    # "why" routes to Claude
+    assert client.post("/api/chat/message", json={"message": "Why is there an echo?"}).status_code == 200
+    response = client.get("/metrics")
+    
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    assert 'tutor_http_requests_total{route="/api/chat/message",method="POST",status="200"}' in text
+    assert 'tutor_llm_errors_total{provider="claude",error="RuntimeError"}' in text
+    assert 'tutor_llm_request_duration_seconds_count{provider="openai"}' in text
+    assert "tutor_active_sessions " in text
+    assert 'tutor_response_cache_lookups_total' in text
+    assert 'tutor_circuit_open{provider="claude"} 0' in text
+    assert LLM_FALLBACKS.value(from_provider="claude") == fallbacks + 1
+
+
+def test_unhandled_errors_are_counted_as_500(monkeypatch):
+    async def broken_count():
+        raise RuntimeError("store unavailable")
+    
+    monkeypatch.setattr(main.session_manager, "get_session_count", broken_count)
+    client = TestClient(main.app, raise_server_exceptions=False)
+    errors = HTTP_REQUESTS.value(route="/metrics", method="GET", status="500")
+    
+    assert client.get("/metrics").status_code == 500
+    assert HTTP_REQUESTS.value(route="/metrics", method="GET", status="500") == errors + 1
+    assert 'tutor_http_request_duration_seconds_count{route="/metrics",method="GET"}' in HTTP_LATENCY.render()
+
+
+def test_provider_usage_counts_tokens():
+    before = LLM_TOKENS.value(provider="openai", direction="output")
+    
+    main.ai_orchestrator.openai_service._record_usage(
+        SimpleNamespace(prompt_tokens=120, completion_tokens=30, prompt_tokens_details=None)
+    )
+    
+    assert LLM_TOKENS.value(provider="openai", direction="output") == before + 30
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
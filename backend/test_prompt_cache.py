@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Tests for system prompt segmentation and prompt-cache accounting:
+    pytest test_prompt_cache.py
+"""
+
+import sys
+import pytest
+
+from app.claude_service import ClaudeService
+from app.models import ConversationMode
+from app.openai_service import OpenAIService
+from app.prompt_cache import PromptCacheMetrics, claude_system_blocks, join_segments
+
+CURRICULUM = {
+    "topic": "Light",
+    "learning_objectives": ["Investigate how light travels"],
+    "canadian_examples": ["Northern lights over Yellowknife"],
+    "activities": [{"name": "Shadow puppets", "description": "Make shadows", "materials": ["flashlight"]}]
+}
+
+
+def test_claude_blocks_put_stable_segments_first_and_mark_them_cacheable():
+    segments = ClaudeService()._system_segments(
+        "You are Maple.", ConversationMode.LEARNING, CURRICULUM, "Notes: knows about shadows"
+    )
+    blocks = claude_system_blocks(segments)
+    
+    assert [b.get("cache_control") for b in blocks] == [{"type": "ephemeral"}, {"type": "ephemeral"}, None]
+    assert blocks[0]["text"].startswith("You are Maple.")
+    assert "Northern lights" in blocks[1]["text"]
+    assert blocks[2]["text"] == "Notes: knows about shadows"
+
+
+def test_prefix_is_identical_across_students_on_the_same_topic():
+    service = OpenAIService()
+    first = join_segments(service._system_segments("You are Maple.", ConversationMode.STORY, CURRICULUM, "Notes A"))
+    second = join_segments(service._system_segments("You are Maple.", ConversationMode.STORY, CURRICULUM, "Notes B"))
+    
+    shared = join_segments(service._system_segments("You are Maple.", ConversationMode.STORY, CURRICULUM))
+    assert first.startswith(shared) and second.startswith(shared)
+
+
+def test_metrics_count_cached_and_uncached_input_tokens():
+    metrics = PromptCacheMetrics()
+    metrics.record_claude({"input_tokens": 50, "cache_creation_input_tokens": 1500})
+    metrics.record_claude({"input_tokens": 60, "cache_read_input_tokens": 1500})
+    metrics.record_openai({"prompt_tokens": 1600, "prompt_tokens_details": {"cached_tokens": 1024}})
+    
+    stats = metrics.stats()
+    assert stats["requests"] == 3
+    assert stats["cache_read_input_tokens"] == 2524
+    assert stats["cache_write_input_tokens"] == 1500
+    assert stats["uncached_input_tokens"] == 50 + 60 + 576
+    assert stats["cached_ratio"] == round(2524 / 4710, 3)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
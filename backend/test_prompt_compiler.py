@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Tests for precompiled system prompts and prompts.yaml hot reload:
+    pytest test_prompt_compiler.py
+"""
+
+import os
+import sys
+import pytest
+
+import app.prompts as prompts
+from app.ai_orchestrator import AIOrchestrator
+from app.config import settings
+from app.local_content_service import LocalContentService
+from app.models import ConversationMode
+
+PROMPTS_YAML = """
+base_prompt: |
+  You are Maple.
+modes:
+  learning:
+    prompt: |
+      Ask questions ({version}).
+"""
+
+
+@pytest.fixture
+def prompts_file(tmp_path, monkeypatch):
+    path = tmp_path / "prompts.yaml"
+    path.write_text(PROMPTS_YAML.format(version="v1"))
+    monkeypatch.setattr(prompts, "_prompts_file", lambda: path)
+    prompts.reload_prompts()
+    yield path
+    monkeypatch.undo()
+    prompts.reload_prompts()
+
+
+def test_system_prompt_is_rendered_once_per_mode(prompts_file):
+    first = prompts.get_system_prompt(ConversationMode.LEARNING)
+    assert first is prompts.get_system_prompt(ConversationMode.LEARNING)
+    assert "Ask questions (v1)" in first
+
+
+def test_prompts_recompile_only_when_file_changes(prompts_file):
+    assert not prompts.reload_prompts_if_changed()
+    
+    prompts_file.write_text(PROMPTS_YAML.format(version="v2"))
+    stat = prompts_file.stat()
+    os.utime(prompts_file, (stat.st_atime, stat.st_mtime + 1))
+    
+    assert prompts.reload_prompts_if_changed()
+    assert "Ask questions (v2)" in prompts.get_system_prompt(ConversationMode.LEARNING)
+
+
+def test_invalid_yaml_keeps_the_last_good_prompts(prompts_file):
+    # e.g. saved mid-edit
+    prompts_file.write_text("base_prompt: |\n  You are\nmodes: [unclosed\n")
+    stat = prompts_file.stat()
+    os.utime(prompts_file, (stat.st_atime, stat.st_mtime + 1))
+    
+    with pytest.raises(Exception):
+        prompts.reload_prompts_if_changed()
+    assert "Ask questions (v1)" in prompts.get_system_prompt(ConversationMode.LEARNING)
+    assert prompts.load_prompts()["base_prompt"] == "You are Maple.\n"
+
+
+@pytest.mark.asyncio
+async def test_every_mode_and_topic_is_precompiled():
+    content = LocalContentService(settings.content_dir)
+    await content.initialize()
+    orchestrator = AIOrchestrator()
+    
+    await orchestrator.precompile_prompts(content)
+    
+    compiler = orchestrator.claude_service.prompt_compiler
+    assert len(compiler.personas) == len(ConversationMode)
+    assert len(compiler.topics) > 0
+    
+    bundle = await content.get_topic_bundle("light")
+    personas, topics = dict(compiler.personas), dict(compiler.topics)
+    segments = orchestrator.claude_service._system_segments(
+        prompts.get_system_prompt(ConversationMode.STORY), ConversationMode.STORY, bundle["enriched_content"]
+    )
+    
+    # Served from the precompiled entries, nothing new rendered
+    assert segments[0].text in personas.values() and segments[1].text in topics.values()
+    assert compiler.personas == personas and compiler.topics == topics
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
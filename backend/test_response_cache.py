@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Tests for the response cache:
+    pytest test_response_cache.py
+"""
+
+import sys
+from datetime import datetime
+import pytest
+
+from app.ai_orchestrator import AIOrchestrator
+from app.models import AIProvider, ChatMessage, ConversationMode, SessionData
+from app.response_cache import CachedResponse, ResponseCache, ResponseKey, normalize_message
+
+
+def key(text: str, history: str = "") -> ResponseKey:
+    return ResponseKey(normalize_message(text), ConversationMode.LEARNING, "light", history)
+
+
+def make_session(*contents: str) -> SessionData:
+    roles = ["user", "assistant"]
+    return SessionData(
+        session_id="s1",
+        messages=[ChatMessage(role=roles[i % 2], content=c) for i, c in enumerate(contents)],
+        created_at=datetime.utcnow(),
+        last_activity=datetime.utcnow()
+    )
+
+
+@pytest.fixture
+def orchestrator(monkeypatch):
+    monkeypatch.setattr("app.ai_orchestrator.settings.response_cache_enabled", True)
+    orchestrator = AIOrchestrator()
+    orchestrator.calls = []
+    
+    async def claude(*args, **kwargs):
+        orchestrator.calls.append("claude")
+        return f"answer {len(orchestrator.calls)}"
+    
+    orchestrator._use_claude = claude
+    return orchestrator
+
+
+def test_normalization_ignores_case_and_punctuation():
+    cache = ResponseCache(max_entries=10, ttl_seconds=60)
+    cache.put(key("How does light travel?"), CachedResponse("straight lines", AIProvider.CLAUDE))
+    
+    assert cache.get(key("how  does LIGHT travel")).response == "straight lines"
+    assert cache.get(key("how does light travel", history="abc")) is None
+
+
+def test_lru_eviction_and_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("app.response_cache.time.monotonic", lambda: now[0])
+    cache = ResponseCache(max_entries=2, ttl_seconds=60)
+    
+    cache.put(key("a"), CachedResponse("A", AIProvider.CLAUDE))
+    cache.put(key("b"), CachedResponse("B", AIProvider.CLAUDE))
+    cache.get(key("a"))
+    cache.put(key("c"), CachedResponse("C", AIProvider.CLAUDE))
+    
+    # "b" was least recently used
+    assert cache.get(key("b")) is None
+    assert cache.get(key("a")).response == "A"
+    
+    now[0] += 61
+    assert cache.get(key("a")) is None
+    assert cache.stats()["entries"] == 1
+
+
+def test_near_duplicates_share_an_answer():
+    cache = ResponseCache(max_entries=10, ttl_seconds=60, similarity_threshold=0.6)
+    cache.put(key("how does light travel"), CachedResponse("straight lines", AIProvider.CLAUDE))
+    
+    assert cache.get(key("how does the light travel?")).response == "straight lines"
+    assert cache.get(key("what is an echo")) is None
+    assert cache.stats()["near_hits"] == 1
+
+
+def test_exact_only_by_default():
+    cache = ResponseCache(max_entries=10, ttl_seconds=60)
+    cache.put(key("how does light travel"), CachedResponse("straight lines", AIProvider.CLAUDE))
+    
+    assert cache.get(key("how does the light travel")) is None
+
+
+@pytest.mark.asyncio
+async def test_first_turns_are_served_from_cache(orchestrator):
+    first = await orchestrator.process_message("How does light travel?", make_session("How does light travel?"))
+    second = await orchestrator.process_message("how does light travel", make_session("how does light travel"))
+    
+    assert orchestrator.calls == ["claude"]
+    assert second["cached"] is True and not first["cached"]
+    assert second["response"] == first["response"]
+    assert second["provider"] == AIProvider.CLAUDE
+
+
+@pytest.mark.asyncio
+async def test_later_turns_and_forced_providers_bypass_cache(orchestrator):
+    await orchestrator.process_message("How does light travel?", make_session("How does light travel?"))
+    
+    later = make_session("Hi", "Hello!", "How does light travel?")
+    assert not (await orchestrator.process_message("How does light travel?", later))["cached"]
+    
+    forced = await orchestrator.process_message(
+        "How does light travel?",
+        make_session("How does light travel?"),
+        force_provider=AIProvider.CLAUDE
+    )
+    assert not forced["cached"]
+    assert len(orchestrator.calls) == 3
+
+
+@pytest.mark.asyncio
+async def test_streamed_replies_fill_the_cache(orchestrator):
+    async def stream(*args, **kwargs):
+        for text in ["Light ", "travels ", "straight."]:
+            yield text
+    
+    orchestrator._stream_provider = stream
+    
+    events = [e async for e in orchestrator.stream_message("What is a prism?", make_session("What is a prism?"))]
+    assert events[-1]["response"] == "Light travels straight."
+    
+    events = [e async for e in orchestrator.stream_message("what is a prism", make_session("what is a prism"))]
+    assert [e["event"] for e in events] == ["start", "token", "end"]
+    assert events[-1]["cached"] is True
+    assert events[-1]["response"] == "Light travels straight."
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
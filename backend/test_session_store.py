@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Tests for the session stores. The Redis store runs against fakeredis, an
+in-process Redis stand-in, so no server is needed:
+    pytest test_session_store.py
+"""
+
+import asyncio
+from datetime import datetime
+import pytest
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeRedis
+
+from app.models import AIProvider, ChatMessage, CompactMessage, ConversationMode, SessionData
+from app.session_manager import SessionManager
+from app.session_signals import recently_confused
+from app.session_store import InMemorySessionStore, RedisSessionStore
+from app.token_budget import count_session_tokens
+
+
+def redis_store(server: FakeServer) -> RedisSessionStore:
+    return RedisSessionStore(FakeRedis(server=server, decode_responses=True), ttl_minutes=60)
+
+
+@pytest.fixture(params=["memory", "redis"])
+def manager(request):
+    if request.param == "memory":
+        return SessionManager(InMemorySessionStore(ttl_minutes=60))
+    return SessionManager(redis_store(FakeServer()))
+
+
+@pytest.mark.asyncio
+async def test_messages_and_metadata_round_trip(manager):
+    await manager.add_message("s1", role="user", content="How does light travel?")
+    await manager.add_message(
+        "s1", role="assistant", content="In straight lines!",
+        provider=AIProvider.CLAUDE, mode=ConversationMode.LEARNING
+    )
+    await manager.update_session_metadata("s1", {"current_topic": "light"})
+    
+    session = await manager.get_session("s1")
+    assert [m.content for m in session.messages] == ["How does light travel?", "In straight lines!"]
+    assert session.messages[1].provider == AIProvider.CLAUDE
+    assert session.current_topic == "light"
+    assert await manager.get_session_count() == 1
+
+
+@pytest.mark.asyncio
+async def test_history_is_stored_compactly(manager):
+    await manager.add_message("s1", role="user", content="What is a fossil?")
+    session = await manager.get_session("s1")
+    
+    message = session.messages[0]
+    assert isinstance(message, CompactMessage)
+    assert not hasattr(message, "__dict__")
+    assert abs((datetime.utcnow() - message.timestamp).total_seconds()) < 5
+
+
+def test_compact_messages_serialize_as_chat_messages():
+    original = ChatMessage(
+        role="assistant", content="Bones turned to stone!", timestamp=datetime(2024, 3, 1, 9, 30, 15, 123456),
+        provider=AIProvider.OPENAI, mode=ConversationMode.STORY
+    )
+    session = SessionData(
+        session_id="s1", messages=[original], created_at=datetime.utcnow(), last_activity=datetime.utcnow()
+    )
+    
+    assert isinstance(session.messages[0], CompactMessage)
+    assert session.model_dump(mode="json")["messages"] == [original.model_dump(mode="json")]
+    assert SessionData.model_validate_json(session.model_dump_json()).messages == session.messages
+
+
+@pytest.mark.asyncio
+async def test_history_is_trimmed_to_newest_messages(manager, monkeypatch):
+    monkeypatch.setattr("app.session_manager.settings.max_conversation_length", 2)
+    for i in range(7):
+        session = await manager.add_message("s1", role="user", content=f"message {i}")
+    
+    stored = await manager.get_session("s1")
+    assert [m.content for m in stored.messages] == ["message 3", "message 4", "message 5", "message 6"]
+    assert [m.content for m in session.messages] == [m.content for m in stored.messages]
+    assert stored.token_count == count_session_tokens(stored.messages)
+
+
+@pytest.mark.asyncio
+async def test_trimming_keeps_system_messages(manager, monkeypatch):
+    monkeypatch.setattr("app.session_manager.settings.max_conversation_length", 2)
+    await manager.add_message("s1", role="system", content="Earlier: shadows")
+    for i in range(6):
+        session = await manager.add_message("s1", role="user", content=f"message {i}")
+    
+    stored = await manager.get_session("s1")
+    assert [m.content for m in stored.messages] == ["Earlier: shadows", "message 3", "message 4", "message 5"]
+    assert stored.token_count == count_session_tokens(stored.messages)
+
+
+def test_trim_drops_the_oldest_in_place():
+    session = SessionData(
+        session_id="s1",
+        messages=[CompactMessage("user", f"message {i}") for i in range(5)],
+        created_at=datetime.utcnow(),
+        last_activity=datetime.utcnow()
+    )
+    messages = session.messages
+    session.token_count = count_session_tokens(messages)
+    
+    assert InMemorySessionStore._trim(session, 3)
+    assert session.messages is messages
+    assert [m.content for m in messages] == ["message 2", "message 3", "message 4"]
+    assert session.token_count == count_session_tokens(messages)
+
+
+@pytest.mark.asyncio
+async def test_stats_are_kept_incrementally(manager, monkeypatch):
+    monkeypatch.setattr("app.session_manager.settings.max_conversation_length", 1)
+    await manager.add_message("s1", role="user", content="I don't understand shadows")
+    await manager.add_message(
+        "s1", role="assistant", content="Let's try again!",
+        provider=AIProvider.OPENAI, mode=ConversationMode.EXPLANATORY
+    )
+    await manager.update_session_metadata("s1", {"current_topic": "light"})
+    await manager.update_session_metadata("s1", {"current_topic": "light"})
+    await manager.add_message("s1", role="user", content="What is an echo?")
+    await manager.add_message(
+        "s1", role="assistant", content="Sound bouncing back!",
+        provider=AIProvider.CLAUDE, mode=ConversationMode.LEARNING
+    )
+    await manager.update_session_metadata("s1", {"current_topic": "sound"})
+    
+    # Counts cover trimmed messages too
+    summary = await manager.get_session_summary("s1")
+    assert summary["message_count"] == 2
+    assert summary["provider_counts"] == {"openai": 1, "claude": 1}
+    assert summary["mode_counts"] == {"explanatory": 1, "learning": 1}
+    assert summary["topics"] == ["light", "sound"]
+    assert summary["confusion_count"] == 1
+    
+    session = await manager.get_session("s1")
+    assert recently_confused(session.stats)
+    for i in range(4):
+        session = await manager.add_message("s1", role="user", content=f"message {i}")
+    assert not recently_confused(session.stats)
+
+
+@pytest.mark.asyncio
+async def test_clear_session(manager):
+    await manager.add_message("s1", role="user", content="hi")
+    assert await manager.clear_session("s1")
+    assert await manager.get_session("s1") is None
+    assert not await manager.clear_session("s1")
+    assert await manager.get_session_count() == 0
+
+
+@pytest.mark.asyncio
+async def test_redis_sessions_are_shared_across_workers():
+    """Two managers on one Redis behave like two uvicorn workers"""
+    server = FakeServer()
+    worker_a = SessionManager(redis_store(server))
+    worker_b = SessionManager(redis_store(server))
+    
+    await worker_a.add_message("s1", role="user", content="What is an echo?")
+    await worker_b.add_message("s1", role="assistant", content="Sound bouncing back!")
+    
+    session = await worker_a.get_session("s1")
+    assert [m.role for m in session.messages] == ["user", "assistant"]
+
+
+@pytest.mark.asyncio
+async def test_redis_appends_from_stale_copies_keep_every_count():
+    """A worker appending to a session it loaded before another worker's append"""
+    server = FakeServer()
+    store_a, store_b = redis_store(server), redis_store(server)
+    await SessionManager(store_a).add_message("s1", role="user", content="What is an echo?")
+    
+    seen_by_a = await store_a.load("s1")
+    seen_by_b = await store_b.load("s1")
+    await store_a.append_message(seen_by_a, CompactMessage("assistant", "Sound bouncing back!"), 100)
+    await store_b.append_message(seen_by_b, CompactMessage("user", "Can I hear one in a gym?"), 100)
+    
+    session = await store_a.load("s1")
+    assert [m.role for m in session.messages] == ["user", "assistant", "user"]
+    assert session.token_count == count_session_tokens(session.messages)
+    assert session.stats.messages_seen == 3
+    # The stale copy was brought up to date too
+    assert [m.content for m in seen_by_b.messages] == [m.content for m in session.messages]
+    assert seen_by_b.token_count == session.token_count
+
+
+@pytest.mark.asyncio
+async def test_redis_metadata_saves_from_stale_copies_merge():
+    """A summary saved from a copy loaded before another worker's turn"""
+    server = FakeServer()
+    store_a, store_b = redis_store(server), redis_store(server)
+    worker_b = SessionManager(store_b)
+    await worker_b.add_message("s1", role="user", content="What is an echo?")
+    
+    seen_by_a = await store_a.load("s1")
+    await worker_b.add_message("s1", role="assistant", content="Sound bouncing back off a wall!")
+    await worker_b.update_session_metadata("s1", {"current_topic": "sound"})
+    await store_a.save_metadata(seen_by_a, {"summary": "Asked about echoes"})
+    
+    session = await store_b.load("s1")
+    assert session.token_count == count_session_tokens(session.messages)
+    assert session.stats.messages_seen == 2
+    assert session.stats.topics == ["sound"]
+    assert session.current_topic == "sound"
+    assert session.metadata == {"current_topic": "sound", "summary": "Asked about echoes"}
+    # The stale copy sees the merged metadata too
+    assert seen_by_a.metadata == session.metadata and seen_by_a.current_topic == "sound"
+
+
+@pytest.mark.asyncio
+async def test_redis_create_keeps_an_existing_session():
+    server = FakeServer()
+    worker_a = SessionManager(redis_store(server))
+    worker_b = SessionManager(redis_store(server))
+    
+    # Both workers see a brand-new session and race to create it
+    await asyncio.gather(
+        worker_a.add_message("s1", role="user", content="What is an echo?"),
+        worker_b.add_message("s1", role="user", content="What is a shadow?")
+    )
+    
+    session = await worker_a.get_session("s1")
+    assert sorted(m.content for m in session.messages) == ["What is a shadow?", "What is an echo?"]
+    assert session.stats.messages_seen == 2
+    
+    fresh = SessionData(session_id="s1", messages=[], created_at=datetime.utcnow(), last_activity=datetime.utcnow())
+    assert not await worker_b.store.create(fresh)
+    assert len((await worker_a.get_session("s1")).messages) == 2
+
+
+@pytest.mark.asyncio
+async def test_redis_keys_carry_native_ttl():
+    store = redis_store(FakeServer())
+    manager = SessionManager(store)
+    await manager.add_message("s1", role="user", content="hi")
+    
+    assert 0 < await store.client.ttl(store._meta_key("s1")) <= 3600
+    assert 0 < await store.client.ttl(store._messages_key("s1")) <= 3600
+
+
+@pytest.mark.asyncio
+async def test_memory_store_expires_idle_sessions_only(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("app.session_store.time.monotonic", lambda: clock[0])
+    manager = SessionManager(InMemorySessionStore(ttl_minutes=1))
+    
+    for session_id in ("idle", "active", "recreated"):
+        await manager.add_message(session_id, role="user", content="hi")
+    await manager.clear_session("recreated")
+    
+    clock[0] += 45
+    await manager.get_session("active")
+    await manager.add_message("recreated", role="user", content="back again")
+    
+    clock[0] += 30
+    assert await manager.get_session("idle") is None
+    assert await manager.get_session("active") is not None
+    assert await manager.get_session("recreated") is not None
+    assert await manager.get_session_count() == 2
+    
+    clock[0] += 61
+    assert await manager.get_session_count() == 0
+    assert not manager.store._expiry_heap
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(pytest.main([__file__, "-q"]))
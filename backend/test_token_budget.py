@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Tests for token-budget windowing of conversation history:
+    pytest test_token_budget.py
+"""
+
+import sys
+import pytest
+
+from app.ai_orchestrator import AIOrchestrator
+from app.models import AIProvider, ChatMessage
+from app.session_manager import SessionManager
+from app.session_store import InMemorySessionStore
+from app.token_budget import SESSION_ESTIMATOR, TOKEN_ESTIMATORS, count_session_tokens, window_messages
+
+
+def conversation(turns: int):
+    messages = []
+    for i in range(turns):
+        messages.append(ChatMessage(role="user", content=f"Question {i} about light and shadows?"))
+        messages.append(ChatMessage(role="assistant", content=f"Answer {i}: " + "light travels in straight lines. " * 10))
+    return messages
+
+
+def test_window_keeps_newest_turns_within_budget():
+    estimator = TOKEN_ESTIMATORS[AIProvider.OPENAI]
+    messages = conversation(50)
+    
+    window = window_messages(messages, 500, estimator)
+    
+    assert 0 < len(window) < len(messages)
+    assert window == messages[-len(window):]
+    assert window[0].role == "user"
+    assert sum(estimator.count_message(m) for m in window) <= 500
+
+
+def test_window_returns_everything_when_running_count_fits():
+    messages = conversation(3)
+    window = window_messages(messages, 10_000, SESSION_ESTIMATOR, count_session_tokens(messages))
+    assert window is messages
+
+
+def test_window_always_keeps_latest_message():
+    messages = [ChatMessage(role="user", content="x" * 10_000)]
+    assert window_messages(messages, 10, SESSION_ESTIMATOR) == messages
+
+
+@pytest.mark.asyncio
+async def test_running_token_count_tracks_appends_and_trims(monkeypatch):
+    monkeypatch.setattr("app.session_manager.settings.max_conversation_length", 3)
+    manager = SessionManager(InMemorySessionStore(ttl_minutes=60))
+    
+    for message in conversation(10):
+        session = await manager.add_message("s1", role=message.role, content=message.content)
+    
+    assert len(session.messages) == 6
+    assert session.token_count == count_session_tokens(session.messages)
+
+
+@pytest.mark.asyncio
+async def test_long_session_sends_only_budgeted_history(monkeypatch):
+    monkeypatch.setattr("app.ai_orchestrator.settings.prompt_token_budget", 800)
+    manager = SessionManager(InMemorySessionStore(ttl_minutes=60))
+    for message in conversation(50):
+        session = await manager.add_message("s1", role=message.role, content=message.content)
+    session = await manager.add_message("s1", role="user", content="Can you summarize what we learned?")
+    
+    window = AIOrchestrator()._context_window(session, AIProvider.CLAUDE, "You are a tutor.")
+    
+    assert window[-1].content == "Can you summarize what we learned?"
+    assert len(window) < len(session.messages)
+    assert sum(TOKEN_ESTIMATORS[AIProvider.CLAUDE].count_message(m) for m in window) <= 800
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Tests for request tracing:
+    pytest test_tracing.py
+"""
+
+import asyncio
+import json
+import sys
+import threading
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main, tracing
+from app.tracing import FileSpanExporter, SpanExporter, span
+
+
+class CollectingExporter(SpanExporter):
+    def __init__(self):
+        self.traces = []
+    
+    def export(self, trace):
+        self.traces.append(trace)
+
+
+@pytest.fixture
+def exporter(monkeypatch):
+    exporter = CollectingExporter()
+    monkeypatch.setattr(tracing, "_exporter", exporter)
+    return exporter
+
+
+@pytest.mark.asyncio
+async def test_spans_nest_across_tasks(exporter):
+    async def stage(name):
+        with span(name):
+            await asyncio.sleep(0.01)
+    
+    with span("root") as root:
+        await asyncio.gather(stage("a"), stage("b"))
+    
+    [trace] = exporter.traces
+    spans = {s.name: s for s in trace.spans}
+    assert spans["a"].parent_id == root.span_id == spans["b"].parent_id
+    assert len({s.trace.trace_id for s in trace.spans}) == 1
+    assert trace.timings()["root"] >= 10
+
+
+def test_errors_are_recorded(exporter):
+    with pytest.raises(ValueError):
+        with span("root"):
+            with span("child"):
+                raise ValueError("bad input")
+    
+    child = exporter.traces[0].spans[0]
+    assert child.to_otlp()["status"] == {"code": 2, "message": "bad input"}
+
+
+def test_file_exporter_writes_otlp_json_lines(tmp_path, monkeypatch):
+    path = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(tracing, "_exporter", FileSpanExporter(str(path)))
+    
+    with span("root", session_id="s1"):
+        with span("child", tokens=12):
+            pass
+    tracing.flush_exporter()
+    
+    child, root = [json.loads(line) for line in path.read_text().splitlines()]
+    assert child["parentSpanId"] == root["spanId"] and root["parentSpanId"] == ""
+    assert child["traceId"] == root["traceId"] and len(root["traceId"]) == 32
+    assert child["attributes"] == [{"key": "tokens", "value": {"intValue": "12"}}]
+    assert int(root["endTimeUnixNano"]) >= int(child["endTimeUnixNano"])
+
+
+def test_chat_turn_reports_stage_timings(exporter, monkeypatch):
+    async def claude(*args, **kwargs):
+        return "In straight lines!"
+    
+    monkeypatch.setattr(main.ai_orchestrator, "_use_claude", claude)
+    monkeypatch.setattr(main.settings, "tracing_timings_in_response", True)
+    
+    response = TestClient(main.app).post("/api/chat/message", json={"message": "Why is the sky blue?"})
+    
+    timings = response.json()["metadata"]["timings_ms"]
+    assert {"chat.turn", "session.add_user_message", "extract_topic", "orchestrator.process_message",
+            "prompt.build", "provider.call", "session.add_assistant_message"} <= set(timings)
+    assert exporter.traces[-1].spans[-1].name == "chat.turn"
+
+
+def test_file_exporter_writes_off_the_calling_thread(tmp_path, monkeypatch):
+    exporter = FileSpanExporter(str(tmp_path / "traces.jsonl"))
+    writers = []
+    monkeypatch.setattr(exporter.appender, "_write", lambda lines: writers.append(threading.current_thread()))
+    monkeypatch.setattr(tracing, "_exporter", exporter)
+    
+    for _ in range(3):
+        with span("root"):
+            pass
+    tracing.flush_exporter()
+    
+    assert writers and threading.current_thread() not in writers
+
+
+def test_streaming_turn_is_traced(exporter, monkeypatch):
+    async def stream_response(**kwargs):
+        for text in ("In straight ", "lines!"):
+            await asyncio.sleep(0.01)
+            yield text
+    
+    monkeypatch.setattr(main.ai_orchestrator.claude_service, "stream_response", stream_response)
+    monkeypatch.setattr(main.settings, "tracing_timings_in_response", True)
+    
+    response = TestClient(main.app).post("/api/chat/stream", json={"message": "How does light travel?"})
+    done = json.loads(response.text.split("event: done\ndata: ")[1].split("\n")[0])
+    
+    trace = exporter.traces[-1]
+    spans = {s.name: s for s in trace.spans}
+    root = spans["chat.turn"]
+    assert trace.spans[-1] is root and root.parent_id is None
+    for name in ("session.add_user_message", "provider.stream", "session.add_assistant_message"):
+        assert spans[name].parent_id == root.span_id
+    
+    stream = spans["provider.stream"].attributes
+    assert stream["provider"] == "claude" and stream["chunks"] == 2
+    assert 10 <= stream["first_token_ms"] <= spans["provider.stream"].duration_ms
+    assert done["timings_ms"]["provider.stream"] >= 20
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))